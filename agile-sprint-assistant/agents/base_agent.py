@@ -2,33 +2,38 @@
 Base Agent - Foundation for all specialized agents
 Now includes Slack notification support and rate limiting
 """
-import google.generativeai as genai
 import os
 from dotenv import load_dotenv
 import sys
 import time
+import asyncio
+import hashlib
+from contextlib import contextmanager
 
 # Add parent directory to path for imports
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(parent_dir)
 
 from utils.slack_helper import SlackNotifier
+from utils.llm_provider import get_provider
+from utils.llm_cassette import CassetteMiss
+from utils.singleflight import SingleFlight
+from database.db_manager import db_session
 
 load_dotenv()
 
+# Prompt tokens set aside for retrieved team memories
+MEMORY_TOKEN_BUDGET = int(os.getenv("MEMORY_TOKEN_BUDGET", "300"))
+
+# Identical prompts in flight at the same time (double clicks, two facilitators)
+# share one LLM call across all agents; see LLM_FLIGHT.metrics()
+LLM_FLIGHT = SingleFlight()
+
 class BaseAgent:
     def __init__(self):
-        """Initialize base agent with Gemini AI and Slack"""
-        # Configure Gemini AI
-        api_key = os.getenv("GOOGLE_API_KEY")
-        if not api_key:
-            raise ValueError("GOOGLE_API_KEY not found in environment variables")
-        
-        genai.configure(api_key=api_key)
-        
-        # Use gemini-2.5-flash - best balance of speed, quality, and quota
-        self.model = genai.GenerativeModel("models/gemini-2.5-flash")
-        print(f"[AI] ✅ Using model: gemini-2.5-flash")
+        """Initialize base agent with the configured LLM provider and Slack"""
+        # Gemini (gemini-2.5-flash) unless LLM_PROVIDER says otherwise; see utils/llm_provider.py
+        self.llm = get_provider()
         
         # Conversation context
         self.context = []
@@ -40,6 +45,32 @@ class BaseAgent:
         self.session_id = None
         self.current_sprint = None
     
+    @contextmanager
+    def database(self, db=None):
+        """
+        Yield the caller's request-scoped DatabaseManager, or open a short-lived
+        scope of our own when the agent is used outside a request
+        """
+        if db is not None:
+            yield db
+        else:
+            with db_session() as own_db:
+                yield own_db
+    
+    def team_memory_section(self, db, team_name: str, query: str, k: int = 5,
+                            token_budget: int = MEMORY_TOKEN_BUDGET):
+        """Prompt section with the team memories most relevant to `query` (empty if none)"""
+        memories = db.retrieve_team_memories(team_name, query, k=k, token_budget=token_budget)
+        if not memories:
+            return ""
+        
+        lines = ["Relevant team memory (lessons and decisions from past sprints):"]
+        for memory in memories:
+            sprint = f", sprint {memory['sprint_number']}" if memory["sprint_number"] else ""
+            lines.append(f"- [{memory['memory_type']}{sprint}] {memory['content']}")
+        print(f"[AI] Added {len(memories)} team memories to the prompt")
+        return "\n".join(lines)
+    
     def add_context(self, role: str, content: str):
         """Add message to conversation context"""
         self.context.append({
@@ -58,15 +89,30 @@ class BaseAgent:
             context_str += f"[{item['role']}]: {item['content']}\n\n"
         return context_str
     
+    def _flight_key(self, prompt: str):
+        return (self.llm.name, hashlib.sha256(prompt.encode("utf-8")).hexdigest())
+    
     def generate_response(self, prompt: str) -> str:
-        """Generate AI response using Gemini with retry logic"""
+        """
+        Generate AI response using the LLM provider with retry logic.
+        A call for the same prompt already in flight is joined, not repeated.
+        """
+        return LLM_FLIGHT.do(self._flight_key(prompt), self._generate_with_retry, prompt)
+    
+    async def agenerate_response(self, prompt: str) -> str:
+        """generate_response for async callers, coalesced with identical awaits on the loop"""
+        return await LLM_FLIGHT.do_async(self._flight_key(prompt), asyncio.to_thread, self._generate_with_retry, prompt)
+    
+    def _generate_with_retry(self, prompt: str) -> str:
         max_retries = 3
         retry_delay = 30  # seconds
         
         for attempt in range(max_retries):
             try:
-                response = self.model.generate_content(prompt)
-                return response.text
+                return self.llm.generate(prompt)
+            except CassetteMiss:
+                # A stale cassette must fail the request, not read as a model answer
+                raise
             except Exception as e:
                 error_msg = str(e)
                 
@@ -79,7 +125,7 @@ class BaseAgent:
                     else:
                         return f"""[ERROR] API rate limit exceeded. Please wait a minute and try again.
 
-Current model: gemini-2.5-flash
+Current model: {self.llm.name}
 Free tier limits: Multiple requests per minute allowed
 Wait 60 seconds and try again."""
                 else:
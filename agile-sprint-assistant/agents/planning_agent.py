@@ -5,32 +5,43 @@ With completion tracking, story estimate clearing, and sprint status updates
 import sys
 import os
 import re
+import threading
 
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, parent_dir)
 
 from agents.base_agent import BaseAgent
-from database.db_manager import DatabaseManager
+from database.forecast import format_forecast
+from database.similar_stories import format_similar_stories
+from database.local_estimator import format_local_estimate
+
+# How the local (no-LLM) estimator is used when estimating a story:
+# "fallback" when the LLM gives no usable estimate, "fast" instead of the LLM,
+# "first" as an instant answer replaced by the LLM's when it arrives, or "off"
+ESTIMATION_MODES = ("fallback", "fast", "first", "off")
+LOCAL_ESTIMATE_MODE = os.getenv("LOCAL_ESTIMATE_MODE", "fallback")
 
 class PlanningAgent(BaseAgent):
     def __init__(self):
         super().__init__()
         self.planning_started = False
-        self.estimations = {}
         self.plan_approved = False
+        
+        # story_id -> state of estimates whose LLM answer is still coming ("first" mode)
+        self.pending_estimates = {}
+        self._pending_lock = threading.Lock()
     
-    def start_planning(self, session_id: str):
+    def start_planning(self, session_id: str, db=None):
         """Start a new planning session"""
         self.session_id = session_id
         self.current_sprint = self.extract_sprint_number(session_id)
         self.planning_started = True
         self.plan_approved = False
         self.clear_context()
-        self.estimations = {}
         
         # Get sprint info from database
-        db = DatabaseManager()
-        sprint = db.get_sprint(session_id)
+        with self.database(db) as db:
+            sprint = db.get_sprint(session_id)
         
         if not sprint:
             return f"[ERROR] Sprint '{session_id}' not found in database."
@@ -49,24 +60,41 @@ The team can now provide story point estimates. The AI will offer its own estima
         self.add_context("system", message)
         return message
     
-    def estimate_story_with_comparison(self, story_id: str, team_estimate: int, team_reasoning: str, estimated_by: str):
+    def estimate_story_with_comparison(self, story_id: str, team_estimate: int, team_reasoning: str, estimated_by: str, db=None, mode: str = None):
         """
-        Team provides an estimate, AI provides its own, then compare
+        Team provides an estimate, AI provides its own, then compare.
+        `mode` (default LOCAL_ESTIMATE_MODE) decides how the local estimator is used:
+        "fallback" when the LLM gives no usable estimate, "fast" instead of the
+        LLM, "first" shown at once and replaced by the LLM's answer when it
+        arrives (see estimate_status), or "off".
         """
         if not self.planning_started:
             return {"error": "Planning session not started"}
         
-        # Get story details from database
-        db = DatabaseManager()
-        sprint = db.get_sprint(self.session_id)
-        if not sprint:
-            return {"error": "Sprint not found"}
+        mode = mode or LOCAL_ESTIMATE_MODE
+        if mode not in ESTIMATION_MODES:
+            return {"error": f"Unknown estimation mode '{mode}'. Use: {', '.join(ESTIMATION_MODES)}"}
         
-        stories = db.get_sprint_stories(sprint.id)
-        story = next((s for s in stories if s.story_id == story_id), None)
+        # Get story details from database
+        with self.database(db) as scoped_db:
+            sprint = scoped_db.get_sprint(self.session_id)
+            if not sprint:
+                return {"error": "Sprint not found"}
+            
+            story = scoped_db.get_story(sprint.id, story_id)
+            if not story:
+                return {"error": f"Story {story_id} not found"}
+            
+            memory_section = self.team_memory_section(
+                scoped_db, sprint.team_name,
+                f"estimation {story.title} {story.description} {story.acceptance_criteria}"
+            )
+            similar = scoped_db.find_similar_stories(story)
+            similar_section = format_similar_stories(similar)
+            local = scoped_db.estimate_story_locally(story) if mode != "off" else None
         
-        if not story:
-            return {"error": f"Story {story_id} not found"}
+        if local:
+            print(f"[Planning] {format_local_estimate(local)}")
         
         # Generate AI estimate with clear formatting instructions
         prompt = f"""
@@ -80,6 +108,11 @@ Acceptance Criteria: {story.acceptance_criteria}
 The team's estimate: {team_estimate} points
 Team's reasoning: {team_reasoning}
 
+{similar_section}
+{"Use these as reference points: say which one this story is most like and whether it is bigger or smaller." if similar else ""}
+
+{memory_section}
+
 CRITICAL: You MUST start your response with EXACTLY this format on the first line:
 AI_ESTIMATE: [number]
 
@@ -97,8 +130,111 @@ Then on subsequent lines, provide:
 Be specific and technical in your analysis.
         """
         
-        ai_response = self.generate_response(prompt)
+        pending = mode == "first"
+        if mode in ("fast", "first"):
+            ai_estimate = local["estimate"]
+            ai_response = format_local_estimate(local)
+            if pending:
+                ai_response += "\n\nAI analysis in progress - it will replace this local estimate when ready."
+        else:
+            ai_response = self.generate_response(prompt)
+            ai_estimate, extraction_method = self._extract_ai_estimate(ai_response, team_estimate)
+            if extraction_method == "default" and local:
+                ai_estimate = local["estimate"]
+                ai_response = f"{format_local_estimate(local)}\n(No usable AI estimate - using the local estimate)\n\n{ai_response}"
+                print(f"[Planning] Falling back to local estimate: {ai_estimate}")
+        
+        # Persist the comparison; finalize_story_estimate picks it up from the database
+        with self.database(db) as scoped_db:
+            estimation = scoped_db.record_estimation(story.id, team_estimate, ai_estimate,
+                                                     team_reasoning, ai_response, estimated_by)
+            estimation_id = estimation.id
+        
+        comparison_message = self._comparison_message(
+            story_id, story.title, team_estimate, estimated_by, team_reasoning, similar_section, ai_response
+        )
+        
+        if pending:
+            with self._pending_lock:
+                self.pending_estimates[story_id] = {"status": "pending"}
+            threading.Thread(
+                target=self._finish_pending_estimate,
+                args=(story_id, story.title, estimation_id, prompt, team_estimate, estimated_by,
+                      team_reasoning, similar_section, local),
+                daemon=True
+            ).start()
+        
+        # The full analysis is stored with the estimation; keep only the outcome here
+        self.add_context("comparison", f"{story_id}: team {team_estimate} / AI {ai_estimate} points")
         
+        return {
+            "comparison": comparison_message,
+            "team_estimate": team_estimate,
+            "agent_estimate": ai_estimate,
+            "story_id": story_id,
+            "pending": pending
+        }
+    
+    def _comparison_message(self, story_id: str, title: str, team_estimate: int, estimated_by: str,
+                            team_reasoning: str, similar_section: str, ai_response: str):
+        return f"""
+[ESTIMATION COMPARISON]
+Story: {story_id} - {title}
+
+Team Estimate: {team_estimate} points
+Estimated by: {estimated_by}
+Team Reasoning: {team_reasoning}
+
+{similar_section}
+
+AI Estimate & Analysis:
+{ai_response}
+
+Please review both estimates and choose which to use for final planning.
+        """
+    
+    def _finish_pending_estimate(self, story_id: str, title: str, estimation_id: int, prompt: str,
+                                 team_estimate: int, estimated_by: str, team_reasoning: str,
+                                 similar_section: str, local: dict):
+        """Background half of "first" mode: ask the LLM and swap its answer in if it gave one"""
+        try:
+            ai_response = self.generate_response(prompt)
+        except Exception as e:
+            # Nobody is waiting on this thread; keep the local estimate and show why
+            print(f"[Planning Error] AI estimate for {story_id} failed: {e}")
+            ai_response = f"Error generating response: {e}"
+        ai_estimate, extraction_method = self._extract_ai_estimate(ai_response, team_estimate)
+        if extraction_method == "default":
+            ai_estimate = local["estimate"]
+            ai_response = f"{format_local_estimate(local)}\n(No usable AI estimate - keeping the local estimate)\n\n{ai_response}"
+        
+        try:
+            with self.database() as scoped_db:
+                if not scoped_db.update_pending_estimation(estimation_id, ai_estimate, ai_response):
+                    print(f"[Planning] {story_id} was finalized before the AI answer arrived")
+        except Exception as e:
+            print(f"[Planning Error] Failed to store AI estimate for {story_id}: {e}")
+        
+        with self._pending_lock:
+            self.pending_estimates[story_id] = {
+                "status": "done",
+                "agent_estimate": ai_estimate,
+                "comparison": self._comparison_message(
+                    story_id, title, team_estimate, estimated_by, team_reasoning, similar_section, ai_response
+                )
+            }
+    
+    def estimate_status(self, story_id: str):
+        """State of a "first" mode estimate: {"status": "pending"} or the final comparison"""
+        with self._pending_lock:
+            return dict(self.pending_estimates.get(story_id, {"status": "none"}))
+    
+    def _extract_ai_estimate(self, ai_response: str, team_estimate: int):
+        """
+        Parse the AI's Fibonacci estimate out of its response.
+        Returns (estimate, extraction method); the method is "default" and the
+        estimate the team's when nothing usable was found.
+        """
         # Extract AI's numeric estimate - IMPROVED PARSING
         ai_estimate = team_estimate  # Default to team estimate
         extraction_method = "default"
@@ -182,143 +318,47 @@ Be specific and technical in your analysis.
             print(f"[Planning] WARNING: Could not extract AI estimate, defaulting to team estimate: {team_estimate}")
             print(f"[Planning] Response preview: {ai_response[:300]}...")
         
-        # Store estimation data
-        self.estimations[story_id] = {
-            "team_estimate": team_estimate,
-            "team_reasoning": team_reasoning,
-            "estimated_by": estimated_by,
-            "ai_estimate": ai_estimate,
-            "ai_reasoning": ai_response,
-            "extraction_method": extraction_method
-        }
-        
-        comparison_message = f"""
-[ESTIMATION COMPARISON]
-Story: {story_id} - {story.title}
-
-Team Estimate: {team_estimate} points
-Estimated by: {estimated_by}
-Team Reasoning: {team_reasoning}
-
-AI Estimate & Analysis:
-{ai_response}
-
-Please review both estimates and choose which to use for final planning.
-        """
-        
-        self.add_context("comparison", comparison_message)
-        
-        return {
-            "comparison": comparison_message,
-            "team_estimate": team_estimate,
-            "agent_estimate": ai_estimate,
-            "story_id": story_id
-        }
+        return ai_estimate, extraction_method
     
-    def finalize_story_estimate(self, story_id: str, accept_ai: bool):
+    def finalize_story_estimate(self, story_id: str, accept_ai: bool, db=None):
         """
         Finalize the estimate after team reviews both
         """
-        if story_id not in self.estimations:
-            return f"[ERROR] No estimation data found for {story_id}"
-        
-        estimation = self.estimations[story_id]
-        
-        final_estimate = estimation["ai_estimate"] if accept_ai else estimation["team_estimate"]
-        decision = "AI estimate" if accept_ai else "Team estimate"
-        
         # Update story in database
         result = "[ERROR] Failed to update database"
+        with self._pending_lock:
+            self.pending_estimates.pop(story_id, None)
         
         try:
-            # Create new database manager
-            db = DatabaseManager()
-            
-            # Get sprint
-            sprint = db.get_sprint(self.session_id)
-            if not sprint:
-                return "[ERROR] Sprint not found"
-            
-            # Get all stories for this sprint
-            stories = db.get_sprint_stories(sprint.id)
-            story = next((s for s in stories if s.story_id == story_id), None)
-            
-            if story:
-                # Update story attributes
-                story.story_points = final_estimate
-                story.story_points_approved = True
-                
-                committed = False
-                
-                # Method 1: Try SQLAlchemy inspection to get session
-                try:
-                    from sqlalchemy import inspect as sa_inspect
-                    session = sa_inspect(story).session
-                    if session:
-                        session.commit()
-                        committed = True
-                        print(f"[Planning] Story {story_id} finalized: {final_estimate} points (using {decision})")
-                except Exception as e1:
-                    print(f"[Planning] Method 1 (inspection) failed: {e1}")
+            with self.database(db) as db:
+                sprint = db.get_sprint(self.session_id)
+                story = db.get_story(sprint.id, story_id) if sprint else None
+                estimation = db.get_pending_estimation(story.id) if story else None
+                if not estimation:
+                    return f"[ERROR] No estimation data found for {story_id}"
                 
-                # Method 2: Try accessing db manager's session
-                if not committed:
-                    try:
-                        if hasattr(db, 'session'):
-                            db.session.commit()
-                            committed = True
-                            print(f"[Planning] Story {story_id} finalized via session: {final_estimate} points")
-                        elif hasattr(db, '_session'):
-                            db._session.commit()
-                            committed = True
-                            print(f"[Planning] Story {story_id} finalized via _session: {final_estimate} points")
-                    except Exception as e2:
-                        print(f"[Planning] Method 2 (session attribute) failed: {e2}")
-                
-                # Method 3: Create new session with engine from models
-                if not committed:
-                    try:
-                        from database.models import engine, UserStory
-                        from sqlalchemy.orm import Session
-                        
-                        new_session = Session(bind=engine)
-                        
-                        # Query the story again in this new session
-                        db_story = new_session.query(UserStory).filter(
-                            UserStory.story_id == story_id
-                        ).first()
-                        
-                        if db_story:
-                            db_story.story_points = final_estimate
-                            db_story.story_points_approved = True
-                            new_session.commit()
-                            committed = True
-                            print(f"[Planning] Story {story_id} finalized via new session: {final_estimate} points")
-                        
-                        new_session.close()
-                    except Exception as e3:
-                        print(f"[Planning] Method 3 (new session) failed: {e3}")
-                        import traceback
-                        traceback.print_exc()
+                final_estimate = estimation.agent_estimate if accept_ai else estimation.team_estimate
+                decision = "AI estimate" if accept_ai else "Team estimate"
                 
-                if committed:
+                db.finalize_estimation(estimation.id, final_estimate, accept_ai)
+                if db.update_story_estimate(sprint.id, story_id, final_estimate, approved=True):
+                    print(f"[Planning] Story {story_id} finalized: {final_estimate} points (using {decision})")
+                    
                     result = f"""
 [ESTIMATE FINALIZED]
 Story: {story_id}
 Decision: Using {decision}
 Final Points: {final_estimate}
 
-Team Estimate: {estimation["team_estimate"]} points
-AI Estimate: {estimation["ai_estimate"]} points
+Team Estimate: {estimation.team_estimate} points
+AI Estimate: {estimation.agent_estimate} points
 Chosen: {final_estimate} points
 
 The estimate has been saved and the story is ready for the sprint!
                     """
                 else:
-                    result = "[ERROR] Could not commit changes to database - all methods failed"
-            else:
-                result = f"[ERROR] Story {story_id} not found in sprint stories"
-                print(f"[Planning Error] {result}")
+                    result = f"[ERROR] Story {story_id} not found in sprint stories"
+                    print(f"[Planning Error] {result}")
         except Exception as e:
             result = f"[ERROR] Failed to finalize estimate: {str(e)}"
             print(f"[Planning Error] {result}")
@@ -328,18 +368,26 @@ The estimate has been saved and the story is ready for the sprint!
         self.add_context("finalized", result)
         return result
     
-    def generate_sprint_plan(self):
+    def generate_sprint_plan(self, db=None):
         """Generate comprehensive sprint plan"""
         if not self.planning_started:
             return {"error": "Planning session not started"}
         
         # Get sprint and stories from database
-        db = DatabaseManager()
-        sprint = db.get_sprint(self.session_id)
-        if not sprint:
-            return {"error": "Sprint not found"}
-        
-        stories = db.get_sprint_stories(sprint.id)
+        with self.database(db) as scoped_db:
+            sprint = scoped_db.get_sprint(self.session_id)
+            if not sprint:
+                return {"error": "Sprint not found"}
+            
+            stories = scoped_db.get_sprint_stories(sprint.id)
+            dependency_graph = scoped_db.get_dependency_graph(sprint.id)
+            capacity = scoped_db.get_team_capacity(sprint)
+            scope = scoped_db.optimize_sprint_scope(sprint, capacity)
+            forecast = scoped_db.get_sprint_forecast(sprint)
+            memory_section = self.team_memory_section(
+                scoped_db, sprint.team_name,
+                f"planning velocity {sprint.sprint_goal} " + " ".join(s.title for s in stories)
+            )
         
         # Build context
         stories_summary = ""
@@ -348,7 +396,8 @@ The estimate has been saved and the story is ready for the sprint!
         
         for story in stories:
             if story.story_points and story.story_points_approved:
-                stories_summary += f"- {story.story_id}: {story.title} ({story.story_points} points)\n"
+                owner = f", assigned to {story.assigned_to}" if story.assigned_to else ""
+                stories_summary += f"- {story.story_id}: {story.title} ({story.story_points} points{owner})\n"
                 total_points += story.story_points
                 approved_count += 1
         
@@ -360,6 +409,24 @@ The estimate has been saved and the story is ready for the sprint!
                 "story_count": 0
             }
         
+        # Order is computed from the recorded dependencies, not left to the model
+        dependency_summary = dependency_graph.summary(
+            [s.story_id for s in stories if s.story_points and s.story_points_approved]
+        )
+        
+        # Let the model plan against a scope that actually fits the team
+        if capacity and total_points > capacity:
+            capacity_summary = (
+                f"Team capacity: {capacity} points - OVER CAPACITY by {total_points - capacity} points.\n"
+                f"Recommended scope within capacity ({scope['selected_points']} points): "
+                f"{', '.join(scope['selected']) or 'none'}\n"
+                f"Recommended to defer: {', '.join(scope['deferred']) or 'none'}"
+            )
+        elif capacity:
+            capacity_summary = f"Team capacity: {capacity} points ({total_points} committed, {capacity - total_points} to spare)"
+        else:
+            capacity_summary = "Team capacity: not set"
+        
         # Generate plan with AI
         prompt = f"""
 You are an AI Scrum Master. Create a comprehensive sprint plan based on the following:
@@ -372,24 +439,32 @@ Team: {sprint.team_name}
 Approved Stories ({approved_count} stories, {total_points} points):
 {stories_summary}
 
+{dependency_summary}
+
+{capacity_summary}
+
+{format_forecast(forecast)}
+
+{memory_section}
+
 Create a detailed sprint plan that includes:
 
 1. SPRINT OVERVIEW
    - Sprint goal recap
-   - Total capacity and velocity
+   - Total capacity and velocity (if over capacity, say which stories to defer)
    - Key objectives
 
 2. STORY BREAKDOWN
    - How to approach each story
-   - Suggested order of implementation
-   - Dependencies between stories
+   - Follow the implementation order above and call out the critical path
+   - How blocked stories will be unblocked
 
 3. DAILY GOALS (estimate progress per day)
    - What should be completed each day
    - Milestones to hit
 
 4. RISK ASSESSMENT
-   - Potential risks and challenges
+   - Potential risks and challenges (use the completion forecast above)
    - Mitigation strategies
    - Contingency plans
 
@@ -410,7 +485,8 @@ Format professionally with clear sections, bullet points, and actionable items.
         
         # Store in database
         try:
-            db.store_sprint_plan(self.session_id, plan_text)
+            with self.database(db) as scoped_db:
+                scoped_db.store_sprint_plan(self.session_id, plan_text)
             print(f"[Planning] Sprint plan stored in database")
         except Exception as e:
             print(f"[Planning Error] Failed to store plan: {e}")
@@ -421,7 +497,7 @@ Format professionally with clear sections, bullet points, and actionable items.
             "story_count": approved_count
         }
     
-    def approve_plan(self, scrum_master: str, comments: str = ""):
+    def approve_plan(self, scrum_master: str, comments: str = "", db=None):
         """Approve sprint plan, send Slack notification, and update sprint status to active"""
         if not self.planning_started:
             return "[ERROR] Planning session not started"
@@ -447,37 +523,45 @@ The team is ready to start the sprint.
         
         # Update sprint status to active
         try:
-            from database.db_manager import DatabaseManager
-            db = DatabaseManager()
-            sprint = db.get_sprint(self.session_id)
-            
-            if sprint:
-                # Update sprint status to active
-                db.update_sprint_status(self.session_id, "active")
-                print(f"[Planning] Sprint {self.current_sprint} status updated to ACTIVE")
+            with self.database(db) as db:
+                sprint = db.get_sprint(self.session_id)
                 
-                # Get sprint statistics for Slack
-                try:
-                    stories = db.get_sprint_stories(sprint.id)
-                    approved_stories = [s for s in stories if s.story_points_approved]
-                    total_points = sum(s.story_points for s in approved_stories if s.story_points)
+                if sprint:
+                    # Update sprint status to active
+                    db.update_sprint_status(self.session_id, "active")
+                    print(f"[Planning] Sprint {self.current_sprint} status updated to ACTIVE")
                     
-                    # Send to Slack
-                    if self.slack.is_enabled():
-                        slack_sent = self.slack.send_planning_complete(
-                            self.current_sprint,
-                            total_points,
-                            len(approved_stories)
-                        )
-                        if slack_sent:
-                            print(f"[Planning] Completion notification sent to Slack!")
-                            approval_message += "\n\nTeam has been notified on Slack!"
-                    else:
-                        print("[Planning] Slack notifications disabled")
-                except Exception as e:
-                    print(f"[Planning Error] Failed to get sprint stats or send Slack: {e}")
-            else:
-                print(f"[Planning Error] Sprint {self.session_id} not found for status update")
+                    # Get sprint statistics for Slack
+                    try:
+                        stories = db.get_sprint_stories(sprint.id)
+                        approved_stories = [s for s in stories if s.story_points_approved]
+                        total_points = sum(s.story_points for s in approved_stories if s.story_points)
+                        
+                        capacity = db.get_team_capacity(sprint)
+                        if capacity and total_points > capacity:
+                            print(f"[Planning] Approved scope {total_points} points exceeds capacity {capacity}")
+                            approval_message += (
+                                f"\n\n[WARNING] Approved scope is {total_points} points but team capacity is "
+                                f"{capacity} points ({total_points - capacity} over). "
+                                f"Use 'Recommend Scope' to see which stories to defer."
+                            )
+                        
+                        # Send to Slack
+                        if self.slack.is_enabled():
+                            slack_sent = self.slack.send_planning_complete(
+                                self.current_sprint,
+                                total_points,
+                                len(approved_stories)
+                            )
+                            if slack_sent:
+                                print(f"[Planning] Completion notification sent to Slack!")
+                                approval_message += "\n\nTeam has been notified on Slack!"
+                        else:
+                            print("[Planning] Slack notifications disabled")
+                    except Exception as e:
+                        print(f"[Planning Error] Failed to get sprint stats or send Slack: {e}")
+                else:
+                    print(f"[Planning Error] Sprint {self.session_id} not found for status update")
                 
         except Exception as e:
             print(f"[Planning Error] Failed to update sprint status: {e}")
@@ -9,7 +9,9 @@ parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, parent_dir)
 
 from agents.base_agent import BaseAgent
-from database.db_manager import DatabaseManager
+from utils.feedback_clusters import FeedbackClusters, format_clusters
+
+CATEGORIES = ("went_well", "not_well", "improve")
 
 class RetrospectiveAgent(BaseAgent):
     def __init__(self):
@@ -20,12 +22,13 @@ class RetrospectiveAgent(BaseAgent):
             "not_well": [],
             "improve": []
         }
+        self.clusters = {category: FeedbackClusters() for category in CATEGORIES}
         self.team_sentiment = 7
         self.action_items_draft = []
         self.retrospective_id = None
         self.summary_generated = False  # NEW: Track if summary is generated
     
-    def start_retrospective(self, session_id: str, facilitator: str):
+    def start_retrospective(self, session_id: str, facilitator: str, db=None):
         """Start a new retrospective session"""
         self.session_id = session_id
         self.current_sprint = self.extract_sprint_number(session_id)
@@ -38,12 +41,13 @@ class RetrospectiveAgent(BaseAgent):
             "not_well": [],
             "improve": []
         }
+        self.clusters = {category: FeedbackClusters() for category in CATEGORIES}
         self.team_sentiment = 7
         self.action_items_draft = []
         
         # Get sprint info
-        db = DatabaseManager()
-        sprint = db.get_sprint(session_id)
+        with self.database(db) as db:
+            sprint = db.get_sprint(session_id)
         
         if not sprint:
             return f"[ERROR] Sprint '{session_id}' not found in database."
@@ -83,6 +87,7 @@ STEP 4: Generate comprehensive summary (including action items)
         
         if category in self.feedback:
             self.feedback[category].append(feedback_item)
+            cluster, is_new = self.clusters[category].add(feedback_text, submitted_by)
             
             category_display = {
                 "went_well": "What Went Well",
@@ -90,11 +95,15 @@ STEP 4: Generate comprehensive summary (including action items)
                 "improve": "What Can We Improve"
             }
             
+            similar = "" if is_new else (
+                f'\nSimilar to "{cluster["text"]}" - counted as a vote ({cluster["votes"]} votes)'
+            )
+            
             result = f"""
 [FEEDBACK ADDED]
 Category: {category_display.get(category, category)}
 Submitted by: {submitted_by}
-Feedback: {feedback_text}
+Feedback: {feedback_text}{similar}
 
 Feedback recorded successfully!
             """
@@ -163,24 +172,27 @@ Created {len(self.action_items_draft)} action items for Sprint {self.current_spr
         self.add_context("actions_draft", result)
         return result
     
-    def generate_summary(self):
+    def generate_summary(self, db=None):
         """Generate comprehensive retrospective summary and store everything"""
         if not self.retro_started:
             return {"error": "Retrospective session not started"}
         
-        db = DatabaseManager()
-        sprint = db.get_sprint(self.session_id)
-        
-        if not sprint:
-            return {"error": "Sprint not found"}
+        with self.database(db) as scoped_db:
+            sprint = scoped_db.get_sprint(self.session_id)
+            if not sprint:
+                return {"error": "Sprint not found"}
+            
+            feedback_text = " ".join(
+                item["text"] for items in self.feedback.values() for item in items
+            )
+            memory_section = self.team_memory_section(
+                scoped_db, sprint.team_name, f"retrospective improvement {feedback_text}"
+            )
         
-        # Format feedback for AI
-        went_well_text = "\n".join([f"- {item['text']} (by {item['submitted_by']})" 
-                                    for item in self.feedback["went_well"]])
-        not_well_text = "\n".join([f"- {item['text']} (by {item['submitted_by']})" 
-                                   for item in self.feedback["not_well"]])
-        improve_text = "\n".join([f"- {item['text']} (by {item['submitted_by']})" 
-                                  for item in self.feedback["improve"]])
+        # Format feedback for AI - one line per cluster of near-duplicate items
+        went_well_text = format_clusters(self.clusters["went_well"])
+        not_well_text = format_clusters(self.clusters["not_well"])
+        improve_text = format_clusters(self.clusters["improve"])
         
         # Format action items for AI context
         action_items_text = ""
@@ -199,6 +211,8 @@ Sprint {self.current_sprint}
 Team Sentiment: {self.team_sentiment}/10
 Facilitator: {self.facilitator}
 
+Similar feedback items have been merged; the vote count says how many people raised each one.
+
 WHAT WENT WELL:
 {went_well_text if went_well_text else "No feedback provided"}
 
@@ -211,47 +225,51 @@ WHAT CAN WE IMPROVE:
 ACTION ITEMS CREATED:
 {action_items_text}
 
+{memory_section}
+
 Create a comprehensive summary with: Executive Summary, Detailed Analysis, Patterns, Action Items Review, Key Takeaways, and Recommendations.
+Where team memory is given, point out issues that keep recurring across sprints.
         """
         
         summary_text = self.generate_response(prompt)
         
         # Store in database
         try:
-            retro_id = db.store_retrospective(
-                self.session_id,
-                self.facilitator,
-                self.feedback["went_well"],
-                self.feedback["not_well"],
-                self.feedback["improve"],
-                summary_text,
-                self.team_sentiment
-            )
-            self.retrospective_id = retro_id
-            print(f"[Retrospective] Summary stored with ID: {retro_id}")
-            
-            # Store action items
-            if self.action_items_draft:
-                for item in self.action_items_draft:
-                    action_id = f"AI-{self.current_sprint:03d}-{item['number']:02d}"
-                    db.store_action_item(
-                        retro_id,
-                        action_id,
-                        item["title"],
-                        item["description"],
-                        item["assigned_to"],
-                        item.get("target_date"),
-                        item["priority"]
-                    )
-                    print(f"[Retrospective] Created action item: {action_id}")
+            with self.database(db) as scoped_db:
+                retro_id = scoped_db.store_retrospective(
+                    self.session_id,
+                    self.facilitator,
+                    self.feedback["went_well"],
+                    self.feedback["not_well"],
+                    self.feedback["improve"],
+                    summary_text,
+                    self.team_sentiment
+                )
+                self.retrospective_id = retro_id
+                print(f"[Retrospective] Summary stored with ID: {retro_id}")
+                
+                # Store action items
+                if self.action_items_draft:
+                    for item in self.action_items_draft:
+                        action_id = f"AI-{self.current_sprint:03d}-{item['number']:02d}"
+                        scoped_db.store_action_item(
+                            retro_id,
+                            action_id,
+                            item["title"],
+                            item["description"],
+                            item["assigned_to"],
+                            item.get("target_date"),
+                            item["priority"]
+                        )
+                        print(f"[Retrospective] Created action item: {action_id}")
         except Exception as e:
             print(f"[Retrospective Error] Failed to store: {e}")
         
         # Send to Slack
         try:
             if self.slack.is_enabled():
-                went_well_list = [item['text'] for item in self.feedback["went_well"][:3]]
-                needs_improvement = [item['text'] for item in self.feedback["not_well"][:3]]
+                went_well_list = [c["text"] for c in self.clusters["went_well"].ranked()[:3]]
+                needs_improvement = [c["text"] for c in self.clusters["not_well"].ranked()[:3]]
                 
                 self.slack.send_retrospective_summary(self.current_sprint, went_well_list, needs_improvement)
                 
@@ -279,6 +297,10 @@ Create a comprehensive summary with: Executive Summary, Detailed Analysis, Patte
             "action_items_count": len(self.action_items_draft)
         }
     
+    def feedback_board(self):
+        """Feedback clusters per category, most votes first"""
+        return {category: self.clusters[category].ranked() for category in CATEGORIES}
+    
     def is_completed(self):
         """Check if retrospective is completed (summary generated)"""
         return self.summary_generated
@@ -4,32 +4,61 @@ With completion tracking and enhanced logging
 """
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, parent_dir)
 
 from agents.base_agent import BaseAgent
-from database.db_manager import DatabaseManager
+from database.blockers import split_blockers, format_blockers
+
+# "incremental" summarizes updates in the background as they arrive and only
+# merges the partial summaries at the end; "single" sends one prompt at the end
+STANDUP_SUMMARY_MODE = os.getenv("STANDUP_SUMMARY_MODE", "single")
+
+# Updates per background partial summary
+STANDUP_BATCH_SIZE = int(os.getenv("STANDUP_BATCH_SIZE", "2"))
+
+# Shared by every standup; partial summaries are short, independent LLM calls
+_partial_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="standup-partial")
+
+def format_updates(updates: list):
+    """Updates as prompt text"""
+    updates_text = ""
+    for update in updates:
+        updates_text += f"\n{update['member']}:\n"
+        updates_text += f"  Yesterday: {update['yesterday']}\n"
+        updates_text += f"  Today: {update['today']}\n"
+        updates_text += f"  Blockers: {update['blockers']}\n"
+    return updates_text
 
 class StandupAgent(BaseAgent):
-    def __init__(self):
+    def __init__(self, summary_mode: str = None):
         super().__init__()
         self.standup_started = False
         self.updates = []
         self.summary_generated = False
+        self.summary_mode = summary_mode or STANDUP_SUMMARY_MODE
+        
+        # Incremental mode: (batch of updates, future of its partial summary), and
+        # updates waiting for a full batch
+        self.partials = []
+        self.pending_batch = []
         print("[StandupAgent] Initialized with summary_generated=False")
     
-    def start_standup(self, session_id: str):
+    def start_standup(self, session_id: str, db=None):
         """Start a new standup session"""
         self.session_id = session_id
         self.current_sprint = self.extract_sprint_number(session_id)
         self.standup_started = True
         self.summary_generated = False  # Reset on new session
+        self.partials = []
+        self.pending_batch = []
         self.clear_context()
         print(f"[StandupAgent] Started standup, summary_generated={self.summary_generated}")
         
-        db = DatabaseManager()
-        sprint = db.get_sprint(session_id)
+        with self.database(db) as db:
+            sprint = db.get_sprint(session_id)
         
         if not sprint:
             return f"[ERROR] Sprint '{session_id}' not found in database."
@@ -60,6 +89,12 @@ Daily standup has begun! Team members can now share their updates.
         self.updates.append(update)
         print(f"[StandupAgent] Collected update from {member}, total updates: {len(self.updates)}")
         
+        if self.summary_mode == "incremental":
+            self.pending_batch.append(update)
+            if len(self.pending_batch) >= STANDUP_BATCH_SIZE:
+                self._start_partial(self.pending_batch)
+                self.pending_batch = []
+        
         result = f"""
 [UPDATE RECORDED]
 Member: {member}
@@ -73,8 +108,55 @@ Update recorded successfully! ({len(self.updates)} updates collected)
         self.add_context("update", result)
         return result
     
-    def generate_summary(self):
-        """Generate AI-powered standup summary"""
+    def _start_partial(self, batch: list):
+        """Summarize a batch of updates in the background"""
+        prompt = f"""
+You are an AI Scrum Master taking notes during a daily standup.
+Condense these updates into brief notes (under 80 words): what was done,
+today's focus, and every blocker with its owner. Do not drop any blocker.
+{format_updates(batch)}
+        """
+        self.partials.append((batch, _partial_pool.submit(self.generate_response, prompt)))
+        print(f"[StandupAgent] Summarizing {len(batch)} updates in the background")
+    
+    def _collected_notes(self):
+        """
+        Team updates for the final prompt in incremental mode: the partial
+        summaries, with raw updates for batches that failed or never filled up
+        """
+        sections = []
+        for batch, future in self.partials:
+            try:
+                notes = future.result()
+            except Exception as e:
+                notes = f"Error generating response: {e}"
+            if notes.startswith("[ERROR]") or notes.startswith("Error generating response"):
+                sections.append(format_updates(batch))
+            else:
+                sections.append(f"\nNotes on {', '.join(u['member'] for u in batch)}:\n{notes.strip()}\n")
+        if self.pending_batch:
+            sections.append(format_updates(self.pending_batch))
+        return "".join(sections)
+    
+    def _reduce_prompt(self):
+        """
+        Final prompt in incremental mode: only merges the partial notes, which
+        already carry every blocker with its owner, so it skips the tracked
+        blockers, team memory and four-section template of single mode
+        """
+        return f"""
+You are an AI Scrum Master. Merge these standup notes for Sprint {self.current_sprint}
+into one concise summary: highlights, blockers with their owners, and action items.
+Keep every blocker; do not repeat the notes member by member.
+{self._collected_notes()}
+        """
+    
+    def generate_summary(self, db=None):
+        """
+        Generate AI-powered standup summary. Single mode sends every update with
+        the team's tracked blockers and memory in one full prompt; incremental
+        mode only sends the short merge prompt of _reduce_prompt()
+        """
         print(f"[StandupAgent] generate_summary called, summary_generated={self.summary_generated}")
         
         if not self.standup_started:
@@ -85,21 +167,49 @@ Update recorded successfully! ({len(self.updates)} updates collected)
             print("[StandupAgent] ERROR: No updates to summarize")
             return {"error": "No updates to summarize"}
         
+        incremental = self.summary_mode == "incremental"
+        
         # Format updates for AI
-        updates_text = ""
-        for update in self.updates:
-            updates_text += f"\n{update['member']}:\n"
-            updates_text += f"  Yesterday: {update['yesterday']}\n"
-            updates_text += f"  Today: {update['today']}\n"
-            updates_text += f"  Blockers: {update['blockers']}\n"
+        updates_text = format_updates(self.updates)
         
-        prompt = f"""
+        # Store first so today's blockers are linked to the ones tracked on earlier days
+        memory_section = ""
+        blockers_section = ""
+        try:
+            with self.database(db) as scoped_db:
+                sprint = scoped_db.get_sprint(self.session_id)
+                if sprint:
+                    for update in self.updates:
+                        scoped_db.store_standup(
+                            sprint.id,
+                            update['member'],
+                            update['yesterday'],
+                            update['today'],
+                            update['blockers']
+                        )
+                    print(f"[StandupAgent] Stored {len(self.updates)} updates in database")
+                    
+                    if not incremental:
+                        blockers_section = format_blockers(scoped_db.get_open_blockers(sprint.team_name))
+                        memory_section = self.team_memory_section(scoped_db, sprint.team_name, f"standup {updates_text}")
+        except Exception as e:
+            print(f"[StandupAgent Error] Failed to store updates: {e}")
+        
+        if incremental:
+            # Only the merge is left: the updates were summarized as they came in
+            prompt = self._reduce_prompt()
+        else:
+            prompt = f"""
 You are an AI Scrum Master. Generate a concise daily standup summary.
 
 Sprint {self.current_sprint}
 Team Updates:
 {updates_text}
 
+{blockers_section}
+
+{memory_section}
+
 Create a summary that includes:
 
 1. KEY HIGHLIGHTS
@@ -110,6 +220,7 @@ Create a summary that includes:
    - List all blockers mentioned
    - Categorize by severity
    - Suggest immediate actions
+   - Call out blockers marked [AGING] that have been open for days, and who owns them
 
 3. TEAM VELOCITY
    - Overall progress assessment
@@ -128,25 +239,8 @@ Be concise and actionable.
         # Extract blockers
         blockers = []
         for update in self.updates:
-            if update['blockers'].lower() not in ['none', 'no blockers', 'nothing']:
-                blockers.append(f"{update['member']}: {update['blockers']}")
-        
-        # Store in database
-        try:
-            db = DatabaseManager()
-            sprint = db.get_sprint(self.session_id)
-            if sprint:
-                for update in self.updates:
-                    db.store_standup(
-                        sprint.id,
-                        update['member'],
-                        update['yesterday'],
-                        update['today'],
-                        update['blockers']
-                    )
-                print(f"[StandupAgent] Stored {len(self.updates)} updates in database")
-        except Exception as e:
-            print(f"[StandupAgent Error] Failed to store updates: {e}")
+            for blocker in split_blockers(update['blockers']):
+                blockers.append(f"{update['member']}: {blocker}")
         
         # Send to Slack
         try:
@@ -0,0 +1,57 @@
+"""
+Archive completed sprints into the cold-storage database
+
+Moves every completed sprint that ended more than N days ago (default:
+ARCHIVE_AFTER_DAYS) out of agile_assistant.db into the archive file and
+compacts the hot database. Archived sprints stay readable via DatabaseManager;
+afterwards the script checks that their stories still appear in the export.
+
+Usage:
+    python archive_sprints.py
+    python archive_sprints.py --older-than-days 30
+"""
+
+import argparse
+import sys
+
+from database.db_manager import DatabaseManager, ARCHIVE_AFTER_DAYS
+
+
+def check_exported(db, session_ids: list):
+    """
+    True if every story of the archived sprints is in its team's stories
+    export (the export must read the archive as well as the hot tables)
+    """
+    ok = True
+    for session_id in session_ids:
+        sprint = db.get_sprint(session_id)
+        expected = {story.story_id for story in db.get_sprint_stories(sprint.id)}
+        header, rows = db.export_rows("stories", sprint.team_name)
+        story_col, sprint_col = header.index("story_id"), header.index("sprint_number")
+        exported = {row[story_col] for row in rows if row[sprint_col] == sprint.sprint_number}
+        if expected - exported:
+            print(f"❌ {session_id}: {len(expected - exported)} archived stories missing from the export")
+            ok = False
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive completed sprints")
+    parser.add_argument("--older-than-days", type=int, default=ARCHIVE_AFTER_DAYS,
+                        help=f"Archive sprints that ended more than N days ago (default: {ARCHIVE_AFTER_DAYS})")
+    args = parser.parse_args()
+
+    with DatabaseManager() as db:
+        archived = db.archive_completed_sprints(args.older_than_days)
+        exported = check_exported(db, archived)
+
+    if archived:
+        print(f"\n✅ Archived {len(archived)} sprints into {db.archive_path}")
+    else:
+        print("\nℹ️  Nothing to archive")
+    if not exported:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
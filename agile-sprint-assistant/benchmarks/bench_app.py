@@ -0,0 +1,134 @@
+"""
+End-to-end benchmark - Latency and throughput of the web app, fully offline
+
+Drives the standup, planning and retrospective flows through the FastAPI app
+with the fake LLM provider (utils/llm_provider.py), so the numbers include
+routing, templates, database work and agent prompt building, plus simulated
+model latency. Run after generating sample data (it stores standups,
+estimates and a retrospective, so use a scratch copy of the database):
+
+    LLM_FAKE_LATENCY_MS=200 python benchmarks/bench_app.py [rounds] [clients]
+
+To replay real Gemini traffic instead, record it once and point at the cassette
+(see utils/llm_cassette.py):
+
+    LLM_PROVIDER=gemini LLM_CASSETTE=flows.jsonl.gz LLM_CASSETTE_MODE=record python benchmarks/bench_app.py 1
+    LLM_CASSETTE=flows.jsonl.gz LLM_REPLAY_LATENCY=zero python benchmarks/bench_app.py
+"""
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Offline unless the caller explicitly asks for another provider
+os.environ.setdefault("LLM_PROVIDER", "fake")
+
+from fastapi.testclient import TestClient
+from database.db_manager import DatabaseManager
+from utils.llm_provider import get_provider
+import ui.app as web
+
+# Chats the routes append to, and the markers of an error message in them
+MESSAGE_LISTS = ("messages", "planning_messages", "retro_messages")
+ERROR_MARKERS = ("[ERROR]", "Error:", "Error generating response")
+
+
+def flow_steps(members, story_ids, sprint_number):
+    """(label, method, path, form) for one standup, a few estimates and a retrospective"""
+    steps = [("standup: start", "post", "/start-standup", None)]
+    for member in members:
+        steps.append(("standup: submit update", "post", "/submit-update", {
+            "member": member,
+            "yesterday": "Finished the API integration tests",
+            "today": "Start on the dashboard filters",
+            "blockers": "Waiting on staging database access",
+        }))
+    steps.append(("standup: generate summary", "post", "/generate-summary", None))
+
+    steps.append(("planning: start", "post", "/start-planning", None))
+    for story_id in story_ids:
+        steps.append(("planning: submit estimate", "post", "/submit-estimate", {
+            "story_id": story_id, "team_estimate": 5, "team_reasoning": "Similar to last sprint's work",
+        }))
+
+    steps.append(("retro: start", "post", "/start-retrospective", {
+        "sprint_number": sprint_number, "facilitator": "Benchmark",
+    }))
+    for category, text in (("went_well", "Pairing on reviews sped things up"),
+                           ("improve", "Staging environment was unstable"),
+                           ("improve", "Staging env kept being unstable")):
+        steps.append(("retro: add feedback", "post", "/add-feedback", {
+            "category": category, "feedback": text, "submitted_by": "Benchmark",
+        }))
+    steps.append(("retro: generate summary", "post", "/generate-retro-summary", None))
+    steps.append(("reports", "get", "/reports", None))
+    return steps
+
+
+def new_errors(seen):
+    """Error messages the app has added to any chat since `seen` (message counts per chat)"""
+    errors = []
+    for key in MESSAGE_LISTS:
+        for message in web.session_data[key][seen[key]:]:
+            if any(marker in message["content"] for marker in ERROR_MARKERS):
+                errors.append(message["content"].strip().splitlines()[0][:120])
+    return errors
+
+
+def run_flow(client, steps, timings, failures):
+    for label, method, path, form in steps:
+        seen = {key: len(web.session_data[key]) for key in MESSAGE_LISTS}
+        start = time.perf_counter()
+        response = client.post(path, data=form) if method == "post" else client.get(path)
+        timings.setdefault(label, []).append(time.perf_counter() - start)
+        # Routes report failures as chat messages with a 200, so check those too
+        if response.status_code != 200:
+            failures.append(f"{label}: HTTP {response.status_code}")
+        failures.extend(f"{label}: {error}" for error in new_errors(seen))
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+    db = DatabaseManager()
+    sprint = db.get_sprint(web.SESSION_ID)
+    if not sprint:
+        sys.exit(f"Sprint {web.SESSION_ID} not found - run sample_data/generate_sample_data.py first")
+    members = [m.name for m in db.get_team_members()][:5]
+    story_ids = [s.story_id for s in db.get_sprint_stories(sprint.id)][:3]
+    completed = [s.sprint_number for s in db.get_all_sprints(web.CURRENT_TEAM) if s.status == "completed"]
+    steps = flow_steps(members, story_ids, completed[-1] if completed else 1)
+    db.close()
+
+    client = TestClient(web.app)
+    timings, failures = {}, []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        for _ in range(rounds):
+            list(pool.map(lambda _: run_flow(client, steps, timings, failures), range(clients)))
+    elapsed = time.perf_counter() - start
+
+    requests = sum(len(t) for t in timings.values())
+    print(f"\n{rounds} rounds x {clients} clients, provider {get_provider().name}:")
+    for label, values in timings.items():
+        print(f"  {label:<28} n={len(values):<4} p50 {percentile(values, 0.5) * 1000:8.1f} ms"
+              f"   p95 {percentile(values, 0.95) * 1000:8.1f} ms")
+    print(f"  {requests} requests in {elapsed:.1f}s: {requests / elapsed:.1f} req/s\n")
+
+    if failures:
+        print(f"❌ {len(failures)} failed steps - the numbers above are not comparable:")
+        for failure in failures[:20]:
+            print(f"  {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Micro-benchmark - CPU cost per call of the hot DatabaseManager getters
+
+Compares the old pattern (a fresh engine per DatabaseManager and ORM Query
+objects rebuilt on every call) with the shared engine + cached select()
+statements. Run after generating sample data:
+
+    python benchmarks/bench_db_manager.py [iterations]
+"""
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from database.db_manager import DatabaseManager, DEFAULT_DB_URL, db_session
+from database.models import SprintSession, UserStory, BurndownData
+
+SESSION_ID = "AlphaTeam_Sprint_2"
+
+
+def legacy_request():
+    """What every request used to do: new engine, new session, Query objects"""
+    engine = create_engine(DEFAULT_DB_URL, echo=False)
+    session = sessionmaker(bind=engine)()
+    try:
+        sprint = session.query(SprintSession).filter(SprintSession.session_id == SESSION_ID).first()
+        session.query(UserStory).filter(UserStory.sprint_id == sprint.id).all()
+        session.query(BurndownData).filter(BurndownData.sprint_id == sprint.id).order_by(BurndownData.date).all()
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def cached_request():
+    """Shared engine, cached statements, one request-scoped session"""
+    with db_session() as db:
+        sprint = db.get_sprint(SESSION_ID)
+        db.get_sprint_stories(sprint.id)
+        db.get_burndown_data(sprint.id)
+
+
+def legacy_getters(session):
+    sprint = session.query(SprintSession).filter(SprintSession.session_id == SESSION_ID).first()
+    session.query(UserStory).filter(UserStory.sprint_id == sprint.id).all()
+    session.query(BurndownData).filter(BurndownData.sprint_id == sprint.id).order_by(BurndownData.date).all()
+
+
+def cached_getters(db):
+    sprint = db.get_sprint(SESSION_ID)
+    db.get_sprint_stories(sprint.id)
+    db.get_burndown_data(sprint.id)
+
+
+def measure(label: str, fn, iterations: int, per_call: int = 3):
+    fn()  # warm up caches
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.process_time() - start
+    print(f"  {label:<40} {elapsed / (iterations * per_call) * 1e6:8.1f} µs CPU per getter call")
+    return elapsed
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+
+    db = DatabaseManager()
+    if not db.get_sprint(SESSION_ID):
+        print(f"Sprint {SESSION_ID} not found - run sample_data/generate_sample_data.py first")
+        return
+
+    print(f"\nPer-request pattern ({iterations} iterations, 3 getters each):")
+    old = measure("fresh engine + Query (before)", legacy_request, iterations)
+    new = measure("shared engine + cached select (after)", cached_request, iterations)
+    print(f"  speedup: {old / new:.1f}x")
+
+    print(f"\nGetters on an open session ({iterations * 10} iterations):")
+    old = measure("Query rebuilt per call", lambda: legacy_getters(db.session), iterations * 10)
+    new = measure("cached select()", lambda: cached_getters(db), iterations * 10)
+    print(f"  speedup: {old / new:.1f}x\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Estimation Analytics - How the AI's story point estimates compare with the team's
+The whole StoryEstimation history is pulled as plain columns into NumPy arrays
+and every statistic is a grouped array reduction, so the cost is a handful of
+vector passes no matter how many estimations have been recorded.
+"""
+import numpy as np
+from sqlalchemy import select
+
+from database.models import StoryEstimation, UserStory, SprintSession
+
+HISTORY_COLUMNS = (
+    "team_name", "story_type", "estimated_at",
+    "team_estimate", "agent_estimate", "final_estimate", "team_approved_agent"
+)
+
+
+def estimation_history_statement(team_name: str = None):
+    """Every AI-vs-team comparison with the team and story type it belongs to"""
+    stmt = select(
+        SprintSession.team_name,
+        UserStory.story_type,
+        StoryEstimation.estimated_at,
+        StoryEstimation.team_estimate,
+        StoryEstimation.agent_estimate,
+        StoryEstimation.final_estimate,
+        StoryEstimation.team_approved_agent,
+    ).join(
+        UserStory, StoryEstimation.story_id == UserStory.id
+    ).join(
+        SprintSession, UserStory.sprint_id == SprintSession.id
+    ).where(
+        StoryEstimation.team_estimate.is_not(None),
+        StoryEstimation.agent_estimate.is_not(None)
+    )
+
+    if team_name:
+        stmt = stmt.where(SprintSession.team_name == team_name)
+    return stmt.order_by(StoryEstimation.estimated_at, StoryEstimation.id)
+
+
+def _number(value):
+    """Plain rounded float for JSON, or None when there was nothing to average"""
+    if value is None or np.isnan(value):
+        return None
+    return round(float(value), 3)
+
+
+def _grouped_stats(keys, team, ai, final, accepted):
+    """
+    Error and acceptance statistics for every distinct key, computed with one
+    bincount per measure rather than a loop over the groups
+    """
+    labels, group = np.unique(keys, return_inverse=True)
+    size = len(labels)
+    finalized = ~np.isnan(final)
+
+    def mean(values, mask=None):
+        weights = np.ones_like(values) if mask is None else mask.astype(float)
+        total = np.bincount(group, weights=values * weights, minlength=size)
+        count = np.bincount(group, weights=weights, minlength=size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return total / count
+
+    diff = ai - team
+    final_or_zero = np.where(finalized, final, 0.0)
+    comparisons = np.bincount(group, minlength=size)
+    finalized_count = np.bincount(group, weights=finalized.astype(float), minlength=size)
+
+    columns = {
+        "bias": mean(diff),
+        "mean_abs_diff": mean(np.abs(diff)),
+        "agreement_rate": mean((diff == 0).astype(float)),
+        "ai_mae_vs_final": mean(np.abs(ai - final_or_zero), finalized),
+        "team_mae_vs_final": mean(np.abs(team - final_or_zero), finalized),
+        "acceptance_rate": mean(accepted.astype(float), finalized),
+    }
+
+    return {
+        str(label): dict(
+            comparisons=int(comparisons[i]),
+            finalized=int(finalized_count[i]),
+            **{name: _number(values[i]) for name, values in columns.items()}
+        )
+        for i, label in enumerate(labels)
+    }
+
+
+def _week_starts(timestamps):
+    """Monday of the week each timestamp falls in (1970-01-01 was a Thursday)"""
+    days = timestamps.astype("datetime64[D]")
+    return days - ((days.astype(np.int64) + 3) % 7)
+
+
+def estimation_analytics(rows):
+    """
+    Summarize (team_name, story_type, estimated_at, team_estimate,
+    agent_estimate, final_estimate, team_approved_agent) rows:
+
+    - overall / by_team / by_story_type: bias (AI minus team, in points),
+      mean absolute difference, agreement rate, each side's mean absolute
+      error against the final estimate, and how often the team accepted the AI
+    - drift: the same figures per week, plus the trend of the bias in points
+      per 30 days
+    """
+    rows = list(rows)
+    if not rows:
+        return {"comparisons": 0, "overall": None, "by_team": {}, "by_story_type": {},
+                "drift": {"weekly": [], "bias_trend_per_30_days": None}}
+
+    teams, story_types, estimated_at, team, ai, final, accepted = zip(*rows)
+
+    team = np.asarray(team, dtype=float)
+    ai = np.asarray(ai, dtype=float)
+    final = np.asarray([np.nan if f is None else f for f in final], dtype=float)
+    accepted = np.asarray([bool(a) for a in accepted])
+    timestamps = np.asarray(estimated_at, dtype="datetime64[s]")
+
+    measures = (team, ai, final, accepted)
+    overall = _grouped_stats(np.zeros(len(rows), dtype=int), *measures)["0"]
+    by_team = _grouped_stats(np.asarray(teams, dtype=str), *measures)
+    by_story_type = _grouped_stats(np.asarray([t or "unknown" for t in story_types], dtype=str), *measures)
+
+    weeks = _week_starts(timestamps)
+    weekly = _grouped_stats(weeks.astype(str), *measures)
+
+    # Least-squares slope of the per-comparison bias against time
+    trend = None
+    elapsed_days = (timestamps - timestamps.min()).astype(np.int64) / 86400.0
+    if len(rows) > 1 and np.ptp(elapsed_days) > 0:
+        slope = np.polyfit(elapsed_days, ai - team, 1)[0]
+        trend = _number(slope * 30)
+
+    return {
+        "comparisons": len(rows),
+        "overall": overall,
+        "by_team": by_team,
+        "by_story_type": by_story_type,
+        "drift": {
+            "weekly": [dict(week_start=week, **stats) for week, stats in weekly.items()],
+            "bias_trend_per_30_days": trend,
+        },
+    }
@@ -0,0 +1,240 @@
+"""
+Story Assignment - Match sprint stories to team members by skill and capacity
+Each round solves a rectangular assignment problem (Hungarian algorithm with
+potentials, inner loops vectorized with NumPy) between the members that still
+have room and the unassigned stories, so every member gets at most one story
+per round. Rounds repeat until nothing else fits. Capacity is checked in story
+points, so a story only goes to a member whose remaining capacity covers it.
+"""
+import json
+import re
+
+import numpy as np
+from sqlalchemy import select
+
+from database.models import UserStory, SprintCapacity, TeamMember
+from database.dependency_graph import DONE_STATUS
+from database.scope_optimizer import PRIORITY_WEIGHTS, DEFAULT_PRIORITY_WEIGHT
+
+# Benefit of one matching skill; priority dominates so important stories win
+# scarce capacity, and remaining slack only breaks ties between equal fits
+SKILL_WEIGHT = 10.0
+PRIORITY_WEIGHT = 100.0
+SLACK_WEIGHT = 1.0
+
+# Cost of a pair that does not fit - larger than any total benefit
+INFEASIBLE_COST = 1e9
+
+# Role words that say nothing about what someone is good at
+GENERIC_ROLE_WORDS = {"senior", "junior", "lead", "developer", "engineer", "full", "stack"}
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9+#.\-]*")
+
+
+def assignment_stories_statement(sprint_id: int):
+    return select(
+        UserStory.story_id,
+        UserStory.title,
+        UserStory.description,
+        UserStory.acceptance_criteria,
+        UserStory.story_type,
+        UserStory.priority,
+        UserStory.story_points,
+        UserStory.status,
+        UserStory.assigned_to,
+    ).where(UserStory.sprint_id == sprint_id).order_by(UserStory.id)
+
+
+def assignment_members_statement(sprint_id: int):
+    """Members with capacity in the sprint, with their skills and role when known"""
+    return select(
+        SprintCapacity.member_name,
+        SprintCapacity.available_capacity,
+        TeamMember.skills,
+        TeamMember.role,
+    ).outerjoin(
+        TeamMember, TeamMember.name == SprintCapacity.member_name
+    ).where(
+        SprintCapacity.sprint_session_id == sprint_id
+    ).order_by(SprintCapacity.id)
+
+
+def _words(text: str):
+    return set(_WORD.findall((text or "").lower()))
+
+
+def _skill_terms(skills, role: str):
+    """Lower-case skill phrases of a member, plus the telling words of their role"""
+    if isinstance(skills, str):
+        try:
+            skills = json.loads(skills)
+        except json.JSONDecodeError:
+            skills = []
+    terms = [s.lower() for s in (skills or []) if isinstance(s, str)]
+    terms += [w for w in _words(role) if w not in GENERIC_ROLE_WORDS]
+    return terms
+
+
+def _skill_matches(terms: list, text: str, words: set):
+    """Skills mentioned in a story: the whole phrase, or every word of it"""
+    return sum(1 for term in terms if term in text or _words(term) <= words)
+
+
+def _hungarian(cost):
+    """
+    Minimum-cost assignment of every row to a distinct column (rows <= columns).
+    Returns the column chosen for each row.
+    """
+    rows, cols = cost.shape
+    u = np.zeros(rows + 1)
+    v = np.zeros(cols + 1)
+    match = np.zeros(cols + 1, dtype=int)   # column -> row (1-based, 0 = free)
+    way = np.zeros(cols + 1, dtype=int)
+
+    for row in range(1, rows + 1):
+        match[0] = row
+        column = 0
+        min_reduced = np.full(cols + 1, np.inf)
+        used = np.zeros(cols + 1, dtype=bool)
+        while True:
+            used[column] = True
+            current = match[column]
+            free = ~used[1:]
+            reduced = cost[current - 1] - u[current] - v[1:]
+            better = free & (reduced < min_reduced[1:])
+            min_reduced[1:][better] = reduced[better]
+            way[1:][better] = column
+
+            candidates = np.where(free, min_reduced[1:], np.inf)
+            next_column = int(candidates.argmin()) + 1
+            delta = candidates[next_column - 1]
+
+            visited = np.nonzero(used)[0]
+            u[match[visited]] += delta
+            v[visited] -= delta
+            min_reduced[1:][free] -= delta
+
+            column = next_column
+            if match[column] == 0:
+                break
+
+        # Flip the augmenting path
+        while column:
+            previous = way[column]
+            match[column] = match[previous]
+            column = previous
+
+    assignment = np.full(rows, -1)
+    for column in range(1, cols + 1):
+        if match[column]:
+            assignment[match[column] - 1] = column - 1
+    return assignment
+
+
+def _match(cost):
+    """(row, column) pairs of a minimum-cost assignment of the smaller side"""
+    if cost.shape[0] <= cost.shape[1]:
+        return list(enumerate(_hungarian(cost)))
+    return [(row, column) for column, row in enumerate(_hungarian(cost.T))]
+
+
+def assign_stories(stories, members, reassign: bool = False):
+    """
+    Plan assignments for rows of assignment_stories_statement() to rows of
+    assignment_members_statement().
+
+    Stories that are done, or already assigned to a sprint member (unless
+    `reassign`), keep their owner and count against that member's capacity.
+    Returns {"assignments": {story_id: member}, "kept": {story_id: member},
+    "unassigned": {story_id: reason}, "load": {member: {"capacity",
+    "allocated"}}}.
+    """
+    names = [m.member_name for m in members]
+    capacity = np.array([m.available_capacity or 0 for m in members], dtype=float)
+    allocated = np.zeros(len(members))
+    position = {name: i for i, name in enumerate(names)}
+    terms = [_skill_terms(m.skills, m.role) for m in members]
+
+    kept, unassigned, open_stories = {}, {}, []
+    for story in stories:
+        owner = position.get(story.assigned_to)
+        if owner is not None and (not reassign or story.status == DONE_STATUS):
+            kept[story.story_id] = story.assigned_to
+            allocated[owner] += story.story_points or 0
+        elif story.status == DONE_STATUS:
+            continue
+        elif story.story_points is None:
+            unassigned[story.story_id] = "not estimated"
+        else:
+            open_stories.append(story)
+
+    assignments = {}
+    if open_stories and members:
+        points = np.array([s.story_points for s in open_stories], dtype=float)
+        fit = np.zeros((len(members), len(open_stories)))
+        for j, story in enumerate(open_stories):
+            text = " ".join(filter(None, (story.title, story.description,
+                                          story.acceptance_criteria, story.story_type))).lower()
+            words = _words(text)
+            for i, member_terms in enumerate(terms):
+                fit[i, j] = _skill_matches(member_terms, text, words)
+        priority = np.array([
+            PRIORITY_WEIGHTS.get((s.priority or "").lower(), DEFAULT_PRIORITY_WEIGHT)
+            for s in open_stories
+        ], dtype=float)
+        benefit = SKILL_WEIGHT * fit + PRIORITY_WEIGHT * priority
+
+        waiting = np.arange(len(open_stories))
+        while len(waiting):
+            remaining = capacity - allocated
+            fits = points[waiting][None, :] <= remaining[:, None]
+            takers = np.nonzero(fits.any(axis=1))[0]
+            if not len(takers):
+                break
+
+            # Prefer members with more of their capacity still free
+            slack = remaining[takers] / np.maximum(capacity[takers], 1)
+            cost = -(benefit[np.ix_(takers, waiting)] + SLACK_WEIGHT * slack[:, None])
+            cost[~fits[takers]] = INFEASIBLE_COST
+
+            taken = []
+            for row, column in _match(cost):
+                member, story = takers[row], waiting[column]
+                if points[story] <= remaining[member]:
+                    assignments[open_stories[story].story_id] = names[member]
+                    allocated[member] += points[story]
+                    taken.append(column)
+            if not taken:
+                break
+            waiting = np.delete(waiting, taken)
+
+        for story in waiting:
+            unassigned[open_stories[story].story_id] = "no member has enough capacity left"
+    elif open_stories:
+        unassigned.update({s.story_id: "no team capacity set for this sprint" for s in open_stories})
+
+    return {
+        "assignments": assignments,
+        "kept": kept,
+        "unassigned": unassigned,
+        "load": {
+            name: {"capacity": int(capacity[i]), "allocated": int(allocated[i])}
+            for i, name in enumerate(names)
+        },
+    }
+
+
+def format_assignments(plan: dict):
+    """Plain-text report of an assign_stories() result"""
+    lines = ["[STORY ASSIGNMENTS]"]
+    for member, load in plan["load"].items():
+        stories = [s for s, owner in plan["assignments"].items() if owner == member]
+        kept = [s for s, owner in plan["kept"].items() if owner == member]
+        lines.append(f"\n{member}: {load['allocated']}/{load['capacity']} points")
+        lines.extend(f"  + {s}" for s in stories)
+        lines.extend(f"  = {s} (already assigned)" for s in kept)
+
+    if plan["unassigned"]:
+        lines.append("\nUnassigned:")
+        lines.extend(f"  ! {s}: {reason}" for s, reason in plan["unassigned"].items())
+    return "\n".join(lines)
@@ -0,0 +1,154 @@
+"""
+Blocker Tracking - Recognise the same standup blocker across days
+Each blocker text is normalized to a sorted set of content words and
+fingerprinted, then matched against the team's open (or recently resolved)
+blockers: exact fingerprint first, word overlap second. Matches update the
+tracked Blocker row as each standup is stored, so age, owner and how often a
+blocker came up are always current without rescanning standup history.
+"""
+import hashlib
+import re
+from datetime import timedelta
+
+from sqlalchemy import select, update, or_
+
+from database.models import Blocker
+from database.search import STOPWORDS
+
+# Word overlap (Jaccard) at which two blockers count as the same one
+MATCH_THRESHOLD = 0.6
+
+# A resolved blocker that comes back within this many days is reopened
+REOPEN_DAYS = 7
+
+# Open blockers at least this old are called out as aging
+AGING_DAYS = 2
+
+# Words that say something is (not) blocked rather than what the blocker is
+NOISE_WORDS = {
+    "blocker", "blockers", "blocked", "blocking", "block", "currently", "still",
+    "yet", "today", "right", "now", "moment", "really", "very", "again",
+}
+NO_BLOCKER_WORDS = {
+    "none", "nothing", "nope", "na", "nil", "n", "a", "clear", "good", "fine",
+    "ok", "okay", "all", "issue", "issues",
+}
+
+_WORD = re.compile(r"[a-z0-9]+")
+_SEPARATORS = re.compile(r"[;\n]+|^\s*[-*]\s*", re.MULTILINE)
+
+
+def _stem(word: str):
+    """Strip the commonest English suffixes so 'deploys' and 'deploy' match"""
+    if len(word) > 5 and word.endswith("ing"):
+        return word[:-3]
+    if len(word) > 4 and word.endswith("ed"):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def _content_words(text: str):
+    words = _WORD.findall((text or "").lower())
+    return {w for w in words if w not in STOPWORDS and w not in NOISE_WORDS}
+
+
+def blocker_terms(text: str):
+    """Sorted, de-duplicated content words of a blocker"""
+    return sorted({_stem(w) for w in _content_words(text)})
+
+
+def is_no_blocker(text: str):
+    """True for 'None', 'No blockers', 'nothing blocking me', 'N/A' and the like"""
+    return _content_words(text) <= NO_BLOCKER_WORDS
+
+
+def split_blockers(text: str):
+    """Separate blockers listed in one standup answer (';', new lines or bullets)"""
+    return [part.strip() for part in _SEPARATORS.split(text or "") if part and not is_no_blocker(part)]
+
+
+def blocker_fingerprint(terms: list):
+    return hashlib.sha1(" ".join(terms).encode("utf-8")).hexdigest()[:16]
+
+
+def similarity(terms: list, other: list):
+    """Jaccard overlap of two term lists"""
+    a, b = set(terms), set(other)
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def match_candidates_statement(team_name: str, day):
+    """The team's open blockers plus those resolved in the last REOPEN_DAYS"""
+    return select(Blocker).where(
+        Blocker.team_name == team_name,
+        or_(Blocker.status == "open", Blocker.resolved_at >= day - timedelta(days=REOPEN_DAYS))
+    ).order_by(Blocker.first_seen, Blocker.id)
+
+
+def best_match(terms: list, candidates):
+    """Candidate with the same fingerprint, else the most similar one above MATCH_THRESHOLD"""
+    fingerprint = blocker_fingerprint(terms)
+    for blocker in candidates:
+        if blocker.fingerprint == fingerprint:
+            return blocker
+    best, best_score = None, MATCH_THRESHOLD
+    for blocker in candidates:
+        score = similarity(terms, (blocker.terms or "").split())
+        if score >= best_score:
+            best, best_score = blocker, score
+    return best
+
+
+def resolve_cleared_statement(team_name: str, member: str, day, keep_ids: list):
+    """
+    Resolve the member's open blockers from earlier days that today's standup
+    no longer mentions
+    """
+    return update(Blocker).where(
+        Blocker.team_name == team_name,
+        Blocker.owner == member,
+        Blocker.status == "open",
+        Blocker.last_seen < day,
+        Blocker.id.notin_(keep_ids),
+    ).values(status="resolved", resolved_at=day)
+
+
+def open_blockers_statement(team_name: str, seen_before=None):
+    """The team's open blockers, oldest first (optionally only those first seen before a date)"""
+    stmt = select(Blocker).where(Blocker.team_name == team_name, Blocker.status == "open")
+    if seen_before is not None:
+        stmt = stmt.where(Blocker.first_seen <= seen_before)
+    return stmt.order_by(Blocker.first_seen, Blocker.id)
+
+
+def blocker_summary(blocker, today):
+    """Plain dict of a tracked blocker with its age in days"""
+    return {
+        "id": blocker.id,
+        "description": blocker.description,
+        "owner": blocker.owner,
+        "status": blocker.status,
+        "first_seen": blocker.first_seen.strftime("%Y-%m-%d"),
+        "last_seen": blocker.last_seen.strftime("%Y-%m-%d"),
+        "age_days": (today - blocker.first_seen.date()).days,
+        "days_reported": blocker.days_reported,
+        "occurrences": blocker.occurrences,
+        "aging": (today - blocker.first_seen.date()).days >= AGING_DAYS,
+    }
+
+
+def format_blockers(blockers: list):
+    """Plain-text section for prompts: open blockers with age and owner"""
+    if not blockers:
+        return ""
+    lines = ["Open blockers tracked across standups (oldest first):"]
+    for b in blockers:
+        age = "new today" if b["age_days"] == 0 else f"{b['age_days']} days old"
+        flag = " [AGING]" if b["aging"] else ""
+        lines.append(
+            f"- {b['description']} ({age}, owner {b['owner']}, "
+            f"reported on {b['days_reported']} days){flag}"
+        )
+    return "\n".join(lines)
@@ -2,28 +2,529 @@
 Database Manager - Handles all database operations
 Complete version with all fixes and enhancements
 """
-from sqlalchemy import create_engine
+from sqlalchemy import (
+    create_engine, event, text, bindparam, select, update, delete, func, case, or_, tuple_,
+    make_url
+)
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateTable, UniqueConstraint
 from database.models import (
     Base, SprintSession, UserStory, DailyStandup, 
     Retrospective, ActionItem, BurndownData, 
-    Risk, Issue, Dependency, SprintCapacity, TeamMember
+    Risk, Issue, Dependency, SprintCapacity, TeamMember,
+    StoryEstimation, EstimationReasoning, TeamMemory, Blocker, BlockerReport
+)
+from database.analytics import estimation_history_statement, estimation_analytics
+from database.dependency_graph import DependencyGraph, dependency_graph_statement
+from database.scope_optimizer import optimize_scope
+from database.forecast import (
+    forecast_version_statement, history_version_statement, velocity_history_statement, sprint_totals_statement,
+    daily_velocity_samples, monte_carlo_forecast
+)
+from database.metrics import approved_points_statement, sprint_charts
+from database.risk_analytics import (
+    risk_matrix_statement, severity_counts_statement, issue_aging_statement, risk_issue_summary
+)
+from database.assignment import (
+    assign_stories, assignment_stories_statement, assignment_members_statement
+)
+from database.blockers import (
+    split_blockers, blocker_terms, blocker_fingerprint, best_match,
+    match_candidates_statement, resolve_cleared_statement, open_blockers_statement,
+    blocker_summary
+)
+from database.similar_stories import (
+    StoryIndex, story_text_statement, max_story_id_statement, candidate_details_statement,
+    similar_stories
+)
+from database.local_estimator import NEIGHBOURS, type_points_statement, local_estimate
+from database.export import export_statement
+from database.search import (
+    FTS_INDEXES, ARCHIVED_KINDS, install_search_indexes, build_match_query, search_statement,
+    build_any_query, memory_retrieval_statement, estimate_tokens
 )
 from datetime import datetime, timedelta
 import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Cold-storage database attached to every SQLite connection as schema "archive"
+ARCHIVE_SCHEMA = "archive"
+ARCHIVE_DB_PATH = os.getenv("ARCHIVE_DATABASE_PATH", "database/agile_archive.db")
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+
+# Tables moved by the archival job, children before parents so the
+# sub-selects on user_stories / retrospectives still see their rows
+_STORY_IDS = "SELECT id FROM main.user_stories WHERE sprint_id IN :sprint_ids"
+_RETRO_IDS = "SELECT id FROM main.retrospectives WHERE sprint_session_id IN :sprint_ids"
+_ESTIMATION_IDS = f"SELECT id FROM main.story_estimations WHERE story_id IN ({_STORY_IDS})"
+ARCHIVE_TABLES = [
+    ("estimation_reasoning", f"estimation_id IN ({_ESTIMATION_IDS})"),
+    ("story_estimations", f"story_id IN ({_STORY_IDS})"),
+    ("dependencies", f"story_id IN ({_STORY_IDS})"),
+    ("action_items", f"retrospective_id IN ({_RETRO_IDS})"),
+    ("risks", "sprint_session_id IN :sprint_ids"),
+    ("issues", "sprint_session_id IN :sprint_ids"),
+    ("sprint_capacity", "sprint_session_id IN :sprint_ids"),
+    ("blocker_reports", "sprint_id IN :sprint_ids"),
+    ("daily_standups", "sprint_id IN :sprint_ids"),
+    ("burndown_data", "sprint_id IN :sprint_ids"),
+    ("user_stories", "sprint_id IN :sprint_ids"),
+    ("retrospectives", "sprint_session_id IN :sprint_ids"),
+    ("sprint_sessions", "id IN :sprint_ids"),
+]
+
+DEFAULT_DB_URL = "sqlite:///database/agile_assistant.db"
+
+# Read-only traffic (reports, page loads) goes to its own pool so it never
+# queues behind ceremony writes. For SQLite the replica is the same file opened
+# with mode=ro; other backends can point DATABASE_REPLICA_URL at a real replica
+REPLICA_DB_URL = os.getenv("DATABASE_REPLICA_URL")
+WRITE_POOL_SIZE = int(os.getenv("DB_WRITE_POOL_SIZE", "2"))
+READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "10"))
+
+# Engines (and their session factories) are created once per database and
+# shared by every DatabaseManager, so the connection pool and SQLAlchemy's
+# compiled-statement cache survive across requests
+_engines = {}
+_engines_lock = threading.RLock()
+
+# Dependency graphs per (database, sprint_id), shared across sessions and
+# dropped whenever a story or dependency of the sprint changes
+DEPENDENCY_GRAPH_CACHE_SIZE = int(os.getenv("DEPENDENCY_GRAPH_CACHE_SIZE", "64"))
+_dependency_graphs = OrderedDict()
+_dependency_graphs_lock = threading.Lock()
+
+# Monte Carlo forecasts per (database, sprint_id) with the data version they
+# were computed from; a changed version simply recomputes
+FORECAST_CACHE_SIZE = int(os.getenv("FORECAST_CACHE_SIZE", "64"))
+_forecasts = OrderedDict()
+_forecasts_lock = threading.Lock()
+
+# Story text index per database for similar-story lookups; appended to as
+# new story ids appear, rebuilt only if the database was reset
+_story_indexes = {}
+_story_indexes_lock = threading.Lock()
+
+
+def _configure_sqlite(engine, archive_path: str = None, read_only: bool = False):
+    """Set pragmas and attach the archive file on every new SQLite connection"""
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, connection_record):
+        if read_only:
+            if archive_path:
+                dbapi_conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}",
+                                   (f"file:{archive_path}?mode=ro",))
+            return
+        
+        # WAL lets the read-only pool keep reading while a write is in progress
+        dbapi_conn.execute("PRAGMA journal_mode = WAL")
+        # Must be set before the first table exists to take effect on new files
+        dbapi_conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        if archive_path:
+            dbapi_conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (archive_path,))
+
+
+def _ensure_generated_columns(conn, schema: str = "main"):
+    """
+    create_all can't turn an existing plain column into a generated one, and
+    SQLite can't add a stored generated column with ALTER TABLE, so tables
+    created before such a column existed are rebuilt with their rows copied
+    """
+    for table in Base.metadata.sorted_tables:
+        generated = {c.name for c in table.columns if c.computed is not None}
+        if not generated:
+            continue
+        
+        # hidden: 0 = plain column, 2/3 = virtual/stored generated column
+        existing = {row[1]: row[6] for row in
+                    conn.exec_driver_sql(f"PRAGMA {schema}.table_xinfo({table.name})").all()}
+        if not existing or all(existing.get(name, 0) != 0 for name in generated):
+            continue
+        
+        print(f"[Database] Rebuilding {schema}.{table.name} with generated columns: {', '.join(sorted(generated))}")
+        old_name = f"{table.name}_before_generated"
+        conn.exec_driver_sql(f"ALTER TABLE {schema}.{table.name} RENAME TO {old_name}")
+        for (index_name,) in conn.exec_driver_sql(
+            f"SELECT name FROM {schema}.sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+            (old_name,)
+        ).all():
+            conn.exec_driver_sql(f"DROP INDEX {schema}.{index_name}")
+        
+        table.create(conn.execution_options(
+            schema_translate_map={None: None if schema == "main" else schema}
+        ))
+        columns = ", ".join(c.name for c in table.columns if c.computed is None and c.name in existing)
+        conn.exec_driver_sql(
+            f"INSERT INTO {schema}.{table.name} ({columns}) SELECT {columns} FROM {schema}.{old_name}"
+        )
+        conn.exec_driver_sql(f"DROP TABLE {schema}.{old_name}")
+
+
+def _stale_unique_constraints(conn, table, schema: str = "main"):
+    """Column sets the stored table declares UNIQUE that the model no longer does"""
+    wanted = {tuple(c.name for c in constraint.columns)
+              for constraint in table.constraints if isinstance(constraint, UniqueConstraint)}
+    stale = []
+    # origin 'u' = a UNIQUE constraint in the CREATE TABLE statement
+    for _, name, _, origin, _ in conn.exec_driver_sql(f"PRAGMA {schema}.index_list({table.name})").all():
+        if origin != "u":
+            continue
+        columns = tuple(row[2] for row in conn.exec_driver_sql(f"PRAGMA {schema}.index_info({name})").all())
+        if columns not in wanted:
+            stale.append(columns)
+    return stale
+
+
+def _ensure_table_definitions(conn, schema: str = "main"):
+    """
+    Rebuild archived tables whose stored definition is behind the model:
+    hot tables created before their ids were AUTOINCREMENT, and tables still
+    carrying a UNIQUE constraint the model dropped (user_stories.story_id,
+    now unique per sprint). Without AUTOINCREMENT SQLite hands out
+    max(id) + 1, so once the archival job moves the newest rows away a new
+    sprint or story could reuse an archived id, and lookups by id would read
+    through to the wrong archived row. Indexes and triggers of the old table
+    are recreated on the new one.
+    """
+    for table_name, _ in ARCHIVE_TABLES:
+        table = Base.metadata.tables[table_name]
+        ddl = conn.exec_driver_sql(
+            f"SELECT sql FROM {schema}.sqlite_master WHERE type = 'table' AND name = ?", (table_name,)
+        ).scalar()
+        if ddl is None:
+            continue
+        
+        reasons = []
+        if (schema == "main" and table.dialect_options["sqlite"]["autoincrement"]
+                and "AUTOINCREMENT" not in ddl.upper()):
+            reasons.append("AUTOINCREMENT ids")
+        reasons += [f"no UNIQUE ({', '.join(columns)})"
+                    for columns in _stale_unique_constraints(conn, table, schema)]
+        if not reasons:
+            continue
+        
+        print(f"[Database] Rebuilding {schema}.{table_name} with {', '.join(reasons)}")
+        # Stored index and trigger SQL names no schema; qualify it so it is recreated in this one
+        extras = [re.sub(r"^(CREATE\s+(?:UNIQUE\s+)?(?:INDEX|TRIGGER)\s+)", rf"\g<1>{schema}.", row[0], flags=re.I)
+                  for row in conn.exec_driver_sql(
+                      f"SELECT sql FROM {schema}.sqlite_master WHERE type IN ('index', 'trigger') "
+                      "AND tbl_name = ? AND sql IS NOT NULL", (table_name,)
+                  ).all()]
+        existing = {row[1] for row in conn.exec_driver_sql(f"PRAGMA {schema}.table_xinfo({table_name})").all()}
+        columns = ", ".join(c.name for c in table.columns if c.computed is None and c.name in existing)
+        
+        # Build under a new name and swap it in, so foreign keys of other tables
+        # keep pointing at the table name rather than following a rename
+        new_name = f"{table_name}_rebuilt"
+        conn.exec_driver_sql(str(CreateTable(table).compile(dialect=conn.dialect)).replace(
+            f"CREATE TABLE {table_name} ", f"CREATE TABLE {schema}.{new_name} ", 1
+        ))
+        conn.exec_driver_sql(f"INSERT INTO {schema}.{new_name} ({columns}) SELECT {columns} FROM {schema}.{table_name}")
+        conn.exec_driver_sql(f"DROP TABLE {schema}.{table_name}")
+        conn.exec_driver_sql(f"ALTER TABLE {schema}.{new_name} RENAME TO {table_name}")
+        for statement in extras:
+            conn.exec_driver_sql(statement)
+
+
+def _sync_id_sequences(conn):
+    """
+    Start each hot table's AUTOINCREMENT sequence above the highest id already
+    in the archive (rows archived before the tables were AUTOINCREMENT)
+    """
+    for table_name, _ in ARCHIVE_TABLES:
+        table = Base.metadata.tables[table_name]
+        if not table.dialect_options["sqlite"]["autoincrement"]:
+            continue
+        highest = conn.exec_driver_sql(
+            f"SELECT max(coalesce((SELECT max(id) FROM main.{table_name}), 0), "
+            f"coalesce((SELECT max(id) FROM {ARCHIVE_SCHEMA}.{table_name}), 0))"
+        ).scalar()
+        current = conn.exec_driver_sql(
+            "SELECT seq FROM main.sqlite_sequence WHERE name = ?", (table_name,)
+        ).scalar()
+        if current is None:
+            conn.exec_driver_sql("INSERT INTO main.sqlite_sequence (name, seq) VALUES (?, ?)", (table_name, highest))
+        elif current < highest:
+            conn.exec_driver_sql("UPDATE main.sqlite_sequence SET seq = ? WHERE name = ?", (highest, table_name))
+
+
+def _ensure_indexes(engine):
+    """create_all only indexes new tables; add indexes missing from existing ones"""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+
+def _replica_url(db_path: str):
+    """URL for read-only connections to `db_path`, or None to reuse the primary"""
+    url = make_url(db_path)
+    if url.get_backend_name() != "sqlite":
+        return REPLICA_DB_URL
+    if not url.database or url.database == ":memory:":
+        return None
+    return f"sqlite:///file:{url.database}?mode=ro&uri=true"
+
+
+def get_engine(db_path: str = DEFAULT_DB_URL, archive_path: str = ARCHIVE_DB_PATH,
+               read_only: bool = False):
+    """
+    Get the shared engine and session factory for a database, creating the
+    schema, indexes, archive and search tables on first use.
+    With read_only=True returns the read-only (replica) pool instead, falling
+    back to the primary when no replica is available.
+    Returns (engine, session_factory, archive_path or None).
+    """
+    key = (db_path, archive_path, read_only)
+    with _engines_lock:
+        if key in _engines:
+            return _engines[key]
+        
+        # The primary always exists first: it owns schema setup
+        primary = None if not read_only else get_engine(db_path, archive_path)
+        
+        if read_only:
+            replica_url = _replica_url(db_path)
+            if not replica_url:
+                _engines[key] = primary
+                return primary
+            
+            engine = create_engine(replica_url, echo=False, pool_size=READ_POOL_SIZE)
+            archive_path = primary[2]
+            if engine.dialect.name == "sqlite":
+                _configure_sqlite(engine, archive_path, read_only=True)
+            
+            # Nothing is ever flushed from a read-only session
+            _engines[key] = (engine, sessionmaker(bind=engine, autoflush=False), archive_path)
+            return _engines[key]
+        
+        engine = create_engine(db_path, echo=False, pool_size=WRITE_POOL_SIZE)
+        
+        # The archive only exists for SQLite; other backends read the hot tables only
+        if engine.dialect.name != "sqlite":
+            archive_path = None
+        else:
+            _configure_sqlite(engine, archive_path)
+        
+        Base.metadata.create_all(engine)
+        if engine.dialect.name == "sqlite":
+            with engine.begin() as conn:
+                _ensure_generated_columns(conn)
+                _ensure_table_definitions(conn)
+        _ensure_indexes(engine)
+        if archive_path:
+            with engine.begin() as conn:
+                Base.metadata.create_all(
+                    conn.execution_options(schema_translate_map={None: ARCHIVE_SCHEMA})
+                )
+                _ensure_generated_columns(conn, ARCHIVE_SCHEMA)
+                _ensure_table_definitions(conn, ARCHIVE_SCHEMA)
+                _sync_id_sequences(conn)
+        
+        install_search_indexes(engine, ARCHIVE_SCHEMA if archive_path else None)
+        
+        _engines[key] = (engine, sessionmaker(bind=engine), archive_path)
+        # Databases from before blocker tracking get their history indexed once
+        with DatabaseManager(db_path, archive_path) as db:
+            if db.blocker_index_missing():
+                db.rebuild_blocker_index()
+        return _engines[key]
+
+
+# ========== CACHED STATEMENTS ==========
+# Built once at import; every call reuses the same construct (only the bound
+# parameters change), so the compiled form comes straight from the engine's cache
+
+_SPRINT_BY_SESSION_ID = select(SprintSession).where(
+    SprintSession.session_id == bindparam("session_id")
+)
+_SPRINT_BY_ID = select(SprintSession).where(
+    SprintSession.id == bindparam("sprint_id")
+)
+_SPRINTS_BY_TEAM = select(SprintSession).where(
+    SprintSession.team_name == bindparam("team_name")
+).order_by(SprintSession.sprint_number)
+_STORIES_BY_SPRINT = select(UserStory).where(
+    UserStory.sprint_id == bindparam("sprint_id")
+)
+_STORY_IN_SPRINT = select(UserStory).where(
+    UserStory.sprint_id == bindparam("sprint_id"),
+    UserStory.story_id == bindparam("story_id")
+)
+_STANDUPS_SINCE = select(DailyStandup).where(
+    DailyStandup.sprint_id == bindparam("sprint_id"),
+    DailyStandup.standup_date >= bindparam("cutoff_date")
+).order_by(DailyStandup.standup_date.desc())
+_RETRO_BY_SPRINT = select(Retrospective).where(
+    Retrospective.sprint_session_id == bindparam("sprint_id")
+)
+_ACTION_ITEMS_BY_RETRO = select(ActionItem).where(
+    ActionItem.retrospective_id == bindparam("retrospective_id")
+)
+_BURNDOWN_BY_SPRINT = select(BurndownData).where(
+    BurndownData.sprint_id == bindparam("sprint_id")
+).order_by(BurndownData.date)
+_SEVERITY_ORDER = case(
+    {"critical": 0, "high": 1, "medium": 2, "low": 3}, value=Risk.severity, else_=4
+)
+_RISKS_BY_SPRINT = select(Risk).where(
+    Risk.sprint_session_id == bindparam("sprint_id")
+).order_by(_SEVERITY_ORDER, Risk.id)
+_RISKS_BY_SPRINT_STATUS = _RISKS_BY_SPRINT.where(Risk.status == bindparam("status"))
+_ISSUES_BY_SPRINT = select(Issue).where(
+    Issue.sprint_session_id == bindparam("sprint_id")
+).order_by(Issue.created_at, Issue.id)
+_ISSUES_BY_SPRINT_STATUS = _ISSUES_BY_SPRINT.where(Issue.status == bindparam("status"))
+_CAPACITY_BY_SPRINT = select(SprintCapacity).where(
+    SprintCapacity.sprint_session_id == bindparam("sprint_id")
+)
+_TEAM_MEMBERS = select(TeamMember)
+_TEAM_MEMBER_BY_NAME = select(TeamMember).where(
+    TeamMember.name == bindparam("name")
+)
+_PENDING_ESTIMATION = select(StoryEstimation).where(
+    StoryEstimation.story_id == bindparam("story_pk"),
+    StoryEstimation.final_estimate.is_(None)
+).order_by(StoryEstimation.id.desc()).limit(1)
+_DEPENDENCIES_BY_STORY = select(Dependency).where(
+    Dependency.story_id == bindparam("story_id")
+)
+
+# Action items in these states are left alone by close_action_items
+CLOSED_ACTION_STATUSES = ("completed", "cancelled")
+
+_ARCHIVE_OPTIONS = {"schema_translate_map": {None: ARCHIVE_SCHEMA}}
+
+
+@contextmanager
+def db_session(read_only: bool = False, db_path: str = DEFAULT_DB_URL, commit: bool = True):
+    """
+    One DatabaseManager for one unit of work (an HTTP request, an agent call,
+    a script run). Its session is committed once on success (rolled back on
+    error) and always closed, so connections go straight back to the pool
+    instead of waiting for garbage collection. Read-only scopes just close,
+    which ends the transaction without expiring the objects already loaded.
+    With commit=False the caller commits (db.commit()) when its work is done;
+    anything left uncommitted is rolled back on close.
+    """
+    db = DatabaseManager(db_path, read_only=read_only, scoped=True)
+    try:
+        yield db
+        if commit and not read_only:
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        db.close()
+
 
 class DatabaseManager:
-    def __init__(self, db_path: str = "sqlite:///database/agile_assistant.db"):
-        """Initialize database connection"""
-        self.engine = create_engine(db_path, echo=False)
-        Base.metadata.create_all(self.engine)
-        Session = sessionmaker(bind=self.engine)
-        self.session = Session()
-    
-    def __del__(self):
-        """Close database connection"""
-        if hasattr(self, 'session'):
-            self.session.close()
+    def __init__(self, db_path: str = DEFAULT_DB_URL,
+                 archive_path: str = ARCHIVE_DB_PATH, read_only: bool = False,
+                 scoped: bool = False):
+        """
+        Initialize database connection.
+        read_only=True routes the session to the read-only pool; use it for
+        pages that only read (write methods will fail on that session).
+        scoped=True is used by db_session(): write methods only flush and the
+        scope commits once at the end. Prefer db_session() over creating
+        managers directly.
+        """
+        self.db_path = db_path
+        self.read_only = read_only
+        self.scoped = scoped
+        self.engine, Session, self.archive_path = get_engine(db_path, archive_path, read_only)
+        self.search_enabled = self.engine.dialect.name == "sqlite"
+        # Scoped objects stay readable after the scope commits and closes
+        self.session = Session(expire_on_commit=False) if scoped else Session()
+        
+        # sprint_id -> {story_id: UserStory} for sprints whose stories this
+        # session has loaded; dropped on rollback along with the objects
+        self._story_maps = {}
+        event.listen(self.session, "after_rollback", lambda session: self._story_maps.clear())
+        
+        # Sprints (None = all) whose cached dependency graphs this session has
+        # invalidated; dropped again once the change is committed
+        self._stale_graphs = set()
+        event.listen(self.session, "after_commit", self._drop_stale_graphs)
+        event.listen(self.session, "after_rollback", lambda session: self._stale_graphs.clear())
+    
+    def _commit(self):
+        """Commit now, or just flush when the surrounding db_session() owns the commit"""
+        if self.read_only:
+            # Read-only scopes never commit, so a write here would be dropped silently
+            raise RuntimeError("Write attempted on a read-only DatabaseManager; use db_session() / get_db")
+        if self.scoped:
+            self.session.flush()
+        else:
+            self.session.commit()
+    
+    def _fetch(self, stmt, params: dict, first: bool = False, archived: bool = False):
+        """Execute a cached ORM select and return the first object or all of them"""
+        result = self.session.execute(
+            stmt, params, execution_options=_ARCHIVE_OPTIONS if archived else {}
+        ).scalars()
+        return result.first() if first else result.all()
+    
+    def _read_through(self, stmt, params: dict, first: bool = False):
+        """
+        Run a statement against the hot tables and fall through to the archive
+        when nothing is found. Archived rows are read-only.
+        """
+        result = self._fetch(stmt, params, first)
+        if result or not self.archive_path:
+            return result
+        return self._fetch(stmt, params, first, archived=True)
+    
+    def _bulk_update(self, stmt):
+        """
+        Run one UPDATE ... WHERE and return the number of rows it changed.
+        Objects already loaded in this session are synced to the new values
+        (in Python when the criteria allow it, otherwise via RETURNING).
+        """
+        result = self.session.execute(stmt)
+        self._commit()
+        return result.rowcount
+    
+    def _invalidate_dependency_graphs(self, sprint_id: int = None):
+        """
+        Forget cached dependency graphs for a sprint (or every sprint) now, and
+        again when the still-open transaction commits
+        """
+        self._stale_graphs.add(sprint_id)
+        self._drop_stale_graphs()
+        if not self.session.in_transaction():
+            self._stale_graphs.clear()
+    
+    def _drop_stale_graphs(self, session=None):
+        if not self._stale_graphs:
+            return
+        with _dependency_graphs_lock:
+            for key in list(_dependency_graphs):
+                if key[0] == self.db_path and (None in self._stale_graphs or key[1] in self._stale_graphs):
+                    del _dependency_graphs[key]
+        if session is not None:
+            self._stale_graphs.clear()
+    
+    def commit(self):
+        """Commit a db_session(commit=False) unit of work; raises if the commit fails"""
+        self.session.commit()
+    
+    def close(self):
+        """Close the session and return its connection to the pool"""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.session.rollback()
+        self.close()
     
     # ========== SPRINT MANAGEMENT ==========
     
@@ -45,31 +546,57 @@ class DatabaseManager:
             completed_points=0
         )
         self.session.add(sprint)
-        self.session.commit()
+        self._commit()
         return sprint
     
     def get_sprint(self, session_id: str):
-        """Get sprint by session ID"""
-        return self.session.query(SprintSession).filter(
-            SprintSession.session_id == session_id
-        ).first()
+        """Get sprint by session ID (falls through to the archive)"""
+        return self._read_through(_SPRINT_BY_SESSION_ID, {"session_id": session_id}, first=True)
+    
+    def get_sprint_by_id(self, sprint_id: int):
+        """Get sprint by its database id (falls through to the archive)"""
+        return self._read_through(_SPRINT_BY_ID, {"sprint_id": sprint_id}, first=True)
     
-    def get_all_sprints(self, team_name: str):
-        """Get all sprints for a team"""
-        return self.session.query(SprintSession).filter(
-            SprintSession.team_name == team_name
-        ).order_by(SprintSession.sprint_number).all()
+    def get_all_sprints(self, team_name: str, include_archived: bool = False):
+        """Get all sprints for a team, optionally including archived ones"""
+        params = {"team_name": team_name}
+        sprints = self._fetch(_SPRINTS_BY_TEAM, params)
+        
+        if include_archived and self.archive_path:
+            archived = self._fetch(_SPRINTS_BY_TEAM, params, archived=True)
+            sprints = sorted(archived + sprints, key=lambda s: s.sprint_number)
+        
+        return sprints
     
     def update_sprint_status(self, session_id: str, status: str):
         """Update sprint status"""
-        sprint = self.get_sprint(session_id)
-        if sprint:
-            sprint.status = status
-            sprint.updated_at = datetime.now()
-            self.session.commit()
+        stmt = update(SprintSession).where(
+            SprintSession.session_id == session_id
+        ).values(status=status, updated_at=datetime.now())
+        updated = self._bulk_update(stmt)
+        if updated:
             print(f"[Database] Updated sprint {session_id} status to: {status}")
-            return True
-        return False
+        return updated > 0
+    
+    def complete_sprint(self, session_id: str):
+        """
+        Mark a sprint completed and record its completed points (sum of its
+        done stories) in the same statement. Returns the number of sprints
+        updated - 0 if it was not found or already completed.
+        """
+        done_points = select(func.coalesce(func.sum(UserStory.story_points), 0)).where(
+            UserStory.sprint_id == SprintSession.id,
+            UserStory.status == "done"
+        ).scalar_subquery()
+        stmt = update(SprintSession).where(
+            SprintSession.session_id == session_id,
+            SprintSession.status.is_distinct_from("completed")
+        ).values(status="completed", completed_points=done_points, updated_at=datetime.now())
+        
+        updated = self._bulk_update(stmt)
+        if updated:
+            print(f"[Database] Sprint {session_id} marked completed")
+        return updated
     
     # ========== USER STORY MANAGEMENT ==========
     
@@ -88,56 +615,158 @@ class DatabaseManager:
             status="backlog"
         )
         self.session.add(story)
-        self.session.commit()
+        self._commit()
+        self._invalidate_dependency_graphs(sprint_id)
+        if sprint_id in self._story_maps:
+            self._story_maps[sprint_id][story_id] = story
         return story
     
     def get_sprint_stories(self, sprint_id: int):
         """Get all stories for a sprint"""
-        return self.session.query(UserStory).filter(
-            UserStory.sprint_id == sprint_id
-        ).all()
+        stories = self._read_through(_STORIES_BY_SPRINT, {"sprint_id": sprint_id})
+        self._story_maps[sprint_id] = {story.story_id: story for story in stories}
+        return stories
+    
+    def get_story(self, sprint_id: int, story_id: str):
+        """
+        Get one story of a sprint by its story_id (US-001): a dict hit when this
+        session already loaded the sprint's stories, otherwise one lookup on
+        the (sprint_id, story_id) index
+        """
+        stories = self._story_maps.get(sprint_id)
+        if stories is not None:
+            return stories.get(story_id)
+        return self._read_through(_STORY_IN_SPRINT, {"sprint_id": sprint_id, "story_id": story_id}, first=True)
     
-    def update_story_estimate(self, story_id: str, story_points: int, approved: bool = False):
-        """Update story point estimate"""
-        story = self.session.query(UserStory).filter(
+    def update_story_estimate(self, sprint_id: int, story_id: str, story_points: int, approved: bool = False):
+        """Update the story point estimate of one sprint's story (story_id is only unique per sprint)"""
+        stmt = update(UserStory).where(
+            UserStory.sprint_id == sprint_id,
             UserStory.story_id == story_id
-        ).first()
-        if story:
-            story.story_points = story_points
-            story.story_points_approved = approved
-            self.session.commit()
-            return True
-        return False
+        ).values(story_points=story_points, story_points_approved=approved)
+        updated = self._bulk_update(stmt)
+        self._story_maps.pop(sprint_id, None)
+        if updated:
+            self._invalidate_dependency_graphs(sprint_id)
+        return updated > 0
     
     def clear_sprint_story_estimates(self, session_id: str):
         """
         Clear all story estimates for a sprint (for planning reset)
-        Sets story_points to None and story_points_approved to False
+        Sets story_points to None and story_points_approved to False.
+        Returns the number of stories cleared.
         """
         try:
-            sprint = self.get_sprint(session_id)
-            if not sprint:
-                print(f"[Database] Sprint {session_id} not found for estimate clearing")
-                return False
-            
-            stories = self.get_sprint_stories(sprint.id)
-            
-            cleared_count = 0
-            for story in stories:
-                if story.story_points is not None or story.story_points_approved:
-                    story.story_points = None
-                    story.story_points_approved = False
-                    cleared_count += 1
+            sprint_id = select(SprintSession.id).where(
+                SprintSession.session_id == session_id
+            ).scalar_subquery()
+            stmt = update(UserStory).where(
+                UserStory.sprint_id == sprint_id,
+                or_(UserStory.story_points.is_not(None), UserStory.story_points_approved.is_(True))
+            ).values(story_points=None, story_points_approved=False)
             
-            self.session.commit()
+            cleared_count = self._bulk_update(stmt)
+            if cleared_count:
+                self._invalidate_dependency_graphs()
             print(f"[Database] Cleared estimates for {cleared_count} stories in {session_id}")
-            return True
+            return cleared_count
         except Exception as e:
             self.session.rollback()
             print(f"[Database Error] Failed to clear story estimates: {e}")
             import traceback
             traceback.print_exc()
-            return False
+            return 0
+    
+    def update_stories_status(self, sprint_id: int, status: str, story_ids: list = None):
+        """
+        Move every story of a sprint (or just `story_ids`) to `status` in one
+        statement. started_at / completed_at are stamped the first time a story
+        goes in_progress / done. Returns the number of stories changed.
+        """
+        now = datetime.now()
+        stmt = update(UserStory).where(
+            UserStory.sprint_id == sprint_id,
+            UserStory.status.is_distinct_from(status)
+        )
+        if story_ids is not None:
+            stmt = stmt.where(UserStory.story_id.in_(story_ids))
+        
+        values = {"status": status}
+        if status == "in_progress":
+            values["started_at"] = func.coalesce(UserStory.started_at, now)
+        elif status == "done":
+            values["completed_at"] = func.coalesce(UserStory.completed_at, now)
+        
+        updated = self._bulk_update(stmt.values(**values))
+        if updated:
+            self._invalidate_dependency_graphs(sprint_id)
+        print(f"[Database] Moved {updated} stories in sprint {sprint_id} to: {status}")
+        return updated
+    
+    # ========== ESTIMATIONS ==========
+    
+    def record_estimation(self, story_pk: int, team_estimate: int, agent_estimate: int,
+                          team_reasoning: str, agent_reasoning: str, estimated_by: str):
+        """Store a team-vs-AI comparison for a story (story_pk is UserStory.id)"""
+        estimation = StoryEstimation(
+            story_id=story_pk,
+            team_estimate=team_estimate,
+            agent_estimate=agent_estimate,
+            team_reasoning=team_reasoning,
+            estimated_by=estimated_by,
+            reasoning=EstimationReasoning(agent_reasoning=agent_reasoning)
+        )
+        self.session.add(estimation)
+        self._commit()
+        return estimation
+    
+    def update_pending_estimation(self, estimation_id: int, agent_estimate: int, agent_reasoning: str):
+        """
+        Replace the AI side of a comparison that has not been finalized yet
+        (e.g. a local first answer superseded by the LLM's); returns whether
+        it was still pending
+        """
+        updated = self.session.execute(
+            update(StoryEstimation).where(
+                StoryEstimation.id == estimation_id,
+                StoryEstimation.final_estimate.is_(None)
+            ).values(agent_estimate=agent_estimate)
+        ).rowcount
+        if updated:
+            self.session.execute(
+                update(EstimationReasoning).where(
+                    EstimationReasoning.estimation_id == estimation_id
+                ).values(agent_reasoning=agent_reasoning)
+            )
+        self._commit()
+        return bool(updated)
+    
+    def get_pending_estimation(self, story_pk: int):
+        """Latest comparison for a story that has not been finalized yet"""
+        return self._fetch(_PENDING_ESTIMATION, {"story_pk": story_pk}, first=True)
+    
+    def get_estimation_reasoning(self, estimation_id: int):
+        """The AI's full reasoning for one estimation (loaded only on demand)"""
+        reasoning = self.session.get(EstimationReasoning, estimation_id)
+        return reasoning.agent_reasoning if reasoning else None
+    
+    def finalize_estimation(self, estimation_id: int, final_estimate: int, accepted_ai: bool):
+        """Record which estimate the team went with"""
+        stmt = update(StoryEstimation).where(
+            StoryEstimation.id == estimation_id
+        ).values(final_estimate=final_estimate, team_approved_agent=accepted_ai)
+        return self._bulk_update(stmt) > 0
+    
+    def get_estimation_analytics(self, team_name: str = None):
+        """
+        AI vs team estimate error per team and story type, acceptance rate and
+        weekly drift over the whole estimation history (archive included)
+        """
+        stmt = estimation_history_statement(team_name)
+        rows = self.session.execute(stmt).all()
+        if self.archive_path:
+            rows = self.session.execute(stmt, execution_options=_ARCHIVE_OPTIONS).all() + rows
+        return estimation_analytics(rows)
     
     # ========== DAILY STANDUP ==========
     
@@ -154,16 +783,116 @@ class DatabaseManager:
             hours_worked=hours_worked
         )
         self.session.add(standup)
-        self.session.commit()
+        self._track_blockers(standup)
+        self._commit()
         return standup
     
     def get_standup_history(self, sprint_id: int, days: int = 7):
         """Get standup history for last N days"""
         cutoff_date = datetime.now().date() - timedelta(days=days)
-        return self.session.query(DailyStandup).filter(
-            DailyStandup.sprint_id == sprint_id,
-            DailyStandup.standup_date >= cutoff_date
-        ).order_by(DailyStandup.standup_date.desc()).all()
+        return self._read_through(_STANDUPS_SINCE, {"sprint_id": sprint_id, "cutoff_date": cutoff_date})
+    
+    # ========== BLOCKER TRACKING ==========
+    
+    def _track_blockers(self, standup, team_name: str = None):
+        """
+        Link a standup's blockers to the team's tracked blockers, opening new
+        ones as needed, and resolve the member's blockers from earlier days
+        that this standup no longer mentions
+        """
+        if team_name is None:
+            sprint = self.get_sprint_by_id(standup.sprint_id)
+            if not sprint:
+                return
+            team_name = sprint.team_name
+        
+        day = standup.standup_date
+        if not isinstance(day, datetime):
+            day = datetime.combine(day, datetime.min.time())
+        
+        candidates = self.session.execute(match_candidates_statement(team_name, day)).scalars().all()
+        linked = []
+        for blocker_text in split_blockers(standup.blockers):
+            terms = blocker_terms(blocker_text)
+            blocker = best_match(terms, candidates)
+            if blocker is None:
+                blocker = Blocker(
+                    team_name=team_name,
+                    fingerprint=blocker_fingerprint(terms),
+                    terms=" ".join(terms),
+                    first_seen=day,
+                    last_seen=day,
+                    days_reported=1,
+                    occurrences=0,
+                    first_sprint_id=standup.sprint_id
+                )
+                self.session.add(blocker)
+                candidates.append(blocker)
+            elif blocker.last_seen < day:
+                blocker.days_reported += 1
+                blocker.last_seen = day
+            
+            blocker.description = blocker_text
+            blocker.owner = standup.member_name
+            blocker.last_sprint_id = standup.sprint_id
+            blocker.status = "open"
+            blocker.resolved_at = None
+            blocker.occurrences += 1
+            self.session.flush()
+            
+            self.session.add(BlockerReport(
+                blocker_id=blocker.id,
+                standup_id=standup.id,
+                sprint_id=standup.sprint_id,
+                member_name=standup.member_name,
+                reported_on=day,
+                text=blocker_text
+            ))
+            linked.append(blocker.id)
+        
+        self.session.execute(resolve_cleared_statement(team_name, standup.member_name, day, linked))
+    
+    def blocker_index_missing(self):
+        """
+        True when standups report blockers but none are tracked: the history
+        predates blocker tracking (init_database may already have created the
+        empty blockers table, so its existence says nothing)
+        """
+        if self.session.execute(select(Blocker.id).limit(1)).first():
+            return False
+        reported = self.session.execute(
+            select(DailyStandup.blockers).where(DailyStandup.blockers.is_not(None))
+        ).scalars()
+        return any(split_blockers(text) for text in reported)
+    
+    def rebuild_blocker_index(self):
+        """Re-derive every tracked blocker from the standup history, oldest day first"""
+        self.session.execute(delete(BlockerReport))
+        self.session.execute(delete(Blocker))
+        
+        teams = dict(self.session.execute(select(SprintSession.id, SprintSession.team_name)).all())
+        standups = self.session.execute(select(
+            DailyStandup.id, DailyStandup.sprint_id, DailyStandup.standup_date,
+            DailyStandup.member_name, DailyStandup.blockers
+        ).order_by(DailyStandup.standup_date, DailyStandup.id)).all()
+        
+        for standup in standups:
+            if standup.sprint_id in teams:
+                self._track_blockers(standup, teams[standup.sprint_id])
+        self._commit()
+        print(f"[Database] Indexed blockers of {len(standups)} standups")
+    
+    def get_open_blockers(self, team_name: str, min_age_days: int = 0):
+        """
+        The team's open blockers, oldest first, with age (days since first
+        reported), owner and how many standups mentioned them
+        """
+        today = datetime.now().date()
+        seen_before = None
+        if min_age_days:
+            seen_before = datetime.combine(today - timedelta(days=min_age_days), datetime.min.time())
+        blockers = self.session.execute(open_blockers_statement(team_name, seen_before)).scalars().all()
+        return [blocker_summary(b, today) for b in blockers]
     
     # ========== RETROSPECTIVE ==========
     
@@ -186,14 +915,12 @@ class DatabaseManager:
             team_sentiment=team_sentiment
         )
         self.session.add(retro)
-        self.session.commit()
+        self._commit()
         return retro.id
     
     def get_retrospective(self, sprint_id: int):
         """Get retrospective for a sprint"""
-        retro = self.session.query(Retrospective).filter(
-            Retrospective.sprint_session_id == sprint_id
-        ).first()
+        retro = self._read_through(_RETRO_BY_SPRINT, {"sprint_id": sprint_id}, first=True)
         
         if retro:
             # Parse JSON fields
@@ -231,27 +958,47 @@ class DatabaseManager:
             status="open"
         )
         self.session.add(action)
-        self.session.commit()
+        self._commit()
         return action
     
     def get_action_items(self, retrospective_id: int):
         """Get all action items for a retrospective"""
-        return self.session.query(ActionItem).filter(
-            ActionItem.retrospective_id == retrospective_id
-        ).all()
+        return self._read_through(_ACTION_ITEMS_BY_RETRO, {"retrospective_id": retrospective_id})
     
     def update_action_item_status(self, action_id: str, status: str):
         """Update action item status"""
-        action = self.session.query(ActionItem).filter(
-            ActionItem.action_id == action_id
-        ).first()
-        if action:
-            action.status = status
-            if status == "completed":
-                action.completed_at = datetime.now()
-            self.session.commit()
-            return True
-        return False
+        values = {"status": status}
+        if status == "completed":
+            values["completed_at"] = datetime.now()
+        stmt = update(ActionItem).where(ActionItem.action_id == action_id).values(**values)
+        return self._bulk_update(stmt) > 0
+    
+    def close_action_items(self, retrospective_id: int = None, action_ids: list = None,
+                           status: str = "completed"):
+        """
+        Close every still-open action item of a retrospective (or just
+        `action_ids`) in one statement. Returns the number of items closed.
+        """
+        if retrospective_id is None and action_ids is None:
+            raise ValueError("Pass a retrospective_id and/or action_ids to close")
+        if status not in CLOSED_ACTION_STATUSES:
+            raise ValueError(f"Unknown closing status '{status}'. Use one of: {', '.join(CLOSED_ACTION_STATUSES)}")
+        
+        stmt = update(ActionItem).where(
+            or_(ActionItem.status.is_(None), ActionItem.status.not_in(CLOSED_ACTION_STATUSES))
+        )
+        if retrospective_id is not None:
+            stmt = stmt.where(ActionItem.retrospective_id == retrospective_id)
+        if action_ids is not None:
+            stmt = stmt.where(ActionItem.action_id.in_(action_ids))
+        
+        values = {"status": status}
+        if status == "completed":
+            values["completed_at"] = datetime.now()
+        
+        closed = self._bulk_update(stmt.values(**values))
+        print(f"[Database] Closed {closed} action items as {status}")
+        return closed
     
     # ========== BURNDOWN DATA ==========
     
@@ -270,14 +1017,12 @@ class DatabaseManager:
             stories_blocked=0
         )
         self.session.add(burndown)
-        self.session.commit()
+        self._commit()
         return burndown
     
     def get_burndown_data(self, sprint_id: int):
         """Get all burndown data for a sprint"""
-        return self.session.query(BurndownData).filter(
-            BurndownData.sprint_id == sprint_id
-        ).order_by(BurndownData.date).all()
+        return self._read_through(_BURNDOWN_BY_SPRINT, {"sprint_id": sprint_id})
     
     # ========== RISKS ==========
     
@@ -292,31 +1037,20 @@ class DatabaseManager:
             description=description,
             probability=probability,
             impact=impact,
-            severity=self._calculate_severity(probability, impact),
             mitigation_plan=mitigation_plan,
             owner=owner,
             status="open"
         )
         self.session.add(risk)
-        self.session.commit()
+        self._commit()
         return risk
     
-    def _calculate_severity(self, probability: str, impact: str):
-        """Calculate risk severity from probability and impact"""
-        score = 0
-        prob_map = {"low": 1, "medium": 2, "high": 3}
-        impact_map = {"low": 1, "medium": 2, "high": 3}
-        
-        score = prob_map.get(probability.lower(), 1) * impact_map.get(impact.lower(), 1)
-        
-        if score >= 6:
-            return "critical"
-        elif score >= 4:
-            return "high"
-        elif score >= 2:
-            return "medium"
-        else:
-            return "low"
+    def get_risks(self, sprint_id: int, status: str = None):
+        """Risks of a sprint, most severe first (severity is computed by the database)"""
+        params = {"sprint_id": sprint_id}
+        if status:
+            return self._read_through(_RISKS_BY_SPRINT_STATUS, dict(params, status=status))
+        return self._read_through(_RISKS_BY_SPRINT, params)
     
     # ========== ISSUES ==========
     
@@ -336,9 +1070,30 @@ class DatabaseManager:
             status="open"
         )
         self.session.add(issue)
-        self.session.commit()
+        self._commit()
         return issue
     
+    def get_issues(self, sprint_id: int, status: str = None):
+        """Issues of a sprint, oldest first"""
+        params = {"sprint_id": sprint_id}
+        if status:
+            return self._read_through(_ISSUES_BY_SPRINT_STATUS, dict(params, status=status))
+        return self._read_through(_ISSUES_BY_SPRINT, params)
+    
+    def get_risk_issue_summary(self, sprint_id: int):
+        """
+        Open-risk probability x impact heatmap, risk and issue severity counts
+        and open-issue aging for a sprint, all grouped in SQL
+        (see database/risk_analytics.py)
+        """
+        now = datetime.utcnow()
+        return risk_issue_summary(
+            self.session.execute(risk_matrix_statement(sprint_id)).all(),
+            self.session.execute(severity_counts_statement(sprint_id)).all(),
+            self.session.execute(issue_aging_statement(sprint_id, now)).all(),
+            now
+        )
+    
     # ========== SPRINT PLAN ==========
     
     def store_sprint_plan(self, session_id: str, plan_text: str):
@@ -353,7 +1108,7 @@ class DatabaseManager:
             state['plan'] = plan_text
             state['plan_created_at'] = datetime.now().isoformat()
             sprint.state = json.dumps(state)
-            self.session.commit()
+            self._commit()
             return True
         return False
     
@@ -381,13 +1136,13 @@ class DatabaseManager:
             skills=json.dumps(skills) if skills else "[]"
         )
         self.session.add(member)
-        self.session.commit()
+        self._commit()
         return member
     
     def get_team_members(self):
         """Get all team members with proper error handling"""
         try:
-            members = self.session.query(TeamMember).all()
+            members = self._fetch(_TEAM_MEMBERS, {})
             for member in members:
                 # Handle skills field - could be string, list, or None
                 if member.skills:
@@ -415,9 +1170,7 @@ class DatabaseManager:
     def get_team_member_by_name(self, name: str):
         """Get a specific team member by name"""
         try:
-            member = self.session.query(TeamMember).filter(
-                TeamMember.name == name
-            ).first()
+            member = self._fetch(_TEAM_MEMBER_BY_NAME, {"name": name}, first=True)
             
             if member and member.skills:
                 if isinstance(member.skills, str):
@@ -449,14 +1202,77 @@ class DatabaseManager:
             if available_capacity > 0 else 0
         )
         self.session.add(capacity)
-        self.session.commit()
+        self._commit()
         return capacity
     
     def get_sprint_capacity(self, sprint_id: int):
         """Get sprint capacity for all team members"""
-        return self.session.query(SprintCapacity).filter(
-            SprintCapacity.sprint_session_id == sprint_id
-        ).all()
+        return self._read_through(_CAPACITY_BY_SPRINT, {"sprint_id": sprint_id})
+    
+    def get_team_capacity(self, sprint):
+        """Story points the team can take on: member capacities if set, else the sprint total"""
+        capacities = [c.available_capacity for c in self.get_sprint_capacity(sprint.id)
+                      if c.available_capacity is not None]
+        return sum(capacities) if capacities else (sprint.total_capacity or 0)
+    
+    def optimize_sprint_scope(self, sprint, capacity: int = None):
+        """
+        Best dependency-respecting subset of the sprint's open, estimated
+        stories within the team's capacity (see database/scope_optimizer.py)
+        """
+        if capacity is None:
+            capacity = self.get_team_capacity(sprint)
+        return optimize_scope(self.get_dependency_graph(sprint.id), capacity)
+    
+    def assign_sprint_stories(self, sprint_id: int, reassign: bool = False, apply: bool = True):
+        """
+        Assign the sprint's estimated, open stories to members by skill and
+        remaining capacity (see database/assignment.py). With `apply`, the
+        story owners and every member's allocated_capacity are written in
+        one transaction. Returns the plan, or None if it could not be saved.
+        """
+        try:
+            stories = self.session.execute(assignment_stories_statement(sprint_id)).all()
+            members = self.session.execute(assignment_members_statement(sprint_id)).all()
+            plan = assign_stories(stories, members, reassign=reassign)
+            if not apply:
+                return plan
+            
+            if reassign:
+                self.session.execute(update(UserStory).where(
+                    UserStory.sprint_id == sprint_id,
+                    UserStory.status.is_distinct_from("done"),
+                    UserStory.assigned_to.in_(list(plan["load"]))
+                ).values(assigned_to=None))
+            
+            by_member = {}
+            for story_id, member in plan["assignments"].items():
+                by_member.setdefault(member, []).append(story_id)
+            for member, story_ids in by_member.items():
+                self.session.execute(update(UserStory).where(
+                    UserStory.sprint_id == sprint_id,
+                    UserStory.story_id.in_(story_ids)
+                ).values(assigned_to=member))
+            
+            # Recount from the stories so the figure can't drift from them
+            assigned_points = select(func.coalesce(func.sum(UserStory.story_points), 0)).where(
+                UserStory.sprint_id == sprint_id,
+                UserStory.assigned_to == SprintCapacity.member_name
+            ).scalar_subquery()
+            self.session.execute(update(SprintCapacity).where(
+                SprintCapacity.sprint_session_id == sprint_id
+            ).values(allocated_capacity=assigned_points))
+            
+            self._commit()
+            print(f"[Database] Assigned {len(plan['assignments'])} stories in sprint {sprint_id}, "
+                  f"{len(plan['unassigned'])} left unassigned")
+            return plan
+        except Exception as e:
+            self.session.rollback()
+            print(f"[Database Error] Failed to assign stories: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
     
     # ========== DEPENDENCIES ==========
     
@@ -471,11 +1287,417 @@ class DatabaseManager:
             status="active"
         )
         self.session.add(dependency)
-        self.session.commit()
+        self._commit()
+        self._invalidate_dependency_graphs()
         return dependency
     
     def get_story_dependencies(self, story_id: int):
         """Get all dependencies for a story"""
-        return self.session.query(Dependency).filter(
-            Dependency.story_id == story_id
-        ).all()
\ No newline at end of file
+        return self._fetch(_DEPENDENCIES_BY_STORY, {"story_id": story_id})
+    
+    def get_dependency_graph(self, sprint_id: int):
+        """
+        Dependency DAG of a sprint (topological order, cycles, critical path,
+        blocked stories), built with one query and cached until the sprint's
+        stories or dependencies change
+        """
+        key = (self.db_path, sprint_id)
+        with _dependency_graphs_lock:
+            graph = _dependency_graphs.get(key)
+            if graph is not None:
+                _dependency_graphs.move_to_end(key)
+                return graph
+        
+        stmt = dependency_graph_statement(sprint_id)
+        rows = self.session.execute(stmt).all()
+        if not rows and self.archive_path:
+            rows = self.session.execute(stmt, execution_options=_ARCHIVE_OPTIONS).all()
+        graph = DependencyGraph(sprint_id, rows)
+        
+        # A graph built on top of our own uncommitted writes is not shared
+        if not self._stale_graphs:
+            with _dependency_graphs_lock:
+                _dependency_graphs[key] = graph
+                while len(_dependency_graphs) > DEPENDENCY_GRAPH_CACHE_SIZE:
+                    _dependency_graphs.popitem(last=False)
+        return graph
+    
+    # ========== CHARTS ==========
+    
+    def _scalar_both(self, stmt):
+        """Scalars of a statement over the hot tables and the archive"""
+        values = [self.session.execute(stmt).scalar()]
+        if self.archive_path:
+            values.append(self.session.execute(stmt, execution_options=_ARCHIVE_OPTIONS).scalar())
+        return values
+    
+    def _rows_both(self, stmt):
+        """Rows of a statement from the hot tables and the archive"""
+        rows = self.session.execute(stmt).all()
+        if self.archive_path:
+            rows += self.session.execute(stmt, execution_options=_ARCHIVE_OPTIONS).all()
+        return rows
+    
+    def find_similar_stories(self, story, k: int = 5):
+        """
+        The k finished stories from other sprints whose text is closest to
+        `story` (a UserStory), with their final points and similarity
+        """
+        latest = max((value or 0) for value in self._scalar_both(max_story_id_statement()))
+        
+        with _story_indexes_lock:
+            index = _story_indexes.get(self.db_path)
+            if index is None or latest < index.max_story_id:
+                index = StoryIndex()
+            if latest > index.max_story_id:
+                new_rows = sorted(self._rows_both(story_text_statement(index.max_story_id)))
+                for row in new_rows:
+                    index.add(row.id, row.title, row.description, row.acceptance_criteria)
+                if len(new_rows) > 1:
+                    print(f"[Database] Indexed {len(new_rows)} stories for similarity search")
+            _story_indexes[self.db_path] = index
+            matches = index.query(story.title, story.description, story.acceptance_criteria)
+        
+        if not matches:
+            return []
+        details = self._rows_both(candidate_details_statement([pk for pk, _ in matches]))
+        return similar_stories(matches, details, story.sprint_id, story.id, k)
+    
+    def estimate_story_locally(self, story):
+        """
+        Fibonacci estimate with confidence for a UserStory from the team's
+        finished stories, without calling the LLM
+        """
+        neighbours = self.find_similar_stories(story, k=NEIGHBOURS)
+        type_points = {}
+        for story_type, average, count in self._rows_both(type_points_statement()):
+            total, n = type_points.get(story_type, (0.0, 0))
+            type_points[story_type] = (total + average * count, n + count)
+        type_points = {t: (total / n, n) for t, (total, n) in type_points.items()}
+        return local_estimate(story, neighbours, type_points)
+    
+    def get_sprint_charts(self, sprint):
+        """
+        Burndown (ideal, actual, projected) for a sprint and the velocity of
+        every sprint of its team, as JSON-ready series (see database/metrics.py)
+        """
+        sprints = self.get_all_sprints(sprint.team_name, include_archived=True)
+        open_ids = [s.id for s in sprints if s.status != "completed"]
+        approved = dict(self.session.execute(approved_points_statement(open_ids)).all()) if open_ids else {}
+        return sprint_charts(sprint, self.get_burndown_data(sprint.id), sprints, approved)
+    
+    # ========== FORECASTING ==========
+    
+    def get_sprint_forecast(self, sprint):
+        """
+        Monte Carlo forecast of when the sprint's open points will be done
+        (see database/forecast.py), or None for a completed sprint or a team
+        without velocity history. History includes archived sprints. Cached per
+        sprint until its stories, dates or the team's history change.
+        """
+        if sprint.status == "completed":
+            return None
+        
+        now = datetime.now()
+        # Archived sprints are part of the history, so version both schemas
+        version = tuple(self.session.execute(forecast_version_statement(sprint)).one()) + tuple(
+            tuple(row) for row in self._rows_both(history_version_statement(sprint))
+        ) + (now.date(),)
+        key = (self.db_path, sprint.id)
+        with _forecasts_lock:
+            cached = _forecasts.get(key)
+            if cached is not None and cached[0] == version:
+                _forecasts.move_to_end(key)
+                return cached[1]
+        
+        start_date, end_date, _, _, _, total_points, done_points = version[:7]
+        samples = daily_velocity_samples(
+            self._rows_both(velocity_history_statement(sprint)),
+            self._rows_both(sprint_totals_statement(sprint))
+        )
+        start = max(now, start_date) if start_date else now
+        forecast = monte_carlo_forecast(samples, total_points - done_points, start, end_date or start,
+                                        seed=sprint.id)
+        
+        with _forecasts_lock:
+            _forecasts[key] = (version, forecast)
+            while len(_forecasts) > FORECAST_CACHE_SIZE:
+                _forecasts.popitem(last=False)
+        return forecast
+    
+    # ========== PAGINATION & STREAMING ==========
+    
+    def _keyset_page(self, model, criteria: list, keys: list, after: tuple = None,
+                     limit: int = 50, descending: bool = False):
+        """
+        Fetch one page ordered by `keys`, starting strictly after the `after` cursor.
+        Returns (rows, next_cursor); next_cursor is None on the last page.
+        Each page is a single index range scan, so latency doesn't grow with depth.
+        """
+        stmt = select(model).where(*criteria)
+        
+        if after is not None:
+            position = tuple_(*keys)
+            stmt = stmt.where(position < tuple_(*after) if descending else position > tuple_(*after))
+        
+        order = [k.desc() for k in keys] if descending else list(keys)
+        rows = self.session.execute(stmt.order_by(*order).limit(limit + 1)).scalars().all()
+        
+        if len(rows) <= limit:
+            return rows, None
+        
+        rows = rows[:limit]
+        last = rows[-1]
+        return rows, tuple(getattr(last, k.key) for k in keys)
+    
+    def _stream(self, stmt, batch_size: int, scalars: bool = True):
+        """Yield rows of a select in batches of `batch_size` without materializing the result"""
+        result = self.session.execute(stmt.execution_options(yield_per=batch_size))
+        try:
+            yield from (result.scalars() if scalars else result)
+        finally:
+            result.close()
+    
+    def get_standup_history_page(self, sprint_id: int, after: tuple = None, limit: int = 50):
+        """Standups for a sprint, newest first; cursor is (standup_date, id)"""
+        return self._keyset_page(
+            DailyStandup, [DailyStandup.sprint_id == sprint_id],
+            [DailyStandup.standup_date, DailyStandup.id], after, limit, descending=True
+        )
+    
+    def get_sprints_page(self, team_name: str, after: tuple = None, limit: int = 50):
+        """Sprints for a team by sprint number; cursor is (sprint_number, id)"""
+        return self._keyset_page(
+            SprintSession, [SprintSession.team_name == team_name],
+            [SprintSession.sprint_number, SprintSession.id], after, limit
+        )
+    
+    def get_burndown_page(self, sprint_id: int, after: tuple = None, limit: int = 100):
+        """Burndown points for a sprint by date; cursor is (date, id)"""
+        return self._keyset_page(
+            BurndownData, [BurndownData.sprint_id == sprint_id],
+            [BurndownData.date, BurndownData.id], after, limit
+        )
+    
+    def get_action_items_page(self, retrospective_id: int, after: tuple = None, limit: int = 50):
+        """Action items for a retrospective; cursor is (id,)"""
+        return self._keyset_page(
+            ActionItem, [ActionItem.retrospective_id == retrospective_id],
+            [ActionItem.id], after, limit
+        )
+    
+    def iter_standups(self, sprint_id: int, batch_size: int = 500, columns: list = None):
+        """
+        Stream all standups for a sprint in date order. Yields ORM objects, or
+        plain row tuples of `columns` (e.g. [DailyStandup.member_name, ...]) when given.
+        """
+        stmt = select(*columns) if columns else select(DailyStandup)
+        stmt = stmt.where(DailyStandup.sprint_id == sprint_id).order_by(
+            DailyStandup.standup_date, DailyStandup.id
+        )
+        return self._stream(stmt, batch_size, scalars=not columns)
+    
+    def iter_sprints(self, team_name: str, batch_size: int = 500, columns: list = None):
+        """Stream all sprints for a team by sprint number (ORM objects or row tuples)"""
+        stmt = select(*columns) if columns else select(SprintSession)
+        stmt = stmt.where(SprintSession.team_name == team_name).order_by(
+            SprintSession.sprint_number, SprintSession.id
+        )
+        return self._stream(stmt, batch_size, scalars=not columns)
+    
+    def iter_burndown(self, sprint_id: int, batch_size: int = 500, columns: list = None):
+        """Stream burndown points for a sprint by date (ORM objects or row tuples)"""
+        stmt = select(*columns) if columns else select(BurndownData)
+        stmt = stmt.where(BurndownData.sprint_id == sprint_id).order_by(
+            BurndownData.date, BurndownData.id
+        )
+        return self._stream(stmt, batch_size, scalars=not columns)
+    
+    def iter_action_items(self, retrospective_id: int, batch_size: int = 500, columns: list = None):
+        """Stream action items for a retrospective (ORM objects or row tuples)"""
+        stmt = select(*columns) if columns else select(ActionItem)
+        stmt = stmt.where(ActionItem.retrospective_id == retrospective_id).order_by(ActionItem.id)
+        return self._stream(stmt, batch_size, scalars=not columns)
+    
+    def export_rows(self, entity: str, team_name: str, batch_size: int = 1000):
+        """
+        Stream every row of an export entity (see database.export.EXPORT_ENTITIES)
+        for a team as plain tuples, archived sprints included. Returns
+        (header, row iterator). Archived rows come first: archival only moves
+        completed sprints, which precede the ones still in the hot tables.
+        """
+        header, stmt = export_statement(entity, team_name)
+        
+        def rows():
+            if self.archive_path:
+                yield from self._stream(stmt.execution_options(**_ARCHIVE_OPTIONS), batch_size, scalars=False)
+            yield from self._stream(stmt, batch_size, scalars=False)
+        
+        return header, rows()
+    
+    # ========== TEAM MEMORY ==========
+    
+    def add_team_memory(self, team_name: str, memory_type: str, content: str,
+                        sprint_number: int = None, relevance_score: int = 50, tags: list = None):
+        """Store a team memory (its search index entry is added by trigger)"""
+        memory = TeamMemory(
+            team_name=team_name,
+            memory_type=memory_type,
+            content=content,
+            sprint_number=sprint_number,
+            relevance_score=relevance_score,
+            tags=tags or []
+        )
+        self.session.add(memory)
+        self._commit()
+        return memory
+    
+    def retrieve_team_memories(self, team_name: str, context: str, k: int = 5,
+                               token_budget: int = 300):
+        """
+        Up to `k` of the team's memories most relevant to `context` whose
+        content fits in `token_budget` prompt tokens together. Ranked by bm25
+        over the memory full-text index, weighted by each memory's
+        relevance_score, so no table scan is needed.
+        """
+        if not self.search_enabled:
+            return []
+        
+        match = build_any_query(context)
+        if not match:
+            return []
+        
+        try:
+            rows = self.session.execute(memory_retrieval_statement(), {
+                "match": match, "team_name": team_name, "limit": k * 4
+            }).mappings().all()
+        except Exception as e:
+            print(f"[Database Error] Memory retrieval failed: {e}")
+            return []
+        
+        # bm25 is negative, lower is better; relevance_score scales it by 0.5x to 1.5x
+        ranked = sorted(
+            rows, key=lambda row: row["rank"] * (0.5 + (row["relevance_score"] or 50) / 100)
+        )
+        
+        memories, used = [], 0
+        for row in ranked:
+            cost = estimate_tokens(row["content"])
+            if used + cost > token_budget:
+                continue
+            memories.append(dict(row))
+            used += cost
+            if len(memories) == k:
+                break
+        return memories
+    
+    # ========== SEARCH ==========
+    
+    def search(self, query: str, kinds: list = None, limit: int = 20):
+        """
+        Full-text search across standups, stories, retrospectives and team memory,
+        archived sprints included. Returns hits as dicts (kind, id, sprint_id,
+        label, snippet, rank, archived), best match first. Lower rank is better
+        (bm25; hot and archived hits are ranked against their own index).
+        """
+        if not self.search_enabled:
+            print("[Database] Full-text search is only supported for SQLite databases")
+            return []
+        
+        match = build_match_query(query)
+        if not match:
+            return []
+        
+        hits = []
+        for kind in (kinds or FTS_INDEXES.keys()):
+            if kind not in FTS_INDEXES:
+                continue
+            schemas = ["main"]
+            if self.archive_path and kind in ARCHIVED_KINDS:
+                schemas.append(ARCHIVE_SCHEMA)
+            for schema in schemas:
+                try:
+                    rows = self.session.execute(
+                        search_statement(kind, schema), {"match": match, "limit": limit}
+                    ).mappings().all()
+                    hits.extend(dict(row, archived=bool(row["archived"])) for row in rows)
+                except Exception as e:
+                    print(f"[Database Error] Search failed for {kind} ({schema}): {e}")
+        
+        hits.sort(key=lambda hit: hit["rank"])
+        return hits[:limit]
+    
+    # ========== ARCHIVAL ==========
+    
+    def archive_completed_sprints(self, older_than_days: int = ARCHIVE_AFTER_DAYS):
+        """
+        Move completed sprints that ended more than N days ago, with all their
+        stories, standups, burndown points, retros and related rows, into the
+        archive database, then compact the hot database.
+        Returns the session IDs that were archived.
+        """
+        if not self.archive_path:
+            print("[Database] Archival is only supported for SQLite databases")
+            return []
+        
+        cutoff = datetime.now() - timedelta(days=older_than_days)
+        sprints = self.session.query(SprintSession.id, SprintSession.session_id).filter(
+            SprintSession.status == "completed",
+            SprintSession.end_date < cutoff
+        ).all()
+        
+        if not sprints:
+            print(f"[Database] No completed sprints older than {older_than_days} days to archive")
+            return []
+        
+        sprint_ids = [s.id for s in sprints]
+        try:
+            for table_name, where in ARCHIVE_TABLES:
+                columns = ", ".join(c.name for c in Base.metadata.tables[table_name].columns
+                                    if c.computed is None)
+                params = {"sprint_ids": sprint_ids}
+                
+                copy_stmt = text(
+                    f"INSERT INTO {ARCHIVE_SCHEMA}.{table_name} ({columns}) "
+                    f"SELECT {columns} FROM main.{table_name} WHERE {where}"
+                ).bindparams(bindparam("sprint_ids", expanding=True))
+                delete_stmt = text(
+                    f"DELETE FROM main.{table_name} WHERE {where}"
+                ).bindparams(bindparam("sprint_ids", expanding=True))
+                
+                self.session.execute(copy_stmt, params)
+                self.session.execute(delete_stmt, params)
+            
+            self.session.commit()
+        except Exception as e:
+            self.session.rollback()
+            print(f"[Database Error] Failed to archive sprints: {e}")
+            import traceback
+            traceback.print_exc()
+            return []
+        
+        # Rows moved under the ORM's feet
+        self.session.expire_all()
+        self._invalidate_dependency_graphs()
+        
+        archived = [s.session_id for s in sprints]
+        print(f"[Database] Archived {len(archived)} sprints: {', '.join(archived)}")
+        
+        self.compact_database()
+        return archived
+    
+    def compact_database(self):
+        """Return free pages of the hot database to the filesystem"""
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            mode = conn.exec_driver_sql("PRAGMA main.auto_vacuum").scalar()
+            raw = conn.connection.driver_connection
+            
+            if mode != 2:
+                # Databases created before archival existed need one full
+                # rebuild to switch to incremental auto-vacuum
+                raw.executescript("PRAGMA main.auto_vacuum = INCREMENTAL; VACUUM main;")
+                print("[Database] Switched hot database to incremental auto-vacuum")
+            else:
+                # executescript steps the pragma to completion (execute frees one page)
+                raw.executescript("PRAGMA main.incremental_vacuum;")
+                print("[Database] Incremental vacuum complete")
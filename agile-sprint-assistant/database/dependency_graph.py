@@ -0,0 +1,249 @@
+"""
+Dependency Graph - Story dependencies of a sprint as an in-memory DAG
+Built from a single query per sprint and cached by DatabaseManager until a
+story or dependency of that sprint changes. Every algorithm is iterative and
+linear in stories + dependencies, so sprints with thousands of stories are fine.
+"""
+from collections import deque
+
+from sqlalchemy import select, and_
+from sqlalchemy.orm import aliased
+
+from database.models import UserStory, Dependency
+
+# Dependency types that constrain ordering; "related_to" is informational only
+ORDERING_TYPES = ("blocks", "requires")
+
+# Status a prerequisite must reach before its dependents are unblocked
+DONE_STATUS = "done"
+
+_Prerequisite = aliased(UserStory)
+
+
+def dependency_graph_statement(sprint_id: int):
+    """
+    Stories of a sprint with their active ordering dependencies, one row per
+    (story, dependency) pair. story_id is only unique per sprint, so the
+    prerequisite is joined within the same sprint; one outside it comes back
+    without a sprint and is treated as external with unknown status.
+    """
+    return select(
+        UserStory.story_id,
+        UserStory.title,
+        UserStory.story_points,
+        UserStory.status,
+        UserStory.priority,
+        Dependency.depends_on_story_id,
+        _Prerequisite.sprint_id,
+        _Prerequisite.status,
+    ).outerjoin(
+        Dependency, and_(
+            Dependency.story_id == UserStory.id,
+            Dependency.status == "active",
+            Dependency.dependency_type.in_(ORDERING_TYPES)
+        )
+    ).outerjoin(
+        _Prerequisite, and_(
+            _Prerequisite.story_id == Dependency.depends_on_story_id,
+            _Prerequisite.sprint_id == UserStory.sprint_id
+        )
+    ).where(
+        UserStory.sprint_id == sprint_id
+    ).order_by(UserStory.id)
+
+
+class DependencyGraph:
+    """Story dependencies of one sprint (edges point prerequisite -> dependent)"""
+
+    def __init__(self, sprint_id: int, rows):
+        self.sprint_id = sprint_id
+        self.stories = {}         # story_id -> {"title", "points", "status", "priority"}
+        self.prerequisites = {}   # story_id -> [story_id it depends on]
+        self.dependents = {}      # story_id -> [story_ids depending on it]
+        self.external = {}        # prerequisite outside this sprint -> status (None if unknown)
+
+        edges = []
+        for story_id, title, points, status, priority, depends_on, prereq_sprint, prereq_status in rows:
+            if story_id not in self.stories:
+                self.stories[story_id] = {"title": title, "points": points or 0,
+                                          "estimated": points is not None,
+                                          "status": status, "priority": priority}
+                self.prerequisites[story_id] = []
+                self.dependents[story_id] = []
+            if depends_on:
+                edges.append((story_id, depends_on))
+                if prereq_sprint != sprint_id:
+                    self.external[depends_on] = prereq_status
+
+        for story_id, depends_on in edges:
+            if depends_on in self.prerequisites[story_id]:
+                continue
+            self.prerequisites[story_id].append(depends_on)
+            if depends_on in self.stories:
+                self.dependents[depends_on].append(story_id)
+
+        self._order = None
+        self._cycles = None
+
+    # ========== ORDERING ==========
+
+    def _internal_prerequisites(self, story_id: str):
+        return [p for p in self.prerequisites[story_id] if p in self.stories]
+
+    def topological_order(self):
+        """
+        Stories ordered so every story comes after its prerequisites (Kahn's
+        algorithm, ties kept in story order). Stories caught in a cycle, and
+        everything downstream of one, are left out - see find_cycles().
+        """
+        if self._order is None:
+            in_degree = {s: len(self._internal_prerequisites(s)) for s in self.stories}
+            ready = deque(s for s, degree in in_degree.items() if degree == 0)
+            order = []
+            while ready:
+                story_id = ready.popleft()
+                order.append(story_id)
+                for dependent in self.dependents[story_id]:
+                    in_degree[dependent] -= 1
+                    if in_degree[dependent] == 0:
+                        ready.append(dependent)
+            self._order = order
+        return list(self._order)
+
+    def has_cycle(self):
+        return len(self.topological_order()) < len(self.stories)
+
+    def find_cycles(self):
+        """
+        Groups of stories that depend on each other in a loop (strongly
+        connected components with more than one story, or a self-dependency),
+        using an iterative Tarjan's algorithm
+        """
+        if self._cycles is not None:
+            return [list(c) for c in self._cycles]
+
+        index, low, on_stack = {}, {}, set()
+        stack, cycles = [], []
+        counter = 0
+
+        for root in self.stories:
+            if root in index:
+                continue
+            work = [(root, iter(self.dependents[root]))]
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+
+            while work:
+                node, children = work[-1]
+                child = next(children, None)
+                if child is not None:
+                    if child not in index:
+                        index[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(self.dependents[child])))
+                    elif child in on_stack:
+                        low[node] = min(low[node], index[child])
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in self.dependents[node]:
+                        cycles.append(component[::-1])
+
+        self._cycles = cycles
+        return [list(c) for c in cycles]
+
+    # ========== ANALYSIS ==========
+
+    def critical_path(self):
+        """
+        Longest dependency chain weighted by story points (unestimated stories
+        weigh 0), over the acyclic part of the graph.
+        Returns (total_points, [story_ids in order]).
+        """
+        best, previous = {}, {}
+        for story_id in self.topological_order():
+            chain, via = 0, None
+            for prerequisite in self._internal_prerequisites(story_id):
+                if prerequisite in best and best[prerequisite] > chain:
+                    chain, via = best[prerequisite], prerequisite
+            best[story_id] = chain + self.stories[story_id]["points"]
+            previous[story_id] = via
+
+        if not best:
+            return 0, []
+
+        end = max(best, key=best.get)
+        path = []
+        while end is not None:
+            path.append(end)
+            end = previous[end]
+        return best[path[0]], path[::-1]
+
+    def waiting_on(self, story_id: str):
+        """Prerequisites of an unfinished story that are not done (or unknown)"""
+        if self.stories[story_id]["status"] == DONE_STATUS:
+            return []
+        return [p for p in self.prerequisites[story_id] if self._status(p) != DONE_STATUS]
+
+    def is_blocked(self, story_id: str):
+        return bool(self.waiting_on(story_id))
+
+    def blocked_stories(self):
+        """story_id -> prerequisites it is still waiting on, for every blocked story"""
+        blocked = {}
+        for story_id in self.stories:
+            waiting = self.waiting_on(story_id)
+            if waiting:
+                blocked[story_id] = waiting
+        return blocked
+
+    def _status(self, story_id: str):
+        if story_id in self.stories:
+            return self.stories[story_id]["status"]
+        return self.external.get(story_id)
+
+    def summary(self, story_ids=None):
+        """
+        Plain-text dependency section for prompts: the execution order (limited
+        to `story_ids` when given), critical path, blocked stories and cycles
+        """
+        wanted = set(story_ids) if story_ids is not None else None
+        order = [s for s in self.topological_order() if wanted is None or s in wanted]
+
+        lines = ["Implementation order (respects story dependencies):"]
+        for position, story_id in enumerate(order, 1):
+            story = self.stories[story_id]
+            needs = self.prerequisites[story_id]
+            after = f" - after {', '.join(needs)}" if needs else ""
+            lines.append(f"{position}. {story_id}: {story['title']} ({story['points']} points){after}")
+
+        points, path = self.critical_path()
+        if len(path) > 1:
+            lines.append(f"\nCritical path ({points} points): {' -> '.join(path)}")
+
+        blocked = {s: p for s, p in self.blocked_stories().items() if wanted is None or s in wanted}
+        if blocked:
+            lines.append("\nCurrently blocked:")
+            lines.extend(f"- {s} waits on {', '.join(p)}" for s, p in blocked.items())
+
+        cycles = self.find_cycles()
+        if cycles:
+            lines.append("\nCircular dependencies (must be broken before these can be ordered):")
+            lines.extend(f"- {' -> '.join(c + c[:1])}" for c in cycles)
+
+        return "\n".join(lines)
@@ -0,0 +1,120 @@
+"""
+Bulk Export - Streams a team's sprint data as CSV or JSON Lines
+Rows come from a server-side cursor in batches and are encoded chunk by chunk
+(optionally gzip-compressed on the fly), so memory stays constant no matter
+how much history is exported.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+
+from sqlalchemy import select
+from database.models import (
+    SprintSession, UserStory, DailyStandup, BurndownData,
+    Retrospective, ActionItem
+)
+
+EXPORT_FORMATS = ("csv", "jsonl")
+
+# entity -> (model, joins needed to reach SprintSession, ordering)
+EXPORT_ENTITIES = {
+    "sprints": (SprintSession, [], [SprintSession.sprint_number, SprintSession.id]),
+    "stories": (UserStory, [(SprintSession, UserStory.sprint_id == SprintSession.id)],
+                [SprintSession.sprint_number, UserStory.id]),
+    "standups": (DailyStandup, [(SprintSession, DailyStandup.sprint_id == SprintSession.id)],
+                 [SprintSession.sprint_number, DailyStandup.standup_date, DailyStandup.id]),
+    "burndown": (BurndownData, [(SprintSession, BurndownData.sprint_id == SprintSession.id)],
+                 [SprintSession.sprint_number, BurndownData.date, BurndownData.id]),
+    "retrospectives": (Retrospective, [(SprintSession, Retrospective.sprint_session_id == SprintSession.id)],
+                       [SprintSession.sprint_number, Retrospective.id]),
+    "action_items": (ActionItem, [(Retrospective, ActionItem.retrospective_id == Retrospective.id),
+                                  (SprintSession, Retrospective.sprint_session_id == SprintSession.id)],
+                     [SprintSession.sprint_number, ActionItem.id]),
+}
+
+# Rows encoded per chunk handed to the response / file
+ROWS_PER_CHUNK = 500
+
+
+def export_statement(entity: str, team_name: str):
+    """Select every column of `entity` (plus sprint_number) for one team"""
+    if entity not in EXPORT_ENTITIES:
+        raise ValueError(f"Unknown export entity '{entity}'. Use one of: {', '.join(EXPORT_ENTITIES)}")
+
+    model, joins, order_by = EXPORT_ENTITIES[entity]
+    columns = list(model.__table__.columns)
+    if model is not SprintSession:
+        columns.append(SprintSession.sprint_number)
+
+    stmt = select(*columns)
+    for target, on_clause in joins:
+        stmt = stmt.join(target, on_clause)
+
+    header = [c.key for c in columns]
+    return header, stmt.where(SprintSession.team_name == team_name).order_by(*order_by)
+
+
+def _plain(value):
+    """Make a column value representable in CSV / JSON"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _csv_cell(value):
+    value = _plain(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def iter_csv(header: list, rows):
+    """Encode rows as CSV, yielding one text chunk per ROWS_PER_CHUNK rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+
+    for count, row in enumerate(rows, 1):
+        writer.writerow([_csv_cell(v) for v in row])
+        if count % ROWS_PER_CHUNK == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def iter_jsonl(header: list, rows):
+    """Encode rows as JSON Lines, yielding one text chunk per ROWS_PER_CHUNK rows"""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({k: _plain(v) for k, v in zip(header, row)}, default=str))
+        if len(lines) == ROWS_PER_CHUNK:
+            yield "\n".join(lines) + "\n"
+            lines = []
+
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def iter_gzip(chunks):
+    """Gzip a stream of text chunks incrementally"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def iter_export(header: list, rows, fmt: str = "csv", compress: bool = False):
+    """Encoded byte chunks for an export in the requested format"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}")
+
+    chunks = iter_csv(header, rows) if fmt == "csv" else iter_jsonl(header, rows)
+    if compress:
+        return iter_gzip(chunks)
+    return (chunk.encode("utf-8") for chunk in chunks)
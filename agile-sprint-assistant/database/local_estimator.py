@@ -0,0 +1,107 @@
+"""
+Local Estimator - Story point estimate without an LLM round-trip
+A weighted k-nearest-neighbour vote over finished stories: neighbours come
+from the similar-story index (TF-IDF over story text), weighted by similarity
+and boosted when story type or priority match. Their points are averaged in
+log space and snapped to the Fibonacci scale. With no text matches it falls
+back to the team's average for the story type. Everything is in memory
+except one small GROUP BY, so an estimate takes a few milliseconds.
+"""
+import math
+
+from sqlalchemy import select, func
+
+from database.models import UserStory, SprintSession
+
+FIBONACCI = (1, 2, 3, 5, 8, 13)
+
+# Neighbours consulted per estimate
+NEIGHBOURS = 10
+
+# Extra weight for a neighbour of the same story type / priority
+TYPE_BONUS = 0.5
+PRIORITY_BONUS = 0.25
+
+# Top similarity at which text evidence counts as strong
+STRONG_SIMILARITY = 0.5
+
+# Confidence when only the story type average (or nothing) is known
+TYPE_PRIOR_CONFIDENCE = 0.15
+DEFAULT_CONFIDENCE = 0.05
+DEFAULT_ESTIMATE = 5
+
+
+def type_points_statement():
+    """Average points and count per story type over finished, estimated stories"""
+    return select(
+        UserStory.story_type,
+        func.avg(UserStory.story_points),
+        func.count(UserStory.id),
+    ).join(SprintSession, UserStory.sprint_id == SprintSession.id).where(
+        UserStory.story_points.isnot(None),
+        (UserStory.status == "done") | (SprintSession.status == "completed"),
+    ).group_by(UserStory.story_type)
+
+
+def nearest_fibonacci(points: float):
+    """Closest Fibonacci value on a log scale (so 4 -> 5 and 10 -> 8)"""
+    return min(FIBONACCI, key=lambda f: abs(math.log(f) - math.log(max(points, 0.5))))
+
+
+def local_estimate(story, neighbours: list, type_points: dict):
+    """
+    Estimate for a UserStory from find_similar_stories() neighbours and
+    {story_type: (average points, count)}.
+    Returns {"estimate", "confidence", "method", "basis"}.
+    """
+    weighted = []
+    for n in neighbours:
+        weight = n["similarity"]
+        if story.story_type and n["story_type"] == story.story_type:
+            weight *= 1 + TYPE_BONUS
+        if story.priority and n.get("priority") == story.priority:
+            weight *= 1 + PRIORITY_BONUS
+        weighted.append((weight, nearest_fibonacci(n["story_points"]), n))
+
+    total = sum(w for w, _, _ in weighted)
+    if total > 0:
+        log_mean = sum(w * math.log(p) for w, p, _ in weighted) / total
+        estimate = nearest_fibonacci(math.exp(log_mean))
+
+        # Share of the vote on the estimate (neighbouring Fibonacci values count half)
+        step = FIBONACCI.index(estimate)
+        agreement = sum(
+            w * (1.0 if p == estimate else 0.5 if abs(FIBONACCI.index(p) - step) == 1 else 0.0)
+            for w, p, _ in weighted
+        ) / total
+        evidence = min(1.0, max(n["similarity"] for n in neighbours) / STRONG_SIMILARITY)
+        return {
+            "estimate": estimate,
+            "confidence": round(min(0.95, agreement * evidence), 2),
+            "method": "similar stories",
+            "basis": [f"{n['story_id']} ({p} pts)" for _, p, n in sorted(weighted, key=lambda x: -x[0])[:3]],
+        }
+
+    if story.story_type in type_points:
+        average, count = type_points[story.story_type]
+        return {
+            "estimate": nearest_fibonacci(average),
+            "confidence": TYPE_PRIOR_CONFIDENCE,
+            "method": "story type average",
+            "basis": [f"{count} past {story.story_type} stories averaging {average:.1f} pts"],
+        }
+
+    return {
+        "estimate": DEFAULT_ESTIMATE,
+        "confidence": DEFAULT_CONFIDENCE,
+        "method": "default",
+        "basis": ["no comparable history"],
+    }
+
+
+def format_local_estimate(result: dict):
+    """Plain-text summary of a local estimate"""
+    return (
+        f"LOCAL_ESTIMATE: {result['estimate']} (confidence {result['confidence']:.0%}, "
+        f"from {result['method']}: {', '.join(result['basis'])})"
+    )
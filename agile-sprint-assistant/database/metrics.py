@@ -0,0 +1,130 @@
+"""
+Sprint Metrics - Burndown and velocity chart series computed server-side
+Each series is built as a NumPy array in one pass over the rows and returned
+as plain lists (None for gaps), ready to be served as JSON to Chart.js.
+"""
+import numpy as np
+from sqlalchemy import select, func
+
+from database.models import UserStory
+
+# Completed sprints averaged for the velocity trend line
+VELOCITY_WINDOW = 3
+
+
+def approved_points_statement(sprint_ids: list):
+    """Approved story points per sprint, for sprints still being planned or run"""
+    return select(
+        UserStory.sprint_id,
+        func.coalesce(func.sum(UserStory.story_points), 0),
+    ).where(
+        UserStory.sprint_id.in_(sprint_ids),
+        UserStory.story_points_approved.is_(True)
+    ).group_by(UserStory.sprint_id)
+
+
+def _series(values):
+    """Array -> JSON-friendly list, NaN as None and whole numbers as ints"""
+    rounded = np.round(values, 1)
+    return [None if np.isnan(v) else (int(v) if v.is_integer() else float(v)) for v in rounded]
+
+
+def burndown_series(sprint, burndown, planned_points: float):
+    """
+    Ideal, actual and projected remaining points per sprint day.
+
+    The ideal line is the recorded ideal_remaining when every day has one,
+    otherwise a straight line from `planned_points` to zero. For a sprint
+    still running, the projection continues from the last recorded day at
+    the velocity achieved so far.
+    """
+    if sprint.start_date and sprint.end_date:
+        # Burndown rows are stored per calendar day, so compare dates, not times
+        start = sprint.start_date.date()
+        days = max((sprint.end_date.date() - start).days, 0)
+        offsets = np.array([(row.date.date() - start).days for row in burndown], dtype=int)
+    else:
+        days = max(len(burndown) - 1, 0)
+        offsets = np.arange(len(burndown))
+    length = days + 1
+
+    recorded = np.array([np.nan if row.remaining_points is None else row.remaining_points
+                         for row in burndown], dtype=float)
+    recorded_ideal = np.array([np.nan if row.ideal_remaining is None else row.ideal_remaining
+                               for row in burndown], dtype=float)
+    inside = (offsets >= 0) & (offsets < length)
+
+    actual = np.full(length, np.nan)
+    actual[offsets[inside]] = recorded[inside]
+
+    ideal = np.full(length, np.nan)
+    ideal[offsets[inside]] = recorded_ideal[inside]
+    if np.isnan(ideal).any():
+        ideal = np.linspace(planned_points, 0, length) if length > 1 else np.array([planned_points], dtype=float)
+
+    projected = np.full(length, np.nan)
+    known = np.nonzero(~np.isnan(actual))[0]
+    if sprint.status != "completed" and len(known):
+        last = known[-1]
+        velocity = (actual[known[0]] - actual[last]) / (last - known[0]) if last > known[0] else 0.0
+        if velocity <= 0 and days:
+            velocity = planned_points / days
+        steps = np.arange(length - last)
+        projected[last:] = np.maximum(actual[last] - velocity * steps, 0)
+
+    return {
+        "labels": [f"Day {i}" for i in range(length)],
+        "ideal": _series(ideal),
+        "actual": _series(actual),
+        "projected": _series(projected) if len(known) and sprint.status != "completed" else None,
+    }
+
+
+def velocity_series(sprints, approved_points: dict):
+    """
+    Planned and completed points per sprint with a rolling average of the
+    last VELOCITY_WINDOW completed sprints. Sprints still being planned or run
+    show their approved points as planned and no completed value yet.
+    """
+    completed_flags = np.array([s.status == "completed" for s in sprints], dtype=bool)
+    planned = np.array([
+        (s.planned_points or 0) if done else approved_points.get(s.id, 0)
+        for s, done in zip(sprints, completed_flags)
+    ], dtype=float)
+    completed = np.where(
+        completed_flags, np.array([s.completed_points or 0 for s in sprints], dtype=float), np.nan
+    )
+
+    # Rolling mean over completed sprints only, carried forward to the others
+    values = completed[completed_flags]
+    sums = np.concatenate(([0.0], np.cumsum(values)))
+    ends = np.arange(1, len(values) + 1)
+    starts = np.maximum(ends - VELOCITY_WINDOW, 0)
+    rolling = (sums[ends] - sums[starts]) / (ends - starts) if len(values) else np.array([])
+
+    seen = np.cumsum(completed_flags) - 1
+    average = np.where(seen >= 0, rolling[np.maximum(seen, 0)] if len(rolling) else np.nan, np.nan)
+
+    return {
+        "labels": [f"Sprint {s.sprint_number}" for s in sprints],
+        "sprint_ids": [s.id for s in sprints],
+        "planned": _series(planned),
+        "completed": _series(completed),
+        "average": _series(average),
+    }
+
+
+def sprint_charts(sprint, burndown, sprints, approved_points: dict):
+    """Everything the reports page charts for one sprint"""
+    if sprint.status == "completed":
+        planned = sprint.planned_points or 0
+    else:
+        planned = approved_points.get(sprint.id, 0)
+    return {
+        "sprint_id": sprint.id,
+        "sprint_number": sprint.sprint_number,
+        "status": sprint.status,
+        "planned_points": planned,
+        "burndown": burndown_series(sprint, burndown, planned),
+        "velocity": velocity_series(sprints, approved_points),
+    }
@@ -3,7 +3,7 @@ Enhanced Database Models with Full Sprint Tracking
 This defines what data we store in our database
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, JSON, Float, Boolean, ForeignKey
+from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, JSON, Float, Boolean, ForeignKey, Index, Computed
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
@@ -12,6 +12,10 @@ import os
 # Create base class for all models
 Base = declarative_base()
 
+# Tables whose rows the archival job moves out (see db_manager.ARCHIVE_TABLES):
+# AUTOINCREMENT keeps SQLite from handing an archived row's id to a new row
+ARCHIVED_ROWS = {"sqlite_autoincrement": True}
+
 # Database path
 DATABASE_PATH = 'sqlite:///database/agile_assistant.db'
 
@@ -24,6 +28,10 @@ class SprintSession(Base):
     Main sprint session - stores all sprint information
     """
     __tablename__ = 'sprint_sessions'
+    __table_args__ = (
+        Index('ix_sprint_sessions_team_number', 'team_name', 'sprint_number', 'id'),
+        ARCHIVED_ROWS,
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     session_id = Column(String(200), unique=True, nullable=False)
@@ -65,11 +73,15 @@ class UserStory(Base):
     Individual user stories within a sprint
     """
     __tablename__ = 'user_stories'
+    __table_args__ = (
+        Index('ux_user_stories_sprint_story', 'sprint_id', 'story_id', unique=True),
+        ARCHIVED_ROWS,
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     sprint_id = Column(Integer, ForeignKey('sprint_sessions.id'))
     
-    story_id = Column(String(50), unique=True, nullable=False)  # US-001
+    story_id = Column(String(50), nullable=False)  # US-001, unique per sprint (ux_user_stories_sprint_story)
     title = Column(String(300), nullable=False)
     description = Column(Text)
     acceptance_criteria = Column(Text)
@@ -126,6 +138,7 @@ class SprintCapacity(Base):
     Individual team member capacity for each sprint
     """
     __tablename__ = 'sprint_capacity'
+    __table_args__ = ARCHIVED_ROWS
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     sprint_session_id = Column(Integer, ForeignKey('sprint_sessions.id'))
@@ -145,6 +158,7 @@ class Dependency(Base):
     Dependencies between user stories
     """
     __tablename__ = 'dependencies'
+    __table_args__ = ARCHIVED_ROWS
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     story_id = Column(Integer, ForeignKey('user_stories.id'))
@@ -159,11 +173,23 @@ class Dependency(Base):
     story = relationship("UserStory", foreign_keys=[story_id], back_populates="dependencies")
 
 
+# Risk severity from probability x impact (low=1, medium=2, high=3, anything else 1)
+_LEVEL_SQL = "(CASE lower({column}) WHEN 'high' THEN 3 WHEN 'medium' THEN 2 ELSE 1 END)"
+RISK_SEVERITY_SQL = (
+    "CASE WHEN {score} >= 6 THEN 'critical' WHEN {score} >= 4 THEN 'high' "
+    "WHEN {score} >= 2 THEN 'medium' ELSE 'low' END"
+).format(score=f"{_LEVEL_SQL.format(column='probability')} * {_LEVEL_SQL.format(column='impact')}")
+
+
 class Risk(Base):
     """
     Risks associated with sprint or stories
     """
     __tablename__ = 'risks'
+    __table_args__ = (
+        Index('ix_risks_sprint_status', 'sprint_session_id', 'status', 'probability', 'impact', 'severity'),
+        ARCHIVED_ROWS,
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     sprint_session_id = Column(Integer, ForeignKey('sprint_sessions.id'))
@@ -175,7 +201,7 @@ class Risk(Base):
     
     probability = Column(String(20))  # high, medium, low
     impact = Column(String(20))  # high, medium, low
-    severity = Column(String(20))  # critical, high, medium, low
+    severity = Column(String(20), Computed(RISK_SEVERITY_SQL, persisted=True))  # critical, high, medium, low
     
     mitigation_plan = Column(Text)
     owner = Column(String(100))
@@ -192,6 +218,10 @@ class Issue(Base):
     Issues and blockers
     """
     __tablename__ = 'issues'
+    __table_args__ = (
+        Index('ix_issues_sprint_status', 'sprint_session_id', 'status', 'severity', 'created_at'),
+        ARCHIVED_ROWS,
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     sprint_session_id = Column(Integer, ForeignKey('sprint_sessions.id'))
@@ -221,6 +251,10 @@ class DailyStandup(Base):
     Daily standup updates
     """
     __tablename__ = 'daily_standups'
+    __table_args__ = (
+        Index('ix_daily_standups_sprint_date', 'sprint_id', 'standup_date', 'id'),
+        ARCHIVED_ROWS,
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     sprint_id = Column(Integer, ForeignKey('sprint_sessions.id'))
@@ -241,11 +275,66 @@ class DailyStandup(Base):
     sprint = relationship("SprintSession", back_populates="daily_standups")
 
 
+class Blocker(Base):
+    """
+    A blocker tracked across standups: every report of the same (normalized)
+    blocker by the team links to one row
+    """
+    __tablename__ = 'blockers'
+    __table_args__ = (
+        Index('ix_blockers_team_status_fingerprint', 'team_name', 'status', 'fingerprint'),
+        Index('ix_blockers_team_status_first_seen', 'team_name', 'status', 'first_seen'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    team_name = Column(String(100), nullable=False)
+    
+    fingerprint = Column(String(16), nullable=False)
+    terms = Column(Text)  # normalized words, sorted
+    description = Column(Text)  # latest wording
+    
+    owner = Column(String(100))  # member who last reported it
+    status = Column(String(20), default='open')  # open, resolved
+    
+    first_seen = Column(DateTime, nullable=False)
+    last_seen = Column(DateTime, nullable=False)
+    days_reported = Column(Integer, default=1)
+    occurrences = Column(Integer, default=1)
+    
+    first_sprint_id = Column(Integer, ForeignKey('sprint_sessions.id'))
+    last_sprint_id = Column(Integer, ForeignKey('sprint_sessions.id'))
+    resolved_at = Column(DateTime)
+
+
+class BlockerReport(Base):
+    """
+    One standup's mention of a tracked blocker
+    """
+    __tablename__ = 'blocker_reports'
+    __table_args__ = (
+        Index('ix_blocker_reports_blocker_date', 'blocker_id', 'reported_on'),
+        ARCHIVED_ROWS,
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    blocker_id = Column(Integer, ForeignKey('blockers.id'), nullable=False)
+    standup_id = Column(Integer, ForeignKey('daily_standups.id'))
+    sprint_id = Column(Integer, ForeignKey('sprint_sessions.id'))
+    
+    member_name = Column(String(100))
+    reported_on = Column(DateTime, nullable=False)
+    text = Column(Text)
+
+
 class BurndownData(Base):
     """
     Burndown chart data points
     """
     __tablename__ = 'burndown_data'
+    __table_args__ = (
+        Index('ix_burndown_data_sprint_date', 'sprint_id', 'date', 'id'),
+        ARCHIVED_ROWS,
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     sprint_id = Column(Integer, ForeignKey('sprint_sessions.id'))
@@ -292,6 +381,7 @@ class Retrospective(Base):
     Sprint retrospective sessions
     """
     __tablename__ = 'retrospectives'
+    __table_args__ = ARCHIVED_ROWS
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     sprint_session_id = Column(Integer, ForeignKey('sprint_sessions.id'))
@@ -325,6 +415,10 @@ class ActionItem(Base):
     Action items from retrospectives
     """
     __tablename__ = 'action_items'
+    __table_args__ = (
+        Index('ix_action_items_retrospective', 'retrospective_id', 'id'),
+        ARCHIVED_ROWS,
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     retrospective_id = Column(Integer, ForeignKey('retrospectives.id'))
@@ -350,21 +444,38 @@ class StoryEstimation(Base):
     Track story estimations - team vs agent
     """
     __tablename__ = 'story_estimations'
+    __table_args__ = (
+        Index('ix_story_estimations_story', 'story_id', 'id'),
+        ARCHIVED_ROWS,
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     story_id = Column(Integer, ForeignKey('user_stories.id'))
     
     team_estimate = Column(Integer)  # Team's estimate
     agent_estimate = Column(Integer)  # Agent's estimate
-    final_estimate = Column(Integer)  # Final approved estimate
+    final_estimate = Column(Integer)  # Final approved estimate (NULL until finalized)
     
     team_reasoning = Column(Text)
-    agent_reasoning = Column(Text)
     
     team_approved_agent = Column(Boolean, default=False)  # Did team accept agent's estimate?
     
     estimated_by = Column(String(100))
     estimated_at = Column(DateTime, default=datetime.utcnow)
+    
+    # The AI's full response is kept in its own table so history scans stay narrow
+    reasoning = relationship("EstimationReasoning", uselist=False, lazy="noload",
+                             cascade="all, delete-orphan")
+
+
+class EstimationReasoning(Base):
+    """
+    AI reasoning behind a story estimation, stored out of line
+    """
+    __tablename__ = 'estimation_reasoning'
+    
+    estimation_id = Column(Integer, ForeignKey('story_estimations.id'), primary_key=True)
+    agent_reasoning = Column(Text)
 
 
 # Initialize database
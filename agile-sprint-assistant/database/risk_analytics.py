@@ -0,0 +1,96 @@
+"""
+Risk Analytics - Risk heatmap, severity counts and open-issue aging for a sprint
+Every figure is a GROUP BY in SQL over the sprint's range of the
+(sprint_session_id, status, ...) indexes, so only a handful of grouped rows
+come back to Python however many risks and issues a sprint has. Risk severity
+is a stored generated column (see models.RISK_SEVERITY_SQL).
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, func, case, literal, union_all
+
+from database.models import Risk, Issue
+
+LEVELS = ("low", "medium", "high")
+SEVERITIES = ("critical", "high", "medium", "low")
+
+# Statuses that take a risk or issue off the board
+CLOSED_STATUSES = ("resolved", "closed", "mitigated")
+
+# Open-issue age buckets: (label, minimum age in days)
+AGE_BUCKETS = (("15+ days", 15), ("8-14 days", 8), ("3-7 days", 3), ("0-2 days", 0))
+
+
+def _is_open(model):
+    return func.coalesce(model.status, "open").notin_(CLOSED_STATUSES)
+
+
+def risk_matrix_statement(sprint_id: int):
+    """Open risks counted per (probability, impact) cell"""
+    probability = func.lower(Risk.probability)
+    impact = func.lower(Risk.impact)
+    return select(probability, impact, func.count()).where(
+        Risk.sprint_session_id == sprint_id, _is_open(Risk)
+    ).group_by(probability, impact)
+
+
+def severity_counts_statement(sprint_id: int):
+    """(kind, severity, open, count) for the sprint's risks and issues"""
+    risks = select(
+        literal("risks").label("kind"), Risk.severity, _is_open(Risk).label("is_open"), func.count()
+    ).where(Risk.sprint_session_id == sprint_id).group_by(Risk.severity, "is_open")
+    issues = select(
+        literal("issues").label("kind"), func.lower(Issue.severity), _is_open(Issue).label("is_open"), func.count()
+    ).where(Issue.sprint_session_id == sprint_id).group_by(func.lower(Issue.severity), "is_open")
+    return union_all(risks, issues)
+
+
+def issue_aging_statement(sprint_id: int, now: datetime):
+    """Open issues per age bucket with the oldest report in each"""
+    bucket = case(
+        *[(Issue.created_at <= now - timedelta(days=days), label) for label, days in AGE_BUCKETS[:-1]],
+        else_=AGE_BUCKETS[-1][0]
+    )
+    return select(bucket, func.count(), func.min(Issue.created_at)).where(
+        Issue.sprint_session_id == sprint_id, _is_open(Issue)
+    ).group_by(bucket)
+
+
+def risk_issue_summary(matrix_rows, severity_rows, aging_rows, now: datetime):
+    """
+    Assemble the grouped rows into:
+    - matrix: open risk counts with probability rows (high first) and impact
+      columns (low first), the usual heatmap layout
+    - severity: {"risks"/"issues": {severity: {"open", "total"}}}
+    - issue_aging: open issues per age bucket, oldest first, with the age of
+      the oldest issue in days
+    """
+    cells = {(p, i): count for p, i, count in matrix_rows}
+    matrix = [[cells.get((p, i), 0) for i in LEVELS] for p in reversed(LEVELS)]
+    unrated = sum(count for (p, i), count in cells.items() if p not in LEVELS or i not in LEVELS)
+
+    severity = {"risks": {}, "issues": {}}
+    for kind, level, is_open, count in severity_rows:
+        counts = severity[kind].setdefault(level or "unrated", {"open": 0, "total": 0})
+        counts["total"] += count
+        if is_open:
+            counts["open"] += count
+
+    ages = {label: (count, oldest) for label, count, oldest in aging_rows}
+    aging = []
+    for label, _ in AGE_BUCKETS:
+        count, oldest = ages.get(label, (0, None))
+        aging.append({
+            "bucket": label,
+            "count": count,
+            "oldest_days": (now - oldest).days if oldest else None,
+        })
+
+    return {
+        "matrix": {"probability": list(reversed(LEVELS)), "impact": list(LEVELS), "counts": matrix},
+        "unrated_risks": unrated,
+        "severity": severity,
+        "open_risks": sum(cells.values()),
+        "open_issues": sum(a["count"] for a in aging),
+        "issue_aging": aging,
+    }
@@ -0,0 +1,227 @@
+"""
+Scope Optimizer - Best set of stories for a sprint under team capacity
+A priority-weighted 0/1 knapsack with precedence constraints: a story can only
+be picked together with every prerequisite it has in the sprint.
+
+Stories are split into dependency-connected groups. Each group contributes the
+dependency-closed subsets of itself that fit the capacity (a lone story: take
+it or not), and a dynamic program over capacity picks the best option per
+group. That is exact while groups stay small, which is the normal shape of a
+sprint; a group too large to enumerate falls back to the prefixes of its
+best-first dependency order and the result is flagged as not exact.
+"""
+import heapq
+
+import numpy as np
+
+from database.dependency_graph import DONE_STATUS
+
+# Value of one story point by priority
+PRIORITY_WEIGHTS = {"critical": 4, "high": 3, "medium": 2, "low": 1}
+DEFAULT_PRIORITY_WEIGHT = 1
+
+# Dependency-closed subsets enumerated per group before falling back
+MAX_GROUP_OPTIONS = 4096
+
+
+def story_value(story: dict):
+    return PRIORITY_WEIGHTS.get((story["priority"] or "").lower(), DEFAULT_PRIORITY_WEIGHT) * story["points"]
+
+
+def _eligible_stories(graph):
+    """
+    Stories that can be planned, plus the reason every other open story
+    can't: unestimated, in a dependency cycle, waiting on another sprint, or
+    depending on one of those
+    """
+    ineligible = {}
+    in_cycle = {s for cycle in graph.find_cycles() for s in cycle}
+    eligible = []
+
+    for story_id in graph.topological_order() + sorted(in_cycle):
+        story = graph.stories[story_id]
+        if story["status"] == DONE_STATUS:
+            continue
+        if story_id in in_cycle:
+            ineligible[story_id] = "circular dependency"
+        elif not story["estimated"]:
+            ineligible[story_id] = "not estimated"
+        else:
+            for prerequisite in graph.prerequisites[story_id]:
+                if prerequisite in graph.stories:
+                    if prerequisite in ineligible:
+                        ineligible[story_id] = f"depends on {prerequisite} ({ineligible[prerequisite]})"
+                        break
+                elif graph.external.get(prerequisite) != DONE_STATUS:
+                    ineligible[story_id] = f"waits on {prerequisite} from another sprint"
+                    break
+            else:
+                eligible.append(story_id)
+
+    # Anything downstream of a cycle never made it into the topological order
+    for story_id, story in graph.stories.items():
+        if story["status"] != DONE_STATUS and story_id not in ineligible and story_id not in eligible:
+            ineligible[story_id] = "depends on a circular dependency"
+
+    return eligible, ineligible
+
+
+def _groups(graph, eligible: list):
+    """Weakly connected components of the eligible stories, each in dependency order"""
+    position = {s: i for i, s in enumerate(eligible)}
+    parent = list(range(len(eligible)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for story_id in eligible:
+        for prerequisite in graph.prerequisites[story_id]:
+            if prerequisite in position:
+                parent[find(position[story_id])] = find(position[prerequisite])
+
+    groups = {}
+    for i, story_id in enumerate(eligible):
+        groups.setdefault(find(i), []).append(story_id)
+    return list(groups.values())
+
+
+def _group_options(graph, group: list, capacity: int):
+    """
+    (points, value, story_ids) for every dependency-closed subset of `group`
+    that fits in `capacity`, or None when there are more than MAX_GROUP_OPTIONS
+    """
+    bit = {s: 1 << i for i, s in enumerate(group)}
+    needs = {
+        s: sum(bit[p] for p in graph.prerequisites[s] if p in bit)
+        for s in group
+    }
+
+    options = [(0, 0, 0)]  # (points, value, member bitmask)
+    for story_id in group:  # dependency order: prerequisites are decided first
+        story = graph.stories[story_id]
+        points, value = story["points"], story_value(story)
+        extended = [
+            (w + points, v + value, mask | bit[story_id])
+            for w, v, mask in options
+            if mask & needs[story_id] == needs[story_id] and w + points <= capacity
+        ]
+        options.extend(extended)
+        if len(options) > MAX_GROUP_OPTIONS:
+            return None
+
+    return [(w, v, [s for s in group if mask & bit[s]]) for w, v, mask in options]
+
+
+def _prefix_options(graph, group: list, capacity: int):
+    """
+    Fallback for big groups: prefixes of a dependency order that always takes
+    the most valuable story per point among those whose prerequisites are in
+    """
+    in_group = set(group)
+    remaining = {s: sum(1 for p in graph.prerequisites[s] if p in in_group) for s in group}
+    dependents = {s: [d for d in graph.dependents[s] if d in remaining] for s in group}
+
+    def density(story_id):
+        story = graph.stories[story_id]
+        return -story_value(story) / max(story["points"], 1)
+
+    ready = [(density(s), s) for s, count in remaining.items() if count == 0]
+    heapq.heapify(ready)
+
+    options = [(0, 0, [])]
+    while ready:
+        _, story_id = heapq.heappop(ready)
+        story = graph.stories[story_id]
+        w, v, members = options[-1]
+        if w + story["points"] > capacity:
+            break
+        options.append((w + story["points"], v + story_value(story), members + [story_id]))
+        for dependent in dependents[story_id]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                heapq.heappush(ready, (density(dependent), dependent))
+    return options
+
+
+def optimize_scope(graph, capacity: int):
+    """
+    Pick the stories of a sprint that maximize priority-weighted points within
+    `capacity` points without ever leaving out a prerequisite of a chosen story.
+
+    Returns a dict with the selected story_ids (in dependency order), the
+    deferred ones, the stories that could not be considered and why, the
+    points used and whether the answer is provably optimal.
+    """
+    capacity = max(int(capacity or 0), 0)
+    eligible, ineligible = _eligible_stories(graph)
+
+    exact = True
+    group_options = []
+    for group in _groups(graph, eligible):
+        options = _group_options(graph, group, capacity)
+        if options is None:
+            options = _prefix_options(graph, group, capacity)
+            exact = False
+        group_options.append(options)
+
+    # best[c] = highest value using at most c points over the groups so far
+    best = np.zeros(capacity + 1)
+    choices = []
+    for options in group_options:
+        candidates = np.full((len(options), capacity + 1), -np.inf)
+        for k, (points, value, _) in enumerate(options):
+            candidates[k, points:] = best[:capacity + 1 - points] + value
+        choice = candidates.argmax(axis=0)
+        best = candidates[choice, np.arange(capacity + 1)]
+        choices.append(choice)
+
+    selected = set()
+    c = capacity
+    for options, choice in zip(reversed(group_options), reversed(choices)):
+        points, _, members = options[choice[c]]
+        selected.update(members)
+        c -= points
+
+    ordered = [s for s in eligible if s in selected]
+    selected_points = sum(graph.stories[s]["points"] for s in ordered)
+    return {
+        "capacity": capacity,
+        "selected": ordered,
+        "selected_points": selected_points,
+        "value": int(sum(story_value(graph.stories[s]) for s in ordered)),
+        "utilization": round(selected_points / capacity, 3) if capacity else None,
+        "deferred": [s for s in eligible if s not in selected],
+        "ineligible": ineligible,
+        "exact": exact,
+    }
+
+
+def format_scope(result: dict, graph):
+    """Plain-text report of an optimize_scope() result"""
+    lines = [
+        "[SCOPE RECOMMENDATION]",
+        f"Capacity: {result['capacity']} points",
+        f"Recommended scope: {result['selected_points']} points in {len(result['selected'])} stories"
+        + (f" ({result['utilization']:.0%} of capacity)" if result["utilization"] is not None else ""),
+        "",
+    ]
+    for story_id in result["selected"]:
+        story = graph.stories[story_id]
+        lines.append(f"  + {story_id}: {story['title']} ({story['points']} pts, {story['priority']})")
+
+    if result["deferred"]:
+        lines.append("\nDefer to a later sprint:")
+        for story_id in result["deferred"]:
+            story = graph.stories[story_id]
+            lines.append(f"  - {story_id}: {story['title']} ({story['points']} pts, {story['priority']})")
+
+    if result["ineligible"]:
+        lines.append("\nNot considered:")
+        lines.extend(f"  ! {s}: {reason}" for s, reason in result["ineligible"].items())
+
+    if not result["exact"]:
+        lines.append("\n(Dependency groups were too large to search exhaustively; this is a best-effort scope.)")
+    return "\n".join(lines)
@@ -0,0 +1,171 @@
+"""
+Full-Text Search - SQLite FTS5 indexes over standups, stories, retros and team memory
+The indexes are external-content tables kept in sync by triggers, so searching
+never scans the source tables. The same bm25-ranked index retrieves team
+memories for agent prompts. Archived sprints keep their own indexes in the
+archive schema (filled by the same triggers as the archival job copies rows
+in), and searches merge the hits of both by rank.
+"""
+import re
+
+from sqlalchemy import text
+
+# kind -> (fts table, source table, indexed columns)
+FTS_INDEXES = {
+    "standup": ("standups_fts", "daily_standups", ["yesterday", "today", "blockers"]),
+    "story": ("stories_fts", "user_stories", ["title", "description", "acceptance_criteria"]),
+    "retrospective": ("retros_fts", "retrospectives",
+                      ["what_went_well", "what_didnt_go_well", "what_to_improve", "summary"]),
+    "memory": ("memory_fts", "team_memory", ["content"]),
+}
+
+# Kinds whose source rows the archival job moves to the archive schema
+ARCHIVED_KINDS = ("standup", "story", "retrospective")
+
+# kind -> columns selected alongside each hit (aliased to a common shape)
+_HIT_COLUMNS = {
+    "standup": "s.sprint_id AS sprint_id, s.member_name || ' (' || date(s.standup_date) || ')' AS label",
+    "story": "s.sprint_id AS sprint_id, s.story_id || ': ' || s.title AS label",
+    "retrospective": "s.sprint_session_id AS sprint_id, 'Retrospective by ' || coalesce(s.facilitator, 'unknown') AS label",
+    "memory": "NULL AS sprint_id, s.team_name || ' ' || s.memory_type AS label",
+}
+
+
+def _create_statements(fts_table: str, source_table: str, columns: list, schema: str = "main"):
+    """
+    DDL for one external-content FTS5 table and its sync triggers; the content
+    table and trigger bodies resolve within `schema`
+    """
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"new.{c}" for c in columns)
+    old_values = ", ".join(f"old.{c}" for c in columns)
+
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {schema}.{fts_table} USING fts5("
+        f"{cols}, content='{source_table}', content_rowid='id', tokenize='porter unicode61')",
+
+        f"CREATE TRIGGER IF NOT EXISTS {schema}.{fts_table}_ai AFTER INSERT ON {source_table} BEGIN "
+        f"INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.id, {new_values}); END",
+
+        f"CREATE TRIGGER IF NOT EXISTS {schema}.{fts_table}_ad AFTER DELETE ON {source_table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); END",
+
+        # Only edits of indexed text reindex; status, points or assignment updates don't fire it
+        f"CREATE TRIGGER IF NOT EXISTS {schema}.{fts_table}_au AFTER UPDATE OF {cols} ON {source_table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.id, {new_values}); END",
+    ]
+
+
+def install_search_indexes(engine, archive_schema: str = None):
+    """
+    Create the FTS5 tables and triggers if missing, in the main schema and
+    (for ARCHIVED_KINDS) the archive schema. Indexes created for an existing
+    database are rebuilt once from the rows already stored, and update
+    triggers that fired on any column are replaced.
+    """
+    if engine.dialect.name != "sqlite":
+        return False
+
+    targets = [("main", kind) for kind in FTS_INDEXES]
+    if archive_schema:
+        targets += [(archive_schema, kind) for kind in ARCHIVED_KINDS]
+
+    with engine.begin() as conn:
+        existing = {
+            (schema, row[0]) for schema in {schema for schema, _ in targets}
+            for row in conn.exec_driver_sql(
+                f"SELECT name FROM {schema}.sqlite_master WHERE type = 'table'"
+            )
+        }
+
+        for schema, kind in targets:
+            fts_table, source_table, columns = FTS_INDEXES[kind]
+            # Update triggers from before they were limited to the indexed columns
+            trigger_sql = conn.exec_driver_sql(
+                f"SELECT sql FROM {schema}.sqlite_master WHERE type = 'trigger' AND name = ?",
+                (f"{fts_table}_au",)
+            ).scalar()
+            if trigger_sql and "UPDATE OF" not in trigger_sql.upper():
+                conn.exec_driver_sql(f"DROP TRIGGER {schema}.{fts_table}_au")
+                print(f"[Search] Limiting {schema}.{fts_table} updates to the indexed columns")
+
+            for statement in _create_statements(fts_table, source_table, columns, schema):
+                conn.exec_driver_sql(statement)
+
+            if (schema, fts_table) not in existing:
+                conn.exec_driver_sql(f"INSERT INTO {schema}.{fts_table}({fts_table}) VALUES ('rebuild')")
+                print(f"[Search] Built full-text index {schema}.{fts_table}")
+
+    return True
+
+
+def build_match_query(query: str) -> str:
+    """
+    Turn free text into a safe FTS5 MATCH expression: every word is quoted
+    (so punctuation can't break the syntax) and the last word is a prefix.
+    """
+    terms = [t.replace('"', '""') for t in query.split() if t.strip('"')]
+    if not terms:
+        return ""
+
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+# Words too common to say anything about relevance
+STOPWORDS = frozenset("""
+a about after all also an and any are as at be been before but by can could did do does
+for from had has have how i if in into is it its just may me more most my no not of on
+one or our out over should so some such than that the their them then there these they
+this to too up us was we were what when which while who will with would you your
+""".split())
+
+# Rough prompt-token cost of text (about four characters per token)
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text or "") // CHARS_PER_TOKEN + 1
+
+
+def build_any_query(text: str, max_terms: int = 32) -> str:
+    """
+    FTS5 MATCH expression that matches rows containing ANY of the distinct,
+    non-trivial words of `text` (a whole prompt context), so bm25 ranks
+    them by how many and how rare the shared words are
+    """
+    terms = []
+    for word in re.findall(r"[a-z0-9]+", (text or "").lower()):
+        if len(word) > 2 and word not in STOPWORDS and word not in terms:
+            terms.append(word)
+            if len(terms) == max_terms:
+                break
+    return " OR ".join(f'"{t}"' for t in terms)
+
+
+def memory_retrieval_statement():
+    """Team memories sharing words with the match expression, best bm25 first"""
+    return text(
+        "SELECT m.id AS id, m.memory_type AS memory_type, m.content AS content, "
+        "m.sprint_number AS sprint_number, m.relevance_score AS relevance_score, "
+        "bm25(memory_fts) AS rank "
+        "FROM memory_fts JOIN team_memory m ON m.id = memory_fts.rowid "
+        "WHERE memory_fts MATCH :match AND m.team_name = :team_name "
+        "ORDER BY rank LIMIT :limit"
+    )
+
+
+def search_statement(kind: str, schema: str = "main"):
+    """Ranked search over one index (hot or archived), with a highlighted snippet per hit"""
+    fts_table, source_table, _ = FTS_INDEXES[kind]
+
+    return text(
+        f"SELECT '{kind}' AS kind, s.id AS id, {_HIT_COLUMNS[kind]}, "
+        f"snippet({fts_table}, -1, '[', ']', '...', 12) AS snippet, "
+        f"bm25({fts_table}) AS rank, {int(schema != 'main')} AS archived "
+        f"FROM {schema}.{fts_table} JOIN {schema}.{source_table} s ON s.id = {fts_table}.rowid "
+        f"WHERE {fts_table} MATCH :match "
+        f"ORDER BY rank LIMIT :limit"
+    )
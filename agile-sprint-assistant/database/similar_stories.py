@@ -0,0 +1,207 @@
+"""
+Similar Stories - Nearest past stories to a new one, for estimation
+Story text (title counted twice, description, acceptance criteria) is turned
+into hashed unigram + bigram features with sublinear term frequency. The
+index stores them as a sparse matrix (row, feature, weight triplets sorted by
+feature), and a query scores every story sharing a feature in one pass over
+those postings: TF-IDF cosine similarity without ever touching stories that
+have nothing in common with the query.
+
+Stories are appended as they appear (DatabaseManager catches up on new ids
+before each lookup) and scanned directly until there are enough of them to
+be worth merging into the sorted postings. Points
+and status are read fresh for the few best matches, so re-estimates show up
+immediately.
+"""
+import math
+import re
+import zlib
+from collections import Counter
+
+import numpy as np
+from sqlalchemy import select, func
+
+from database.models import UserStory, SprintSession
+from database.search import STOPWORDS
+
+# 2^18 hashed features: collisions are rare at backlog sizes
+N_FEATURES = 1 << 18
+
+# Matches considered before filtering to finished stories of other sprints
+CANDIDATE_POOL = 50
+
+# Below this cosine similarity a story is not considered analogous
+MIN_SIMILARITY = 0.05
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def story_text_statement(after_id: int = 0):
+    """Text of stories with id above `after_id`, in id order"""
+    return select(
+        UserStory.id, UserStory.title, UserStory.description, UserStory.acceptance_criteria
+    ).where(UserStory.id > after_id).order_by(UserStory.id)
+
+
+def max_story_id_statement():
+    return select(func.max(UserStory.id))
+
+
+def candidate_details_statement(story_ids: list):
+    """Points, status and sprint of candidate stories"""
+    return select(
+        UserStory.id,
+        UserStory.story_id,
+        UserStory.title,
+        UserStory.story_type,
+        UserStory.priority,
+        UserStory.story_points,
+        UserStory.status,
+        UserStory.sprint_id,
+        SprintSession.sprint_number,
+        SprintSession.status.label("sprint_status"),
+    ).join(SprintSession, UserStory.sprint_id == SprintSession.id).where(UserStory.id.in_(story_ids))
+
+
+def _tokens(text: str):
+    return [w for w in _WORD.findall((text or "").lower()) if w not in STOPWORDS and len(w) > 1]
+
+
+def story_features(title: str, description: str, acceptance_criteria: str):
+    """{hashed feature: sublinear tf} of a story's text"""
+    counts = Counter()
+    for text, weight in ((title, 2), (description, 1), (acceptance_criteria, 1)):
+        words = _tokens(text)
+        for gram in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            counts[zlib.crc32(gram.encode("utf-8")) % N_FEATURES] += weight
+    return {feature: 1.0 + math.log(tf) for feature, tf in counts.items()}
+
+
+class StoryIndex:
+    """Incremental sparse TF-IDF index over story text"""
+
+    def __init__(self):
+        self.story_ids = []             # row -> UserStory.id
+        self.max_story_id = 0
+        self._rows, self._features, self._weights = [], [], []
+        self._doc_freq = np.zeros(N_FEATURES, dtype=np.int32)
+        # (features, rows, weights, norms) of the first _sorted_count triplets, sorted by feature
+        self._postings = None
+        self._sorted_count = 0
+
+    def __len__(self):
+        return len(self.story_ids)
+
+    def add(self, story_pk: int, title: str, description: str, acceptance_criteria: str):
+        """Append one story; O(features of the story)"""
+        features = story_features(title, description, acceptance_criteria)
+        row = len(self.story_ids)
+        self.story_ids.append(story_pk)
+        self.max_story_id = max(self.max_story_id, story_pk)
+        for feature, weight in features.items():
+            self._rows.append(row)
+            self._features.append(feature)
+            self._weights.append(weight)
+        if features:
+            self._doc_freq[list(features)] += 1
+
+    def _idf(self, features):
+        return np.log((1 + len(self.story_ids)) / (1 + self._doc_freq[features])) + 1.0
+
+    def _triplets(self, start: int = 0):
+        rows = np.array(self._rows[start:], dtype=np.int64)
+        features = np.array(self._features[start:], dtype=np.int64)
+        weights = np.array(self._weights[start:], dtype=np.float64) * self._idf(features)
+        return rows, features, weights
+
+    def _build_postings(self):
+        """Sort every triplet by feature (CSC layout) and compute row norms under the current idf"""
+        rows, features, weights = self._triplets()
+        norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=len(self.story_ids)))
+        order = np.argsort(features, kind="stable")
+        self._postings = (features[order], rows[order], weights[order], norms)
+        self._sorted_count = len(rows)
+
+    def query(self, title: str, description: str, acceptance_criteria: str, limit: int = CANDIDATE_POOL):
+        """[(UserStory.id, cosine similarity)] best first"""
+        if not self.story_ids:
+            return []
+        # Stories added since the last sort are scanned directly until they make
+        # up a tenth of the index; only then is everything re-sorted
+        pending = len(self._rows) - self._sorted_count
+        if self._postings is None or pending > max(1000, self._sorted_count // 10):
+            self._build_postings()
+            pending = 0
+        sorted_features, rows, weights, sorted_norms = self._postings
+
+        features = story_features(title, description, acceptance_criteria)
+        if not features:
+            return []
+        keys = np.fromiter(features, dtype=np.int64)
+        query_weights = np.fromiter(features.values(), dtype=np.float64) * self._idf(keys)
+
+        scores = np.zeros(len(self.story_ids))
+        norms = np.zeros(len(self.story_ids))
+        norms[:len(sorted_norms)] = sorted_norms
+
+        starts = np.searchsorted(sorted_features, keys, side="left")
+        ends = np.searchsorted(sorted_features, keys, side="right")
+        for start, end, q in zip(starts, ends, query_weights):
+            if start < end:
+                scores[rows[start:end]] += q * weights[start:end]
+
+        if pending:
+            new_rows, new_features, new_weights = self._triplets(self._sorted_count)
+            norms += np.sqrt(np.bincount(new_rows, weights=new_weights ** 2, minlength=len(norms)))
+            hit = np.isin(new_features, keys)
+            if hit.any():
+                by_key = dict(zip(keys.tolist(), query_weights.tolist()))
+                q = np.array([by_key[f] for f in new_features[hit].tolist()])
+                np.add.at(scores, new_rows[hit], q * new_weights[hit])
+
+        scores /= np.maximum(norms, 1e-12) * np.linalg.norm(query_weights)
+
+        top = np.nonzero(scores >= MIN_SIMILARITY)[0]
+        top = top[np.argsort(-scores[top], kind="stable")][:limit]
+        return [(self.story_ids[row], float(scores[row])) for row in top]
+
+
+def similar_stories(matches, details, exclude_sprint_id: int = None, exclude_story_pk: int = None, k: int = 5):
+    """
+    The k best matches that are finished, estimated stories from other
+    sprints (done, or part of a completed sprint), as plain dicts
+    """
+    by_id = {row.id: row for row in details}
+    results = []
+    for story_pk, score in matches:
+        row = by_id.get(story_pk)
+        if (row is None or story_pk == exclude_story_pk or row.story_points is None
+                or row.sprint_id == exclude_sprint_id
+                or (row.status != "done" and row.sprint_status != "completed")):
+            continue
+        results.append({
+            "story_id": row.story_id,
+            "title": row.title,
+            "story_type": row.story_type,
+            "priority": row.priority,
+            "story_points": row.story_points,
+            "status": row.status,
+            "sprint_number": row.sprint_number,
+            "similarity": round(score, 3),
+        })
+        if len(results) == k:
+            break
+    return results
+
+
+def format_similar_stories(stories: list):
+    """Plain-text section for the estimation prompt"""
+    if not stories:
+        return "Similar past stories: none found"
+    lines = ["Similar past stories and the points they were finally given:"]
+    for s in stories:
+        lines.append(
+            f"- {s['story_id']} (Sprint {s['sprint_number']}): {s['title']} - "
+            f"{s['story_points']} points, {s['similarity']:.0%} similar"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,61 @@
+"""
+Export a team's sprint data as CSV or JSON Lines
+
+Streams rows straight from the database to the output file, so exporting
+years of history uses constant memory.
+
+Usage:
+    python export_data.py stories
+    python export_data.py standups --format jsonl --gzip -o standups.jsonl.gz
+    python export_data.py all --team "Alpha Team" --output-dir exports/
+"""
+
+import argparse
+import os
+import sys
+
+from database.db_manager import db_session
+from database.export import EXPORT_ENTITIES, EXPORT_FORMATS, iter_export
+
+
+def export_entity(db, entity: str, team: str, fmt: str, compress: bool, output):
+    """Write one entity to an open binary file, returning the number of bytes written"""
+    header, rows = db.export_rows(entity, team)
+    written = 0
+    for chunk in iter_export(header, rows, fmt, compress):
+        output.write(chunk)
+        written += len(chunk)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export sprint data as CSV or JSON Lines")
+    parser.add_argument("entity", choices=list(EXPORT_ENTITIES) + ["all"],
+                        help="What to export ('all' writes one file per entity)")
+    parser.add_argument("--team", default="Alpha Team", help="Team name (default: Alpha Team)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv", help="Output format (default: csv)")
+    parser.add_argument("--gzip", action="store_true", help="Gzip-compress the output")
+    parser.add_argument("-o", "--output", help="Output file (default: stdout; ignored for 'all')")
+    parser.add_argument("--output-dir", default=".", help="Directory for 'all' exports (default: .)")
+    args = parser.parse_args()
+
+    extension = f".{args.format}{'.gz' if args.gzip else ''}"
+
+    with db_session(read_only=True) as db:
+        if args.entity == "all":
+            os.makedirs(args.output_dir, exist_ok=True)
+            for entity in EXPORT_ENTITIES:
+                path = os.path.join(args.output_dir, f"{args.team.replace(' ', '')}_{entity}{extension}")
+                with open(path, "wb") as output:
+                    size = export_entity(db, entity, args.team, args.format, args.gzip, output)
+                print(f"✅ {entity}: {path} ({size} bytes)", file=sys.stderr)
+        elif args.output:
+            with open(args.output, "wb") as output:
+                size = export_entity(db, args.entity, args.team, args.format, args.gzip, output)
+            print(f"✅ {args.entity}: {args.output} ({size} bytes)", file=sys.stderr)
+        else:
+            export_entity(db, args.entity, args.team, args.format, args.gzip, sys.stdout.buffer)
+
+
+if __name__ == "__main__":
+    main()
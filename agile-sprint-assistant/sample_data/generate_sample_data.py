@@ -13,6 +13,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database.models import (
     SprintSession, UserStory, TeamMember, SprintCapacity,
     Dependency, Risk, Issue, DailyStandup, BurndownData, TeamMemory,
+    Blocker, BlockerReport,
     get_session_factory, init_database
 )
 from datetime import datetime, timedelta
@@ -28,6 +29,8 @@ print("🧹 Clearing existing data...")
 # Clear existing data in correct order (respecting foreign keys)
 try:
     db.query(BurndownData).delete()
+    db.query(BlockerReport).delete()
+    db.query(Blocker).delete()
     db.query(DailyStandup).delete()
     db.query(Dependency).delete()
     db.query(Risk).delete()
@@ -660,7 +663,6 @@ risks = [
         "description": "Integration with email service provider may be complex",
         "probability": "medium",
         "impact": "high",
-        "severity": "high",
         "mitigation_plan": "Research email services early, have backup option ready",
         "owner": "David Kim"
     },
@@ -670,7 +672,6 @@ risks = [
         "description": "Emily Rodriguez on leave for 2 days, reduced QA capacity",
         "probability": "high",
         "impact": "medium",
-        "severity": "medium",
         "mitigation_plan": "Other team members to handle testing during absence",
         "owner": "Sarah Chen"
     }
@@ -684,7 +685,6 @@ for risk_data in risks:
         description=risk_data["description"],
         probability=risk_data["probability"],
         impact=risk_data["impact"],
-        severity=risk_data["severity"],
         mitigation_plan=risk_data["mitigation_plan"],
         owner=risk_data["owner"]
     )
@@ -0,0 +1,38 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+# Tests import the app's packages the same way its scripts do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_manager import DatabaseManager
+from database.models import SprintSession
+
+
+@pytest.fixture
+def db(tmp_path):
+    """DatabaseManager on a fresh database (with its own archive) in tmp_path"""
+    with DatabaseManager(f"sqlite:///{tmp_path / 'agile_assistant.db'}",
+                         str(tmp_path / "agile_archive.db")) as manager:
+        yield manager
+
+
+@pytest.fixture
+def two_sprints(db):
+    """Two sprints of one team whose stories reuse the same story ids (US-001, US-002)"""
+    start = datetime(2026, 9, 7)
+    sprints = []
+    for number in (1, 2):
+        sprint = SprintSession(
+            session_id=f"Team_Sprint_{number}", team_name="Team", sprint_number=number,
+            start_date=start + timedelta(days=14 * (number - 1)),
+            end_date=start + timedelta(days=14 * number), status="planning", state={},
+        )
+        db.session.add(sprint)
+        db.session.flush()
+        for story_id, title in (("US-001", f"Login page v{number}"), ("US-002", f"Password reset v{number}")):
+            db.create_story(sprint.id, story_id, title, "", "")
+        sprints.append(sprint)
+    return sprints
@@ -0,0 +1,40 @@
+"""Tracked blockers are backfilled from standup history (database/db_manager.py)"""
+from sqlalchemy import create_engine, text
+
+from database.db_manager import DatabaseManager
+from database.models import Base
+
+
+def legacy_database(tmp_path, blockers):
+    """A database whose tables (blockers included) were created by init_database before any tracking ran"""
+    url = f"sqlite:///{tmp_path / 'agile_assistant.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO sprint_sessions (id, session_id, team_name, sprint_number, state) "
+            "VALUES (1, 'Team_Sprint_1', 'Team', 1, '{}')"
+        ))
+        for day, blocker in enumerate(blockers, start=1):
+            conn.execute(text(
+                "INSERT INTO daily_standups (sprint_id, standup_date, member_name, yesterday, today, blockers) "
+                "VALUES (1, :day, 'Ann', 'API work', 'More API work', :blocker)"
+            ), {"day": f"2026-10-{day:02d} 09:00:00", "blocker": blocker})
+    engine.dispose()
+    return url
+
+
+def test_history_is_indexed_when_the_blockers_table_already_exists(tmp_path):
+    url = legacy_database(tmp_path, ["Waiting on staging database access"] * 3)
+    with DatabaseManager(url, str(tmp_path / "agile_archive.db")) as db:
+        assert not db.blocker_index_missing()
+        blockers = db.get_open_blockers("Team")
+    assert len(blockers) == 1
+    assert blockers[0]["days_reported"] == 3
+
+
+def test_standups_without_blockers_do_not_trigger_a_rebuild(tmp_path):
+    url = legacy_database(tmp_path, ["None", "No blockers", None])
+    with DatabaseManager(url, str(tmp_path / "agile_archive.db")) as db:
+        assert not db.blocker_index_missing()
+        assert db.get_open_blockers("Team") == []
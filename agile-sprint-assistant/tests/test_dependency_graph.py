@@ -0,0 +1,29 @@
+"""Dependency graphs resolve prerequisites within their own sprint (database/dependency_graph.py)"""
+
+
+def test_prerequisite_resolves_within_its_sprint(db, two_sprints):
+    first, second = two_sprints
+    for sprint in two_sprints:
+        db.create_dependency(db.get_story(sprint.id, "US-002").id, "US-001")
+    # US-001 is done in the first sprint only
+    db.update_stories_status(first.id, "done", ["US-001"])
+
+    done = db.get_dependency_graph(first.id)
+    assert done.prerequisites["US-002"] == ["US-001"]
+    assert done.external == {}
+    assert not done.is_blocked("US-002")
+
+    waiting = db.get_dependency_graph(second.id)
+    assert waiting.prerequisites["US-002"] == ["US-001"]
+    assert waiting.dependents["US-001"] == ["US-002"]
+    assert waiting.blocked_stories() == {"US-002": ["US-001"]}
+    assert waiting.topological_order() == ["US-001", "US-002"]
+
+
+def test_prerequisite_outside_the_sprint_is_external(db, two_sprints):
+    first, _ = two_sprints
+    db.create_dependency(db.get_story(first.id, "US-002").id, "US-999")
+
+    graph = db.get_dependency_graph(first.id)
+    assert graph.external == {"US-999": None}
+    assert graph.blocked_stories() == {"US-002": ["US-999"]}
@@ -0,0 +1,23 @@
+"""Near-duplicate feedback clustering (utils/feedback_clusters.py)"""
+from utils.feedback_clusters import BANDS, ROWS, NUM_PERM, SIMILARITY_THRESHOLD, FeedbackClusters
+
+
+def candidate_probability(similarity):
+    return 1 - (1 - similarity ** ROWS) ** BANDS
+
+
+def test_bands_catch_pairs_at_the_threshold():
+    assert BANDS * ROWS == NUM_PERM
+    assert candidate_probability(SIMILARITY_THRESHOLD) > 0.98
+    assert candidate_probability(0.1) < 0.05
+
+
+def test_near_duplicates_share_a_cluster():
+    clusters = FeedbackClusters()
+    clusters.add("Daily standups run way too long", "alice")
+    cluster, new = clusters.add("Standups run too long", "bob")
+    assert not new
+    assert cluster["votes"] == 2
+    _, new = clusters.add("Deployment pipeline is flaky", "carol")
+    assert new
+    assert len(clusters) == 2
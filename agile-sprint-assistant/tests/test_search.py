@@ -0,0 +1,65 @@
+"""Full-text index sync triggers (database/search.py)"""
+from sqlalchemy import create_engine, text
+
+from database.models import Base
+from database.search import install_search_indexes
+
+
+def make_engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    install_search_indexes(engine)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO sprint_sessions (id, session_id, team_name, sprint_number, state) "
+            "VALUES (1, 'Team_Sprint_1', 'Team', 1, '{}')"
+        ))
+        conn.execute(text(
+            "INSERT INTO user_stories (id, sprint_id, story_id, title, description, status) "
+            "VALUES (1, 1, 'US-001', 'Login page', 'Users sign in with email', 'planned')"
+        ))
+    return engine
+
+
+def changes_made_by(conn, statement):
+    """Rows written by `statement`, including writes made by its triggers"""
+    before = conn.exec_driver_sql("SELECT total_changes()").scalar()
+    conn.execute(text(statement))
+    return conn.exec_driver_sql("SELECT total_changes()").scalar() - before
+
+
+def matches(conn, word):
+    return conn.execute(text("SELECT rowid FROM stories_fts WHERE stories_fts MATCH :q"), {"q": word}).scalars().all()
+
+
+def test_non_text_updates_leave_the_index_alone():
+    engine = make_engine()
+    with engine.begin() as conn:
+        assert changes_made_by(conn, "UPDATE user_stories SET status = 'done', story_points = 5, "
+                                     "assigned_to = 'Ann', story_points_approved = 1 WHERE id = 1") == 1
+        assert matches(conn, "login") == [1]
+
+
+def test_text_updates_reindex_the_row():
+    engine = make_engine()
+    with engine.begin() as conn:
+        # The row itself plus the FTS delete and insert
+        assert changes_made_by(conn, "UPDATE user_stories SET title = 'Signup page' WHERE id = 1") > 1
+        assert matches(conn, "login") == []
+        assert matches(conn, "signup") == [1]
+
+
+def test_update_triggers_on_every_column_are_replaced():
+    engine = make_engine()
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP TRIGGER stories_fts_au")
+        conn.exec_driver_sql(
+            "CREATE TRIGGER stories_fts_au AFTER UPDATE ON user_stories BEGIN "
+            "INSERT INTO stories_fts(stories_fts, rowid, title, description, acceptance_criteria) "
+            "VALUES ('delete', old.id, old.title, old.description, old.acceptance_criteria); "
+            "INSERT INTO stories_fts(rowid, title, description, acceptance_criteria) "
+            "VALUES (new.id, new.title, new.description, new.acceptance_criteria); END"
+        )
+    install_search_indexes(engine)
+    with engine.begin() as conn:
+        assert changes_made_by(conn, "UPDATE user_stories SET status = 'done' WHERE id = 1") == 1
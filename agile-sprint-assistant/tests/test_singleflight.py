@@ -0,0 +1,76 @@
+"""Identical concurrent LLM requests share one provider call (utils/singleflight.py)"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from agents.base_agent import BaseAgent, LLM_FLIGHT
+from utils.llm_provider import LLMProvider, set_provider
+
+
+class SlowCountingProvider(LLMProvider):
+    name = "slow-counting"
+
+    def __init__(self, delay: float = 0.2):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt: str) -> str:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return f"answer to {prompt}"
+
+
+@pytest.fixture
+def provider():
+    provider = SlowCountingProvider()
+    previous = set_provider(provider)
+    yield provider
+    set_provider(previous)
+
+
+def test_async_callers_share_one_call(provider):
+    agent = BaseAgent()
+    before = LLM_FLIGHT.metrics()
+
+    async def both():
+        return await asyncio.gather(
+            agent.agenerate_response("summarize the standup"),
+            agent.agenerate_response("summarize the standup"),
+        )
+
+    assert asyncio.run(both()) == ["answer to summarize the standup"] * 2
+    assert provider.calls == 1
+
+    after = LLM_FLIGHT.metrics()
+    assert after["requests"] - before["requests"] == 2
+    assert after["executions"] - before["executions"] == 1
+    assert after["deduplicated"] - before["deduplicated"] == 1
+    assert after["in_flight"] == 0
+
+
+def test_async_callers_with_different_prompts_do_not_share(provider):
+    agent = BaseAgent()
+
+    async def both():
+        return await asyncio.gather(agent.agenerate_response("a"), agent.agenerate_response("b"))
+
+    assert asyncio.run(both()) == ["answer to a", "answer to b"]
+    assert provider.calls == 2
+
+
+def test_thread_callers_share_one_call(provider):
+    agent = BaseAgent()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(agent.generate_response("plan the sprint")))
+               for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["answer to plan the sprint"] * 3
+    assert provider.calls == 1
@@ -0,0 +1,63 @@
+"""Incremental standup summaries end with a short merge prompt (agents/standup_agent.py)"""
+import threading
+
+import pytest
+
+from agents.standup_agent import StandupAgent
+from utils.llm_provider import LLMProvider, set_provider
+
+
+class RecordingProvider(LLMProvider):
+    name = "recording"
+
+    def __init__(self):
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def generate(self, prompt: str) -> str:
+        with self._lock:
+            self.prompts.append(prompt)
+        return f"notes {len(self.prompts)}"
+
+
+@pytest.fixture
+def provider():
+    provider = RecordingProvider()
+    previous = set_provider(provider)
+    yield provider
+    set_provider(previous)
+
+
+UPDATES = [
+    ("Alice", "Built the login form", "Wire up validation", "Waiting on API keys"),
+    ("Bob", "Fixed the build", "Review PRs", "None"),
+    ("Carol", "Drafted the schema", "Write migrations", "None"),
+]
+
+
+def test_incremental_mode_only_merges_the_notes(db, two_sprints, provider):
+    sprint = two_sprints[0]
+
+    single = StandupAgent(summary_mode="single")
+    single.start_standup(sprint.session_id, db)
+    for update in UPDATES:
+        single.collect_update(*update)
+    single.generate_summary(db)
+    single_prompt = provider.prompts[-1]
+
+    incremental = StandupAgent(summary_mode="incremental")
+    incremental.start_standup(sprint.session_id, db)
+    for update in UPDATES:
+        incremental.collect_update(*update)
+    incremental.generate_summary(db)
+    reduce_prompt = provider.prompts[-1]
+
+    assert "1. KEY HIGHLIGHTS" in single_prompt
+    assert "Merge these standup notes" in reduce_prompt
+    # The full template, tracked blockers and team memory stay out of the merge
+    for section in ("KEY HIGHLIGHTS", "TEAM VELOCITY", "[AGING]", "Relevant team memory"):
+        assert section not in reduce_prompt
+    # Partial notes stand in for the first batch; the unbatched update is kept raw
+    assert "Notes on Alice, Bob:" in reduce_prompt
+    assert "Carol:" in reduce_prompt
+    assert len(reduce_prompt) < len(single_prompt)
@@ -0,0 +1,23 @@
+"""Stories are keyed by (sprint_id, story_id) (database/db_manager.py)"""
+
+
+def test_same_story_id_in_two_sprints(db, two_sprints):
+    first, second = two_sprints
+    assert db.get_story(first.id, "US-001").title == "Login page v1"
+    assert db.get_story(second.id, "US-001").title == "Login page v2"
+
+
+def test_update_story_estimate_only_touches_its_sprint(db, two_sprints):
+    first, second = two_sprints
+    db.get_sprint_stories(first.id)
+    db.get_sprint_stories(second.id)
+
+    assert db.update_story_estimate(first.id, "US-001", 5, approved=True)
+
+    updated = db.get_story(first.id, "US-001")
+    other = db.get_story(second.id, "US-001")
+    assert (updated.story_points, updated.story_points_approved) == (5, True)
+    assert (other.story_points, other.story_points_approved) == (None, False)
+    # Only the updated sprint's story map is dropped
+    assert first.id not in db._story_maps
+    assert second.id in db._story_maps
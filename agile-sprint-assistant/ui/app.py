@@ -6,6 +6,8 @@ sprint status updates, and fresh data loading
 
 import sys
 import os
+import json
+import hashlib
 
 CURRENT_FILE_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(CURRENT_FILE_DIR)
@@ -13,8 +15,8 @@ TEMPLATES_DIR = os.path.join(CURRENT_FILE_DIR, "templates")
 
 sys.path.insert(0, PROJECT_ROOT)
 
-from fastapi import FastAPI, Request, Form
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, Request, Form, HTTPException, Depends
+from fastapi.responses import HTMLResponse, StreamingResponse, Response
 from fastapi.templating import Jinja2Templates
 
 app = FastAPI()
@@ -38,10 +40,26 @@ standup_agent_instance = None
 planning_agent_instance = None
 retro_agent_instance = None
 
-def get_db():
-    """Get a fresh DatabaseManager instance"""
-    from database.db_manager import DatabaseManager
-    return DatabaseManager()
+async def get_db():
+    """
+    Request-scoped DatabaseManager for routes that write. The route calls
+    db.commit() itself before rendering, so a failed commit is shown to the
+    user: this dependency's teardown runs after the response has been sent.
+    Anything left uncommitted (a route that failed part-way) is rolled back.
+    """
+    from database.db_manager import db_session
+    with db_session(commit=False) as db:
+        yield db
+
+async def get_read_db():
+    """
+    Request-scoped DatabaseManager on the read-only pool, for routes that
+    persist nothing (agent-memory steps like submit-update or add-feedback,
+    resets). Writes through it raise instead of being dropped.
+    """
+    from database.db_manager import db_session
+    with db_session(read_only=True) as db:
+        yield db
 
 def get_standup_agent():
     global standup_agent_instance
@@ -67,12 +85,22 @@ def get_retro_agent():
         print(f"[App] Created new RetrospectiveAgent instance")
     return retro_agent_instance
 
+def retro_feedback_board():
+    """Clustered feedback of the running retrospective (empty before it starts)"""
+    if retro_agent_instance is None or not session_data["retro_started"]:
+        return {}
+    return retro_agent_instance.feedback_board()
+
+# Routes that call the LLM (generate-summary, submit-estimate, generate-plan,
+# generate-retro-summary) are plain def: FastAPI runs them in its threadpool,
+# so a slow model call never blocks the event loop and identical concurrent
+# calls can join one another in LLM_FLIGHT
+
 # ========== HOME / STANDUP ==========
 @app.get("/", response_class=HTMLResponse)
-async def home(request: Request):
+async def home(request: Request, db=Depends(get_read_db)):
     team_members = []
     try:
-        db = get_db()
         team_members = db.get_team_members()
         print(f"[Home] Loaded {len(team_members)} team members")
     except Exception as e:
@@ -86,19 +114,18 @@ async def home(request: Request):
     })
 
 @app.post("/start-standup", response_class=HTMLResponse)
-async def start_standup(request: Request):
+async def start_standup(request: Request, db=Depends(get_read_db)):
     print("\n[Start Standup] ===== START STANDUP CALLED =====")
     team_members = []
     try:
         standup_agent = get_standup_agent()
         print(f"[Start Standup] Agent instance: {standup_agent}")
-        message = standup_agent.start_standup(SESSION_ID)
+        message = standup_agent.start_standup(SESSION_ID, db=db)
         session_data["standup_started"] = True
         session_data["messages"].append({"type": "system", "content": message})
         print("[Start Standup] Standup started successfully")
         print("[Start Standup] =====================================\n")
         
-        db = get_db()
         team_members = db.get_team_members()
     except Exception as e:
         error_msg = f"Error: {str(e)}"
@@ -116,7 +143,7 @@ async def start_standup(request: Request):
     })
 
 @app.post("/submit-update", response_class=HTMLResponse)
-async def submit_update(request: Request, member: str = Form(...), yesterday: str = Form(...), today: str = Form(...), blockers: str = Form("None")):
+async def submit_update(request: Request, member: str = Form(...), yesterday: str = Form(...), today: str = Form(...), blockers: str = Form("None"), db=Depends(get_read_db)):
     team_members = []
     try:
         standup_agent = get_standup_agent()
@@ -124,7 +151,6 @@ async def submit_update(request: Request, member: str = Form(...), yesterday: st
         response = standup_agent.collect_update(member, yesterday, today, blockers)
         session_data["messages"].append({"type": "agent", "content": response})
         
-        db = get_db()
         team_members = db.get_team_members()
     except Exception as e:
         session_data["messages"].append({"type": "agent", "content": f"Error: {str(e)}"})
@@ -137,7 +163,7 @@ async def submit_update(request: Request, member: str = Form(...), yesterday: st
     })
 
 @app.post("/generate-summary", response_class=HTMLResponse)
-async def generate_summary(request: Request):
+def generate_summary(request: Request, db=Depends(get_db)):
     print("\n[Generate Summary] ===== GENERATE SUMMARY CALLED =====")
     team_members = []
     
@@ -147,7 +173,7 @@ async def generate_summary(request: Request):
         print(f"[Generate Summary] Agent ID: {id(standup_agent)}")
         print(f"[Generate Summary] Before generation - is_completed: {standup_agent.is_completed()}")
         
-        summary_data = standup_agent.generate_summary()
+        summary_data = standup_agent.generate_summary(db=db)
         
         print(f"[Generate Summary] After generation - is_completed: {standup_agent.is_completed()}")
         print(f"[Generate Summary] Summary data keys: {summary_data.keys()}")
@@ -161,9 +187,9 @@ async def generate_summary(request: Request):
         
         print("[Generate Summary] =====================================\n")
         
-        db = get_db()
         team_members = db.get_team_members()
         
+        db.commit()
     except Exception as e:
         error_msg = f"Error: {str(e)}"
         session_data["messages"].append({"type": "summary", "content": error_msg})
@@ -181,13 +207,11 @@ async def generate_summary(request: Request):
 
 # ========== PLANNING ROUTES ==========
 @app.get("/planning", response_class=HTMLResponse)
-async def planning_page(request: Request):
+async def planning_page(request: Request, db=Depends(get_read_db)):
     sprint = None
     stories = []
     try:
         # Always get fresh data from database to show updated story points
-        from database.db_manager import DatabaseManager
-        db = DatabaseManager()
         sprint = db.get_sprint(SESSION_ID)
         if sprint:
             stories = db.get_sprint_stories(sprint.id)
@@ -209,18 +233,16 @@ async def planning_page(request: Request):
     })
 
 @app.post("/start-planning", response_class=HTMLResponse)
-async def start_planning(request: Request):
+async def start_planning(request: Request, db=Depends(get_read_db)):
     sprint = None
     stories = []
     try:
         planning_agent = get_planning_agent()
-        message = planning_agent.start_planning(SESSION_ID)
+        message = planning_agent.start_planning(SESSION_ID, db=db)
         session_data["planning_started"] = True
         session_data["planning_messages"].append({"type": "system", "content": message})
         
         # Get fresh data
-        from database.db_manager import DatabaseManager
-        db = DatabaseManager()
         sprint = db.get_sprint(SESSION_ID)
         if sprint:
             stories = db.get_sprint_stories(sprint.id)
@@ -236,7 +258,11 @@ async def start_planning(request: Request):
     })
 
 @app.post("/submit-estimate", response_class=HTMLResponse)
-async def submit_estimate(request: Request, story_id: str = Form(...), team_estimate: int = Form(...), team_reasoning: str = Form(...)):
+def submit_estimate(request: Request, story_id: str = Form(...), team_estimate: int = Form(...), team_reasoning: str = Form(...), mode: str = Form(""), db=Depends(get_db)):
+    from agents.planning_agent import ESTIMATION_MODES
+    if mode and mode not in ESTIMATION_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown estimation mode '{mode}'. Use one of: {', '.join(ESTIMATION_MODES)}")
+    
     sprint = None
     stories = []
     try:
@@ -245,28 +271,32 @@ async def submit_estimate(request: Request, story_id: str = Form(...), team_esti
         # Use default value for estimated_by since we removed the field from the form
         estimated_by = "Planning Team"
         
-        comparison = planning_agent.estimate_story_with_comparison(story_id, team_estimate, team_reasoning, estimated_by)
-        
-        session_data[f"estimate_{story_id}"] = {
-            "team_estimate": team_estimate,
-            "agent_estimate": comparison.get("agent_estimate", team_estimate),
-            "story_id": story_id
-        }
+        comparison = planning_agent.estimate_story_with_comparison(story_id, team_estimate, team_reasoning, estimated_by, db=db, mode=mode or None)
         
-        session_data["planning_messages"].append({
-            "type": "comparison", 
-            "content": comparison["comparison"],
-            "story_id": story_id,
-            "team_estimate": team_estimate,
-            "agent_estimate": comparison.get("agent_estimate", team_estimate)
-        })
+        if "error" in comparison:
+            session_data["planning_messages"].append({"type": "comparison", "content": f"[ERROR] {comparison['error']}"})
+        else:
+            session_data[f"estimate_{story_id}"] = {
+                "team_estimate": team_estimate,
+                "agent_estimate": comparison.get("agent_estimate", team_estimate),
+                "story_id": story_id
+            }
+            
+            session_data["planning_messages"].append({
+                "type": "comparison", 
+                "content": comparison["comparison"],
+                "story_id": story_id,
+                "team_estimate": team_estimate,
+                "agent_estimate": comparison.get("agent_estimate", team_estimate),
+                "pending": comparison.get("pending", False)
+            })
         
         # Get fresh data
-        from database.db_manager import DatabaseManager
-        db = DatabaseManager()
         sprint = db.get_sprint(SESSION_ID)
         if sprint:
             stories = db.get_sprint_stories(sprint.id)
+        
+        db.commit()
     except Exception as e:
         print(f"[Planning] Error in submit-estimate: {e}")
         import traceback
@@ -282,7 +312,7 @@ async def submit_estimate(request: Request, story_id: str = Form(...), team_esti
     })
 
 @app.post("/finalize-estimate", response_class=HTMLResponse)
-async def finalize_estimate(request: Request, story_id: str = Form(...), accept_ai: str = Form(...)):
+async def finalize_estimate(request: Request, story_id: str = Form(...), accept_ai: str = Form(...), db=Depends(get_db)):
     sprint = None
     stories = []
     try:
@@ -297,7 +327,7 @@ async def finalize_estimate(request: Request, story_id: str = Form(...), accept_
         
         planning_agent = get_planning_agent()
         try:
-            result = planning_agent.finalize_story_estimate(story_id, accept)
+            result = planning_agent.finalize_story_estimate(story_id, accept, db=db)
         except Exception as plan_error:
             print(f"[Planning] Finalize error: {plan_error}")
             import traceback
@@ -311,16 +341,16 @@ async def finalize_estimate(request: Request, story_id: str = Form(...), accept_
         session_data.pop(estimate_key, None)
         
         # Fetch FRESH data from database to show updated story points
-        from database.db_manager import DatabaseManager
-        db = DatabaseManager()
         sprint = db.get_sprint(SESSION_ID)
         if sprint:
             stories = db.get_sprint_stories(sprint.id)
             
             # Log the updated story for debugging
-            updated_story = next((s for s in stories if s.story_id == story_id), None)
+            updated_story = db.get_story(sprint.id, story_id)
             if updated_story:
                 print(f"[Planning] Story {story_id} finalized: {updated_story.story_points} pts, approved={updated_story.story_points_approved}")
+        
+        db.commit()
     except Exception as e:
         print(f"[Planning] Error in finalize-estimate: {e}")
         import traceback
@@ -335,13 +365,76 @@ async def finalize_estimate(request: Request, story_id: str = Form(...), accept_
         "planning_started": session_data["planning_started"]
     })
 
+@app.post("/optimize-scope", response_class=HTMLResponse)
+async def optimize_scope(request: Request, capacity: str = Form(""), db=Depends(get_read_db)):
+    from database.scope_optimizer import format_scope
+    sprint = None
+    stories = []
+    try:
+        sprint = db.get_sprint(SESSION_ID)
+        if sprint:
+            result = db.optimize_sprint_scope(sprint, int(capacity) if capacity.strip() else None)
+            graph = db.get_dependency_graph(sprint.id)
+            session_data["planning_messages"].append({"type": "scope", "content": format_scope(result, graph)})
+            print(f"[Planning] Scope: {result['selected_points']}/{result['capacity']} points, "
+                  f"{len(result['selected'])} stories (exact: {result['exact']})")
+            stories = db.get_sprint_stories(sprint.id)
+        else:
+            session_data["planning_messages"].append({"type": "scope", "content": "[ERROR] No active sprint found"})
+    except Exception as e:
+        print(f"[Planning] Error in optimize-scope: {e}")
+        import traceback
+        traceback.print_exc()
+        session_data["planning_messages"].append({"type": "scope", "content": f"Error: {str(e)}"})
+    
+    return templates.TemplateResponse("planning.html", {
+        "request": request, 
+        "sprint": sprint, 
+        "stories": stories, 
+        "messages": session_data["planning_messages"], 
+        "planning_started": session_data["planning_started"]
+    })
+
+@app.post("/assign-stories", response_class=HTMLResponse)
+async def assign_stories(request: Request, reassign: str = Form(""), db=Depends(get_db)):
+    from database.assignment import format_assignments
+    sprint = None
+    stories = []
+    try:
+        sprint = db.get_sprint(SESSION_ID)
+        if sprint:
+            plan = db.assign_sprint_stories(sprint.id, reassign=reassign == "yes")
+            if plan is None:
+                content = "[ERROR] Could not save story assignments. No changes were made."
+            else:
+                content = format_assignments(plan)
+            session_data["planning_messages"].append({"type": "assignment", "content": content})
+            stories = db.get_sprint_stories(sprint.id)
+        else:
+            session_data["planning_messages"].append({"type": "assignment", "content": "[ERROR] No active sprint found"})
+        
+        db.commit()
+    except Exception as e:
+        print(f"[Planning] Error in assign-stories: {e}")
+        import traceback
+        traceback.print_exc()
+        session_data["planning_messages"].append({"type": "assignment", "content": f"Error: {str(e)}"})
+    
+    return templates.TemplateResponse("planning.html", {
+        "request": request, 
+        "sprint": sprint, 
+        "stories": stories, 
+        "messages": session_data["planning_messages"], 
+        "planning_started": session_data["planning_started"]
+    })
+
 @app.post("/generate-plan", response_class=HTMLResponse)
-async def generate_plan(request: Request):
+def generate_plan(request: Request, db=Depends(get_db)):
     sprint = None
     stories = []
     try:
         planning_agent = get_planning_agent()
-        plan_data = planning_agent.generate_sprint_plan()
+        plan_data = planning_agent.generate_sprint_plan(db=db)
         
         if "error" in plan_data:
             session_data["planning_messages"].append({"type": "plan", "content": f"[ERROR] {plan_data['error']}"})
@@ -349,11 +442,11 @@ async def generate_plan(request: Request):
             session_data["planning_messages"].append({"type": "plan", "content": plan_data["plan_text"]})
         
         # Get fresh data
-        from database.db_manager import DatabaseManager
-        db = DatabaseManager()
         sprint = db.get_sprint(SESSION_ID)
         if sprint:
             stories = db.get_sprint_stories(sprint.id)
+        
+        db.commit()
     except Exception as e:
         print(f"[Planning] Error in generate-plan: {e}")
         import traceback
@@ -369,7 +462,7 @@ async def generate_plan(request: Request):
     })
 
 @app.post("/approve-plan", response_class=HTMLResponse)
-async def approve_plan(request: Request, scrum_master: str = Form(...), comments: str = Form("")):
+async def approve_plan(request: Request, scrum_master: str = Form(...), comments: str = Form(""), db=Depends(get_db)):
     sprint = None
     stories = []
     try:
@@ -387,16 +480,16 @@ async def approve_plan(request: Request, scrum_master: str = Form(...), comments
             })
         else:
             planning_agent = get_planning_agent()
-            approval = planning_agent.approve_plan(scrum_master, comments)
+            approval = planning_agent.approve_plan(scrum_master, comments, db=db)
             session_data["planning_messages"].append({"type": "approved", "content": approval})
         
         # Get fresh data (including updated sprint status)
-        from database.db_manager import DatabaseManager
-        db = DatabaseManager()
         sprint = db.get_sprint(SESSION_ID)
         if sprint:
             print(f"[Planning] After approval, sprint status: {sprint.status}")
             stories = db.get_sprint_stories(sprint.id)
+        
+        db.commit()
     except Exception as e:
         print(f"[Planning] Error in approve-plan: {e}")
         import traceback
@@ -413,11 +506,10 @@ async def approve_plan(request: Request, scrum_master: str = Form(...), comments
 
 # ========== RETROSPECTIVE ROUTES ==========
 @app.get("/retrospective", response_class=HTMLResponse)
-async def retrospective_page(request: Request):
+async def retrospective_page(request: Request, db=Depends(get_read_db)):
     completed_sprints = []
     try:
-        db = get_db()
-        sprints = db.get_all_sprints(CURRENT_TEAM)
+        sprints = db.get_all_sprints(CURRENT_TEAM, include_archived=True)
         completed_sprints = [s for s in sprints if s.status == "completed"]
     except Exception as e:
         print(f"[Retrospective] Error: {e}")
@@ -426,20 +518,20 @@ async def retrospective_page(request: Request):
         "request": request, 
         "sprints": completed_sprints, 
         "messages": session_data["retro_messages"], 
-        "retro_started": session_data["retro_started"]
+        "retro_started": session_data["retro_started"],
+        "feedback_board": retro_feedback_board()
     })
 
 @app.post("/start-retrospective", response_class=HTMLResponse)
-async def start_retrospective(request: Request, sprint_number: int = Form(...), facilitator: str = Form(...)):
+async def start_retrospective(request: Request, sprint_number: int = Form(...), facilitator: str = Form(...), db=Depends(get_read_db)):
     completed_sprints = []
     try:
         retro_agent = get_retro_agent()
         session_id = f"AlphaTeam_Sprint_{sprint_number}"
-        message = retro_agent.start_retrospective(session_id, facilitator)
+        message = retro_agent.start_retrospective(session_id, facilitator, db=db)
         session_data["retro_started"] = True
         session_data["retro_messages"].append({"type": "system", "content": message})
-        db = get_db()
-        sprints = db.get_all_sprints(CURRENT_TEAM)
+        sprints = db.get_all_sprints(CURRENT_TEAM, include_archived=True)
         completed_sprints = [s for s in sprints if s.status == "completed"]
     except Exception as e:
         session_data["retro_messages"].append({"type": "system", "content": f"Error: {str(e)}"})
@@ -448,18 +540,18 @@ async def start_retrospective(request: Request, sprint_number: int = Form(...),
         "request": request,
         "sprints": completed_sprints,
         "messages": session_data["retro_messages"],
-        "retro_started": session_data["retro_started"]
+        "retro_started": session_data["retro_started"],
+        "feedback_board": retro_feedback_board()
     })
 
 @app.post("/add-feedback", response_class=HTMLResponse)
-async def add_feedback(request: Request, category: str = Form(...), feedback: str = Form(...), submitted_by: str = Form(...)):
+async def add_feedback(request: Request, category: str = Form(...), feedback: str = Form(...), submitted_by: str = Form(...), db=Depends(get_read_db)):
     completed_sprints = []
     try:
         retro_agent = get_retro_agent()
         result = retro_agent.add_feedback(category, feedback, submitted_by)
         session_data["retro_messages"].append({"type": "feedback", "content": result})
-        db = get_db()
-        sprints = db.get_all_sprints(CURRENT_TEAM)
+        sprints = db.get_all_sprints(CURRENT_TEAM, include_archived=True)
         completed_sprints = [s for s in sprints if s.status == "completed"]
     except Exception as e:
         session_data["retro_messages"].append({"type": "feedback", "content": f"Error: {str(e)}"})
@@ -468,19 +560,19 @@ async def add_feedback(request: Request, category: str = Form(...), feedback: st
         "request": request,
         "sprints": completed_sprints,
         "messages": session_data["retro_messages"],
-        "retro_started": session_data["retro_started"]
+        "retro_started": session_data["retro_started"],
+        "feedback_board": retro_feedback_board()
     })
 
 @app.post("/set-team-sentiment", response_class=HTMLResponse)
-async def set_team_sentiment(request: Request, team_sentiment: int = Form(...)):
+async def set_team_sentiment(request: Request, team_sentiment: int = Form(...), db=Depends(get_read_db)):
     """Set team sentiment before creating action items"""
     completed_sprints = []
     try:
         retro_agent = get_retro_agent()
         result = retro_agent.set_team_sentiment(team_sentiment)
         session_data["retro_messages"].append({"type": "sentiment", "content": result})
-        db = get_db()
-        sprints = db.get_all_sprints(CURRENT_TEAM)
+        sprints = db.get_all_sprints(CURRENT_TEAM, include_archived=True)
         completed_sprints = [s for s in sprints if s.status == "completed"]
     except Exception as e:
         session_data["retro_messages"].append({"type": "sentiment", "content": f"Error: {str(e)}"})
@@ -489,11 +581,12 @@ async def set_team_sentiment(request: Request, team_sentiment: int = Form(...)):
         "request": request,
         "sprints": completed_sprints,
         "messages": session_data["retro_messages"],
-        "retro_started": session_data["retro_started"]
+        "retro_started": session_data["retro_started"],
+        "feedback_board": retro_feedback_board()
     })
 
 @app.post("/create-action-items", response_class=HTMLResponse)
-async def create_action_items(request: Request):
+async def create_action_items(request: Request, db=Depends(get_read_db)):
     """Create action items draft (stored in agent memory, not DB yet)"""
     completed_sprints = []
     try:
@@ -546,8 +639,7 @@ async def create_action_items(request: Request):
             session_data["retro_messages"].append({"type": "actions", "content": result})
             print(f"[Retrospective] Drafted {len(items)} action items (not yet stored in DB)")
         
-        db = get_db()
-        sprints = db.get_all_sprints(CURRENT_TEAM)
+        sprints = db.get_all_sprints(CURRENT_TEAM, include_archived=True)
         completed_sprints = [s for s in sprints if s.status == "completed"]
     except Exception as e:
         print(f"[Retrospective] Error in create-action-items: {e}")
@@ -559,17 +651,18 @@ async def create_action_items(request: Request):
         "request": request,
         "sprints": completed_sprints,
         "messages": session_data["retro_messages"],
-        "retro_started": session_data["retro_started"]
+        "retro_started": session_data["retro_started"],
+        "feedback_board": retro_feedback_board()
     })
 
 @app.post("/generate-retro-summary", response_class=HTMLResponse)
-async def generate_retro_summary(request: Request):
+def generate_retro_summary(request: Request, db=Depends(get_db)):
     """Generate summary (this now also stores retrospective and action items in DB)"""
     completed_sprints = []
     try:
         retro_agent = get_retro_agent()
         # Summary generation now stores everything in DB
-        summary_data = retro_agent.generate_summary()
+        summary_data = retro_agent.generate_summary(db=db)
         
         if "error" in summary_data:
             session_data["retro_messages"].append({"type": "summary", "content": f"[ERROR] {summary_data['error']}"})
@@ -582,9 +675,10 @@ async def generate_retro_summary(request: Request):
             
             session_data["retro_messages"].append({"type": "summary", "content": summary_message})
         
-        db = get_db()
-        sprints = db.get_all_sprints(CURRENT_TEAM)
+        sprints = db.get_all_sprints(CURRENT_TEAM, include_archived=True)
         completed_sprints = [s for s in sprints if s.status == "completed"]
+        
+        db.commit()
     except Exception as e:
         print(f"[Retrospective] Error in generate-retro-summary: {e}")
         import traceback
@@ -595,26 +689,27 @@ async def generate_retro_summary(request: Request):
         "request": request,
         "sprints": completed_sprints,
         "messages": session_data["retro_messages"],
-        "retro_started": session_data["retro_started"]
+        "retro_started": session_data["retro_started"],
+        "feedback_board": retro_feedback_board()
     })
 
 # ========== REPORTS ==========
 @app.get("/reports", response_class=HTMLResponse)
-async def reports(request: Request, sprint_num: int = None):
+async def reports(request: Request, sprint_num: int = None, db=Depends(get_read_db)):
     sprints = []
     selected_sprint = None
     stories = []
     sprint_plan = None
-    burndown_data = []
     retrospective = None
     action_items = []
+    forecast = None
+    risk_summary = None
+    blockers = []
     
     try:
-        from database.db_manager import DatabaseManager
-        db = DatabaseManager()
         
         # Get all sprints
-        sprints = db.get_all_sprints(CURRENT_TEAM)
+        sprints = db.get_all_sprints(CURRENT_TEAM, include_archived=True)
         
         # Select sprint to display
         if sprint_num is None:
@@ -637,9 +732,14 @@ async def reports(request: Request, sprint_num: int = None):
             if sprint_plan:
                 print(f"[Reports] Sprint plan found")
             
-            # Load burndown data
-            burndown_data = db.get_burndown_data(selected_sprint.id)
-            print(f"[Reports] Loaded {len(burndown_data)} burndown data points")
+            # Forecast completion from past velocity (planning/active sprints only)
+            forecast = db.get_sprint_forecast(selected_sprint)
+            
+            # Risk heatmap, severity counts and issue aging (grouped in SQL)
+            risk_summary = db.get_risk_issue_summary(selected_sprint.id)
+            
+            # Blockers still open across the team's standups, oldest first
+            blockers = db.get_open_blockers(selected_sprint.team_name)
             
             # Load retrospective data
             retrospective = db.get_retrospective(selected_sprint.id)
@@ -658,15 +758,131 @@ async def reports(request: Request, sprint_num: int = None):
         "sprint": selected_sprint,
         "stories": stories,
         "sprint_plan": sprint_plan,
-        "burndown_data": burndown_data, 
         "sprints": sprints, 
         "retrospective": retrospective, 
-        "action_items": action_items
+        "action_items": action_items,
+        "forecast": forecast,
+        "risk_summary": risk_summary,
+        "blockers": blockers
+    })
+
+# ========== ANALYTICS ==========
+@app.get("/api/sprints/{sprint_id}/charts")
+async def sprint_charts(sprint_id: int, request: Request, db=Depends(get_read_db)):
+    """Burndown and velocity series for the reports charts, revalidated by ETag"""
+    sprint = db.get_sprint_by_id(sprint_id)
+    if not sprint:
+        raise HTTPException(status_code=404, detail=f"Sprint {sprint_id} not found")
+
+    body = json.dumps(db.get_sprint_charts(sprint), separators=(",", ":")).encode()
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+@app.get("/api/sprints/{sprint_id}/stories/{story_id}/similar")
+async def similar_stories(sprint_id: int, story_id: str, k: int = 3, db=Depends(get_read_db)):
+    """Finished stories from earlier sprints most like this one, with their final points"""
+    story = db.get_story(sprint_id, story_id)
+    if not story:
+        raise HTTPException(status_code=404, detail=f"Story {story_id} not found")
+    return {"story_id": story_id, "similar": db.find_similar_stories(story, k=min(max(k, 1), 10))}
+
+@app.get("/api/planning/estimates/{story_id}")
+async def pending_estimate(story_id: str):
+    """
+    Status of an estimate answered locally first: "pending" while the AI is
+    still working, then "done" with the AI's estimate and comparison text
+    """
+    status = get_planning_agent().estimate_status(story_id)
+    if status["status"] == "done":
+        # Swap the AI answer into the planning transcript and the finalize data
+        for message in session_data["planning_messages"]:
+            if message.get("story_id") == story_id and message.get("pending"):
+                message.update(content=status["comparison"], agent_estimate=status["agent_estimate"], pending=False)
+        estimate = session_data.get(f"estimate_{story_id}")
+        if estimate:
+            estimate["agent_estimate"] = status["agent_estimate"]
+    return {"story_id": story_id, **status}
+
+@app.get("/api/llm/metrics")
+async def llm_metrics():
+    """
+    LLM calls requested, actually made and deduplicated by joining an
+    identical in-flight call, plus the provider's own counters (cassette
+    hits and misses when replaying)
+    """
+    from agents.base_agent import LLM_FLIGHT
+    from utils.llm_provider import get_provider
+    return {**LLM_FLIGHT.metrics(), **get_provider().metrics()}
+
+@app.get("/api/estimation-analytics")
+async def estimation_analytics(team: str = CURRENT_TEAM, db=Depends(get_read_db)):
+    """AI vs team estimate error by team and story type, acceptance rate and weekly drift"""
+    return db.get_estimation_analytics(team or None)
+
+# ========== SEARCH ==========
+@app.get("/search", response_class=HTMLResponse)
+async def search(request: Request, q: str = "", kind: str = "", db=Depends(get_read_db)):
+    from database.search import FTS_INDEXES
+    results = []
+
+    try:
+        if q.strip():
+            results = db.search(q, kinds=[kind] if kind else None, limit=50)
+
+            # Label hits with the sprint number instead of the internal sprint id
+            sprint_numbers = {s.id: s.sprint_number for s in db.get_all_sprints(CURRENT_TEAM, include_archived=True)}
+            for hit in results:
+                hit["sprint_number"] = sprint_numbers.get(hit["sprint_id"])
+            print(f"[Search] '{q}' returned {len(results)} results")
+    except Exception as e:
+        print(f"[Search] Error: {e}")
+        import traceback
+        traceback.print_exc()
+
+    return templates.TemplateResponse("search.html", {
+        "request": request,
+        "query": q,
+        "kind": kind,
+        "kinds": list(FTS_INDEXES.keys()),
+        "results": results
+    })
+
+# ========== EXPORT ==========
+@app.get("/export/{entity}")
+async def export_data(entity: str, format: str = "csv", gzip: bool = False, team: str = CURRENT_TEAM):
+    """
+    Stream a team's sprints, stories, standups, burndown, retrospectives or
+    action items as CSV or JSON Lines, optionally gzip-compressed.
+    """
+    from database.export import EXPORT_ENTITIES, EXPORT_FORMATS, iter_export
+
+    if entity not in EXPORT_ENTITIES:
+        raise HTTPException(status_code=404, detail=f"Unknown export '{entity}'. Use one of: {', '.join(EXPORT_ENTITIES)}")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format '{format}'. Use one of: {', '.join(EXPORT_FORMATS)}")
+
+    def generate():
+        # Plain generator: Starlette iterates it in the threadpool, so the
+        # database cursor never blocks the event loop. It outlives the request,
+        # so it opens its own read-only scope instead of taking one by Depends
+        from database.db_manager import db_session
+        with db_session(read_only=True) as db:
+            header, rows = db.export_rows(entity, team)
+            yield from iter_export(header, rows, format, compress=gzip)
+            print(f"[Export] Streamed {entity} for {team} as {format}{' (gzip)' if gzip else ''}")
+
+    filename = f"{team.replace(' ', '')}_{entity}.{format}{'.gz' if gzip else ''}"
+    media_type = "application/gzip" if gzip else ("text/csv" if format == "csv" else "application/x-ndjson")
+    return StreamingResponse(generate(), media_type=media_type, headers={
+        "Content-Disposition": f'attachment; filename="{filename}"'
     })
 
 # ========== RESET ROUTES ==========
 @app.post("/reset-standup", response_class=HTMLResponse)
-async def reset_standup(request: Request):
+async def reset_standup(request: Request, db=Depends(get_read_db)):
     """Reset standup session only - protected if summary generated"""
     print("\n[Reset Route] ===== RESET STANDUP CALLED =====")
     team_members = []
@@ -684,7 +900,6 @@ async def reset_standup(request: Request):
         print(f"[Reset Route] Agent is_completed() returned: {is_complete}")
         
         # Load team members for template
-        db = get_db()
         team_members = db.get_team_members()
         
         if is_complete:
@@ -730,7 +945,7 @@ async def reset_standup(request: Request):
     })
 
 @app.post("/reset-planning", response_class=HTMLResponse)
-async def reset_planning(request: Request):
+async def reset_planning(request: Request, db=Depends(get_db)):
     """Reset planning session only - protected if plan approved"""
     print("\n[Reset Route] ===== RESET PLANNING CALLED =====")
     sprint = None
@@ -753,8 +968,6 @@ async def reset_planning(request: Request):
             print("[Reset Route] RESET BLOCKED - planning session is completed")
             
             # Get fresh data
-            from database.db_manager import DatabaseManager
-            db = DatabaseManager()
             sprint = db.get_sprint(SESSION_ID)
             if sprint:
                 stories = db.get_sprint_stories(sprint.id)
@@ -770,6 +983,12 @@ async def reset_planning(request: Request):
         
         # Allowed to reset
         print("[Reset Route] RESET ALLOWED - proceeding with reset")
+        
+        # Clear all story estimates from database first: if that fails the session is left intact
+        cleared = db.clear_sprint_story_estimates(SESSION_ID)
+        db.commit()
+        print(f"[Reset Route] Cleared {cleared} story estimates from database")
+        
         session_data["planning_started"] = False
         session_data["planning_messages"] = []
         
@@ -780,12 +999,6 @@ async def reset_planning(request: Request):
                 session_data.pop(key, None)
         print("[Reset Route] Cleared estimate data from session")
         
-        # Clear all story estimates from database
-        from database.db_manager import DatabaseManager
-        db = DatabaseManager()
-        db.clear_sprint_story_estimates(SESSION_ID)
-        print("[Reset Route] Cleared all story estimates from database")
-        
         # Reset agent instance
         global planning_agent_instance
         planning_agent_instance = None
@@ -803,17 +1016,19 @@ async def reset_planning(request: Request):
         import traceback
         traceback.print_exc()
         print("[Reset Route] =====================================\n")
+        session_data["planning_messages"].append({"type": "system", "content": f"Error: {str(e)}"})
     
+    # Empty after a successful reset; shows the error if the reset failed
     return templates.TemplateResponse("planning.html", {
         "request": request,
         "sprint": sprint,
         "stories": stories,
-        "messages": [],
-        "planning_started": False
+        "messages": session_data["planning_messages"],
+        "planning_started": session_data["planning_started"]
     })
 
 @app.post("/reset-retrospective", response_class=HTMLResponse)
-async def reset_retrospective(request: Request):
+async def reset_retrospective(request: Request, db=Depends(get_read_db)):
     """Reset retrospective session only - protected if summary generated"""
     print("\n[Reset Route] ===== RESET RETROSPECTIVE CALLED =====")
     completed_sprints = []
@@ -834,8 +1049,7 @@ async def reset_retrospective(request: Request):
             })
             print("[Reset Route] RESET BLOCKED - retro session is completed")
             
-            db = get_db()
-            sprints = db.get_all_sprints(CURRENT_TEAM)
+            sprints = db.get_all_sprints(CURRENT_TEAM, include_archived=True)
             completed_sprints = [s for s in sprints if s.status == "completed"]
             
             print("[Reset Route] =====================================\n")
@@ -843,7 +1057,8 @@ async def reset_retrospective(request: Request):
                 "request": request,
                 "sprints": completed_sprints,
                 "messages": session_data["retro_messages"],
-                "retro_started": session_data["retro_started"]
+                "retro_started": session_data["retro_started"],
+                "feedback_board": retro_feedback_board()
             })
         
         # Allowed to reset
@@ -855,8 +1070,7 @@ async def reset_retrospective(request: Request):
         retro_agent_instance = None
         print("[Reset Route] Retro agent instance cleared")
         
-        db = get_db()
-        sprints = db.get_all_sprints(CURRENT_TEAM)
+        sprints = db.get_all_sprints(CURRENT_TEAM, include_archived=True)
         completed_sprints = [s for s in sprints if s.status == "completed"]
         
         print("[Reset Route] Retrospective session reset successfully")
@@ -4,11 +4,15 @@ Update database with new models for retrospectives
 
 import os
 
-# Delete old database
-db_path = 'database/agile_assistant.db'
-if os.path.exists(db_path):
-    os.remove(db_path)
-    print(f"✅ Deleted old database")
+from database.db_manager import ARCHIVE_DB_PATH
+
+# Delete old databases (hot and archive) with their WAL / shared-memory files,
+# so stale archived rows or uncheckpointed pages can't leak into the new ones
+for db_path in ('database/agile_assistant.db', ARCHIVE_DB_PATH):
+    for path in (db_path, f"{db_path}-wal", f"{db_path}-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+            print(f"✅ Deleted {path}")
 
 # Initialize new database with updated models
 from database.models import init_database
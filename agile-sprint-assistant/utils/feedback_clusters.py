@@ -0,0 +1,118 @@
+"""
+Feedback Clusters - Group near-duplicate retrospective feedback as it arrives
+Each item gets a MinHash signature of the character shingles of its words;
+locality-sensitive hashing over bands of the signature finds the few earlier
+items it could be a near-duplicate of, so adding an item costs the same however many
+items are already on the board. Items whose estimated Jaccard similarity with
+an earlier item reaches SIMILARITY_THRESHOLD join that item's cluster as a vote.
+"""
+import re
+import zlib
+
+import numpy as np
+
+from database.search import STOPWORDS
+
+# 32 bands of 3 rows: a pair with similarity s shares a band with probability
+# 1 - (1 - s^3)^32, so the S-curve sits near 0.3 and pairs at the 0.5
+# threshold become candidates ~98.6% of the time (99.96% at 0.6), while
+# pairs around 0.1 only ~3% of the time
+NUM_PERM = 96
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SIMILARITY_THRESHOLD = 0.5
+
+SHINGLE_SIZE = 3
+
+# Intensifiers that say nothing about the topic of an item
+FILLER_WORDS = {"very", "really", "way", "lot", "much", "quite", "bit", "pretty", "again", "still"}
+
+# Universal hashing (a * x + b) mod a Mersenne prime; 31-bit inputs keep it inside uint64
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240607)
+_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def shingles(text: str):
+    """
+    Character shingles of each content word (padded with spaces), so word
+    order, stopwords and small inflections matter little
+    """
+    words = {w for w in _WORD.findall((text or "").lower()) if w not in STOPWORDS and w not in FILLER_WORDS}
+    if not words:
+        return {(text or "").strip().lower()}
+    grams = set()
+    for word in words:
+        padded = f" {word} "
+        grams.update(padded[i:i + SHINGLE_SIZE] for i in range(len(padded) - SHINGLE_SIZE + 1))
+    return grams
+
+
+def minhash(text: str):
+    """MinHash signature (NUM_PERM values) of the text's shingles"""
+    hashed = np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) & _PRIME for s in shingles(text)), dtype=np.uint64
+    )
+    return ((hashed[:, None] * _A + _B) % _PRIME).min(axis=0)
+
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.mean(signature == other))
+
+
+class FeedbackClusters:
+    """Incrementally clustered feedback of one retrospective category"""
+
+    def __init__(self):
+        self.clusters = []      # {"text", "votes", "submitted_by", "variants"}
+        self._signatures = []   # one per item, with the cluster it joined
+        self._buckets = {}      # (band, band hash) -> item positions
+
+    def add(self, text: str, submitted_by: str):
+        """Add an item; returns its cluster and whether it started a new one"""
+        signature = minhash(text)
+        keys = [(band, signature[band * ROWS:(band + 1) * ROWS].tobytes()) for band in range(BANDS)]
+
+        candidates = {item for key in keys for item in self._buckets.get(key, ())}
+        best, best_score = None, SIMILARITY_THRESHOLD
+        for item in candidates:
+            other, cluster_index = self._signatures[item]
+            score = similarity(signature, other)
+            if score >= best_score:
+                best, best_score = cluster_index, score
+
+        if best is None:
+            best = len(self.clusters)
+            self.clusters.append({"text": text, "votes": 0, "submitted_by": [], "variants": []})
+        cluster = self.clusters[best]
+        cluster["votes"] += 1
+        if submitted_by not in cluster["submitted_by"]:
+            cluster["submitted_by"].append(submitted_by)
+        if cluster["votes"] > 1:
+            cluster["variants"].append(text)
+
+        position = len(self._signatures)
+        self._signatures.append((signature, best))
+        for key in keys:
+            self._buckets.setdefault(key, []).append(position)
+        return cluster, cluster["votes"] == 1
+
+    def ranked(self):
+        """Clusters by votes, most first (ties keep submission order)"""
+        return sorted(self.clusters, key=lambda c: -c["votes"])
+
+    def __len__(self):
+        return len(self.clusters)
+
+
+def format_clusters(clusters: FeedbackClusters):
+    """One prompt line per cluster: the representative item and its votes"""
+    lines = []
+    for cluster in clusters.ranked():
+        votes = f"{cluster['votes']} votes" if cluster["votes"] > 1 else "1 vote"
+        lines.append(f"- {cluster['text']} ({votes}; by {', '.join(cluster['submitted_by'])})")
+    return "\n".join(lines)
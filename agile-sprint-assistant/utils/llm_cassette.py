@@ -0,0 +1,150 @@
+"""
+LLM Cassettes - Record real model traffic once, replay it offline
+RecordingProvider wraps another provider and saves every prompt/response
+pair with its latency; ReplayProvider serves them back by prompt hash with
+the recorded latency (or none), so planning, standup and retro flows can be
+re-run reproducibly without Gemini.
+
+A cassette is gzip-compressed JSON lines, one record per call:
+{"hash": sha256 of the prompt, "response": ..., "latency_ms": ...}.
+Prompts themselves are not stored. Records are appended in batches as
+separate gzip members, which gzip reads back as one stream.
+
+The hash is taken after masking what changes from day to day without
+changing the question (dates, blocker ages, the forecast simulated from
+today), so a cassette recorded yesterday still replays today. A prompt that
+is still missing raises CassetteMiss, which agents let through instead of
+answering with an error string, and is counted in the replay metrics.
+"""
+import atexit
+import gzip
+import hashlib
+import json
+import re
+import threading
+import time
+
+from utils.llm_provider import LLMProvider
+
+# Records buffered before they are appended to the cassette file
+FLUSH_EVERY = 10
+
+
+# Volatile prompt text and what it is replaced with before hashing
+VOLATILE_PATTERNS = [
+    # The completion forecast header and its "- ..." lines (format_forecast)
+    (re.compile(r"Completion forecast \(.*?(?=\n(?!- )|\Z)", re.S), "Completion forecast <forecast>"),
+    (re.compile(r"\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?"), "<date>"),
+    # Blocker ages (format_blockers)
+    (re.compile(r"\b(?:new today|\d+ days? old)\b"), "<age>"),
+    (re.compile(r" \[AGING\]"), ""),
+]
+
+
+class CassetteMiss(LookupError):
+    """The prompt was never recorded in the cassette being replayed"""
+
+
+def normalize_prompt(prompt: str):
+    """The prompt with its volatile parts masked"""
+    for pattern, replacement in VOLATILE_PATTERNS:
+        prompt = pattern.sub(replacement, prompt)
+    return prompt
+
+
+def prompt_hash(prompt: str):
+    return hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+
+
+def load_cassette(path: str):
+    """{prompt hash: [(response, latency_ms)]} in recording order"""
+    tracks = {}
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                tracks.setdefault(record["hash"], []).append((record["response"], record["latency_ms"]))
+    return tracks
+
+
+class RecordingProvider(LLMProvider):
+    """Pass calls through to `inner` and append each one to the cassette at `path`"""
+
+    def __init__(self, inner: LLMProvider, path: str):
+        self.inner = inner
+        self.path = path
+        self.name = f"{inner.name} (recording to {path})"
+        self._buffer = []
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def generate(self, prompt: str) -> str:
+        start = time.perf_counter()
+        response = self.inner.generate(prompt)
+        record = {
+            "hash": prompt_hash(prompt),
+            "response": response,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+        with self._lock:
+            self._buffer.append(record)
+            if len(self._buffer) >= FLUSH_EVERY:
+                self._flush_locked()
+        return response
+
+    def flush(self):
+        """Append buffered records to the cassette"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        lines = "".join(json.dumps(record) + "\n" for record in self._buffer)
+        with gzip.open(self.path, "at", encoding="utf-8") as f:
+            f.write(lines)
+        self._buffer = []
+
+
+class ReplayProvider(LLMProvider):
+    """
+    Answer from a cassette by prompt hash. A prompt recorded several times
+    replays its responses in order, then keeps repeating the last one. An
+    unrecorded prompt raises CassetteMiss; misses are reported at exit.
+    """
+
+    def __init__(self, path: str, recorded_latency: bool = True):
+        self.path = path
+        self.recorded_latency = recorded_latency
+        self.name = f"replay of {path}"
+        self._tracks = load_cassette(path)
+        self._played = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        atexit.register(self._report_misses)
+
+    def generate(self, prompt: str) -> str:
+        key = prompt_hash(prompt)
+        with self._lock:
+            track = self._tracks.get(key)
+            if not track:
+                self.misses += 1
+                print(f"[Cassette] ❌ Prompt {key[:12]} is not in {self.path}")
+                raise CassetteMiss(f"Prompt {key[:12]} is not in cassette {self.path} - re-record it")
+            position = self._played.get(key, 0)
+            self._played[key] = position + 1
+            self.hits += 1
+        response, latency_ms = track[min(position, len(track) - 1)]
+        if self.recorded_latency:
+            time.sleep(latency_ms / 1000)
+        return response
+
+    def metrics(self):
+        with self._lock:
+            return {"cassette_hits": self.hits, "cassette_misses": self.misses}
+
+    def _report_misses(self):
+        if self.misses:
+            print(f"[Cassette] ⚠️ {self.misses} of {self.hits + self.misses} prompts were not in {self.path}; "
+                  f"the cassette is stale, re-record it")
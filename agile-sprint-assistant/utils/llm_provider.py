@@ -0,0 +1,148 @@
+"""
+LLM Provider - The model behind BaseAgent.generate_response
+GeminiProvider calls Google Gemini; FakeProvider answers offline with
+deterministic text whose latency and length follow configurable log-normal
+distributions, so the app can be load-tested and benchmarked without a
+network or an API key. LLM_PROVIDER picks one (gemini by default); every
+agent shares the instance. With LLM_CASSETTE set, calls are recorded to or
+replayed from a cassette file (see utils/llm_cassette.py).
+"""
+import hashlib
+import os
+import random
+import threading
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+# Word list the fake provider writes its answers from
+_FAKE_WORDS = (
+    "story sprint team estimate points scope risk dependency velocity backlog "
+    "review testing deploy api database design refactor blocker capacity "
+    "priority acceptance criteria integration performance security feedback "
+    "improve consider recommend split track follow clarify"
+).split()
+
+
+class LLMProvider:
+    """A text-in, text-out model; generate() raises on failure so callers can retry"""
+
+    name = "llm"
+
+    def generate(self, prompt: str) -> str:
+        raise NotImplementedError
+
+    def metrics(self):
+        """Provider-specific counters for /api/llm/metrics"""
+        return {}
+
+
+class GeminiProvider(LLMProvider):
+    def __init__(self, api_key: str = None, model: str = DEFAULT_MODEL):
+        api_key = api_key or os.getenv("GOOGLE_API_KEY")
+        if not api_key:
+            raise ValueError("GOOGLE_API_KEY not found in environment variables")
+
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+
+        self.name = model
+        self.model = genai.GenerativeModel(f"models/{model}")
+
+    def generate(self, prompt: str) -> str:
+        return self.model.generate_content(prompt).text
+
+
+class FakeProvider(LLMProvider):
+    """
+    Offline stand-in for Gemini. The same prompt always gets the same answer
+    after the same delay: latency and length are drawn from log-normal
+    distributions (median, sigma) seeded by the prompt hash and `seed`.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency_ms: float = 800, latency_sigma: float = 0.5,
+                 output_words: int = 250, output_sigma: float = 0.4, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.output_words = output_words
+        self.output_sigma = output_sigma
+        self.seed = seed
+
+    def _rng(self, prompt: str):
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        return random.Random(int.from_bytes(digest[:8], "big") ^ self.seed)
+
+    def generate(self, prompt: str) -> str:
+        rng = self._rng(prompt)
+        latency = self.latency_ms * rng.lognormvariate(0, self.latency_sigma) if self.latency_ms > 0 else 0
+        words = max(1, round(self.output_words * rng.lognormvariate(0, self.output_sigma)))
+
+        lines = []
+        # Answer in the format the planning agent parses
+        if "AI_ESTIMATE" in prompt:
+            lines.append(f"AI_ESTIMATE: {rng.choice((1, 2, 3, 5, 8, 13))}")
+        for start in range(0, words, 12):
+            lines.append(" ".join(rng.choice(_FAKE_WORDS) for _ in range(min(12, words - start))).capitalize() + ".")
+
+        time.sleep(latency / 1000)
+        return "\n".join(lines)
+
+
+def provider_from_env():
+    """A new provider as configured by LLM_PROVIDER and the LLM_* variables"""
+    cassette = os.getenv("LLM_CASSETTE")
+    cassette_mode = os.getenv("LLM_CASSETTE_MODE", "replay").lower()
+    if cassette and cassette_mode == "replay":
+        from utils.llm_cassette import ReplayProvider
+        return ReplayProvider(cassette, recorded_latency=os.getenv("LLM_REPLAY_LATENCY", "recorded") != "zero")
+
+    provider = _base_provider_from_env()
+    if cassette and cassette_mode == "record":
+        from utils.llm_cassette import RecordingProvider
+        return RecordingProvider(provider, cassette)
+    if cassette:
+        raise ValueError(f"Unknown LLM_CASSETTE_MODE '{cassette_mode}' (use record or replay)")
+    return provider
+
+
+def _base_provider_from_env():
+    kind = os.getenv("LLM_PROVIDER", "gemini").lower()
+    if kind == "fake":
+        return FakeProvider(
+            latency_ms=float(os.getenv("LLM_FAKE_LATENCY_MS", "800")),
+            latency_sigma=float(os.getenv("LLM_FAKE_LATENCY_SIGMA", "0.5")),
+            output_words=int(os.getenv("LLM_FAKE_OUTPUT_WORDS", "250")),
+            output_sigma=float(os.getenv("LLM_FAKE_OUTPUT_SIGMA", "0.4")),
+            seed=int(os.getenv("LLM_FAKE_SEED", "0")),
+        )
+    if kind == "gemini":
+        return GeminiProvider(model=os.getenv("LLM_MODEL", DEFAULT_MODEL))
+    raise ValueError(f"Unknown LLM_PROVIDER '{kind}' (use gemini or fake)")
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider():
+    """The provider shared by every agent, created on first use"""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = provider_from_env()
+            print(f"[AI] ✅ Using model: {_provider.name}")
+        return _provider
+
+
+def set_provider(provider: LLMProvider):
+    """Replace the shared provider (benchmarks, offline runs); returns the previous one"""
+    global _provider
+    with _provider_lock:
+        previous, _provider = _provider, provider
+        return previous
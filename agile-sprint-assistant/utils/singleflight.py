@@ -0,0 +1,91 @@
+"""
+Singleflight - Share one in-flight call among concurrent identical requests
+The first caller for a key runs the work; callers arriving with the same key
+while it is running wait for it and get the same result (or exception)
+instead of starting a duplicate. Once the call finishes the key is
+forgotten, so later requests run afresh. Works for threads (do; FastAPI
+runs plain def routes in its threadpool) and asyncio (do_async), and counts
+how many requests were deduplicated across both.
+"""
+import asyncio
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}    # key -> _Call running in some thread
+        self._tasks = {}    # (event loop, key) -> asyncio.Task
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.executions = 0
+        self.deduplicated = 0
+
+    def do(self, key, fn, *args):
+        """fn(*args), unless the same key is already running: then wait and share its outcome"""
+        with self._lock:
+            self.requests += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.deduplicated += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key, fn, *args):
+        """
+        await fn(*args) (a coroutine function), shared with concurrent awaits
+        of the same key on this event loop. A waiter being cancelled does not
+        cancel the shared call.
+        """
+        loop = asyncio.get_running_loop()
+        task_key = (loop, key)
+        with self._lock:
+            self.requests += 1
+            task = self._tasks.get(task_key)
+            if task is None:
+                task = self._tasks[task_key] = loop.create_task(fn(*args))
+                task.add_done_callback(lambda _: self._forget(task_key))
+                self.executions += 1
+            else:
+                self.deduplicated += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, task_key):
+        with self._lock:
+            self._tasks.pop(task_key, None)
+
+    def metrics(self):
+        """Request, execution and dedupe counts plus the calls currently in flight"""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "executions": self.executions,
+                "deduplicated": self.deduplicated,
+                "dedupe_rate": round(self.deduplicated / self.requests, 3) if self.requests else 0.0,
+                "in_flight": len(self._calls) + len(self._tasks),
+            }